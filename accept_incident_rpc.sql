@@ -0,0 +1,64 @@
+-- ==========================================
+-- ⚡ ATOMIC INCIDENT ACCEPTANCE (RPC)
+-- ==========================================
+
+-- Accepting an incident used to take four round trips (update, room lookup,
+-- profile lookup, message insert) and let two responders both "win".
+-- This function claims the incident only while it is still 'pending' and
+-- posts the system chat message in the same transaction.
+
+-- 1. Responder column (written by the backend on acceptance)
+--    This is a second foreign key from incidents to profiles, so PostgREST
+--    embeds of profiles from incidents must name the constraint,
+--    e.g. profiles!incidents_reporter_id_fkey(full_name).
+alter table public.incidents
+add column if not exists responder_id uuid references public.profiles(id);
+
+-- 2. Accept function
+--    p_responder_name is optional: the backend passes its cached display name
+--    and the function only reads profiles when it is missing.
+create or replace function public.accept_incident(
+  p_incident_id uuid,
+  p_responder_id uuid,
+  p_responder_name text default null
+)
+returns jsonb as $$
+declare
+  v_incident public.incidents%rowtype;
+  v_name text;
+begin
+  update public.incidents
+  set status = 'dispatched',
+      responder_id = p_responder_id,
+      updated_at = timezone('utc'::text, now())
+  where id = p_incident_id
+    and status = 'pending'
+  returning * into v_incident;
+
+  if not found then
+    -- Lost the race (or the incident does not exist): report the current status
+    return jsonb_build_object(
+      'accepted', false,
+      'status', (select status from public.incidents where id = p_incident_id)
+    );
+  end if;
+
+  v_name := coalesce(
+    p_responder_name,
+    (select full_name from public.profiles where id = p_responder_id)
+  );
+
+  insert into public.incident_messages (room_id, sender_id, content)
+  select r.id, p_responder_id, '🚨 ' || coalesce(v_name, 'A responder') || ' has accepted this incident.'
+  from public.incident_rooms r
+  where r.incident_id = p_incident_id;
+
+  return jsonb_build_object(
+    'accepted', true,
+    'incident', to_jsonb(v_incident),
+    'responder_name', v_name
+  );
+end;
+$$ language plpgsql;
+
+grant execute on function public.accept_incident(uuid, uuid, text) to anon, authenticated;
@@ -0,0 +1,164 @@
+import math
+import os
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .spatial_index import Bbox, in_bbox
+except ImportError:
+    from Feature1.spatial_index import Bbox, in_bbox
+
+# Grid cells per 256px map tile edge, so a cluster covers roughly 64px on screen
+CLUSTER_CELLS_PER_TILE = int(os.getenv("CLUSTER_CELLS_PER_TILE", "4"))
+# Zoom levels above this share its grid (cells are then a few metres wide)
+CLUSTER_MAX_ZOOM = int(os.getenv("CLUSTER_MAX_ZOOM", "18"))
+
+SEVERITY_RANK = {"low": 0, "medium": 1, "high": 2, "critical": 3}
+
+
+class _Cell:
+    __slots__ = ("ids", "lat_sum", "lon_sum", "severities")
+
+    def __init__(self):
+        self.ids = set()
+        self.lat_sum = 0.0
+        self.lon_sum = 0.0
+        self.severities: Dict[str, int] = {}
+
+
+class ClusterIndex:
+    """
+    Active incidents aggregated into zoom-dependent lat/lon grid cells.
+
+    A zoom level is built from the point table the first time it is asked
+    for and from then on kept current by `update()`, which the active
+    incident cache calls on every write-through. A full cache refresh calls
+    `reset()` and drops the built levels.
+    """
+
+    def __init__(self, cells_per_tile: int = CLUSTER_CELLS_PER_TILE, max_zoom: int = CLUSTER_MAX_ZOOM):
+        self.cells_per_tile = cells_per_tile
+        self.max_zoom = max_zoom
+        self._lock = threading.Lock()
+        # incident id -> (lat, lon, severity)
+        self._points: Dict[str, Tuple[float, float, Optional[str]]] = {}
+        self._levels: Dict[int, Dict[Tuple[int, int], _Cell]] = {}
+
+        # Metrics
+        self.level_builds = 0
+        self.incremental_updates = 0
+
+    def clamp_zoom(self, zoom: int) -> int:
+        return max(0, min(self.max_zoom, zoom))
+
+    def cell_deg(self, zoom: int) -> float:
+        return 360.0 / (2 ** zoom) / self.cells_per_tile
+
+    @staticmethod
+    def _point(row: Optional[dict]):
+        if not row or row.get("latitude") is None or row.get("longitude") is None:
+            return None
+        severity = (row.get("severity") or "").lower() or None
+        return float(row["latitude"]), float(row["longitude"]), severity
+
+    # --- Maintenance (called by ActiveIncidentCache under its lock) ---
+
+    def reset(self, rows: Iterable[dict]):
+        points = {}
+        for row in rows:
+            point = self._point(row)
+            if point is not None:
+                points[str(row["id"])] = point
+        with self._lock:
+            self._points = points
+            self._levels = {}
+
+    def update(self, incident_id: str, row: Optional[dict]):
+        """Moves one incident to its new position/severity, or drops it when row is None."""
+        incident_id = str(incident_id)
+        new = self._point(row)
+        with self._lock:
+            old = self._points.pop(incident_id, None)
+            if new is not None:
+                self._points[incident_id] = new
+            if old == new:
+                return
+            for zoom, cells in self._levels.items():
+                if old is not None:
+                    self._remove(cells, zoom, incident_id, old)
+                if new is not None:
+                    self._add(cells, zoom, incident_id, new)
+            self.incremental_updates += 1
+
+    def _key(self, zoom: int, lat: float, lon: float) -> Tuple[int, int]:
+        size = self.cell_deg(zoom)
+        return math.floor(lat / size), math.floor(lon / size)
+
+    def _add(self, cells, zoom, incident_id, point):
+        lat, lon, severity = point
+        cell = cells.get(self._key(zoom, lat, lon))
+        if cell is None:
+            cell = cells[self._key(zoom, lat, lon)] = _Cell()
+        cell.ids.add(incident_id)
+        cell.lat_sum += lat
+        cell.lon_sum += lon
+        if severity:
+            cell.severities[severity] = cell.severities.get(severity, 0) + 1
+
+    def _remove(self, cells, zoom, incident_id, point):
+        lat, lon, severity = point
+        key = self._key(zoom, lat, lon)
+        cell = cells.get(key)
+        if cell is None or incident_id not in cell.ids:
+            return
+        cell.ids.discard(incident_id)
+        if not cell.ids:
+            del cells[key]
+            return
+        cell.lat_sum -= lat
+        cell.lon_sum -= lon
+        if severity:
+            cell.severities[severity] -= 1
+            if not cell.severities[severity]:
+                del cell.severities[severity]
+
+    def _level(self, zoom: int) -> Dict[Tuple[int, int], _Cell]:
+        cells = self._levels.get(zoom)
+        if cells is None:
+            cells = {}
+            for incident_id, point in self._points.items():
+                self._add(cells, zoom, incident_id, point)
+            self._levels[zoom] = cells
+            self.level_builds += 1
+        return cells
+
+    # --- Reads ---
+
+    def clusters(self, zoom: int, bbox: Optional[Bbox] = None) -> List[dict]:
+        """Clusters whose centroid lies in bbox; single-incident cells carry its id."""
+        zoom = self.clamp_zoom(zoom)
+        result = []
+        with self._lock:
+            for cell in self._level(zoom).values():
+                count = len(cell.ids)
+                lat, lon = cell.lat_sum / count, cell.lon_sum / count
+                if bbox is not None and not in_bbox(lat, lon, bbox):
+                    continue
+                cluster = {
+                    "latitude": round(lat, 6),
+                    "longitude": round(lon, 6),
+                    "count": count,
+                    "max_severity": max(cell.severities, key=lambda s: SEVERITY_RANK.get(s, -1), default=None),
+                }
+                if count == 1:
+                    cluster["incident_id"] = next(iter(cell.ids))
+                result.append(cluster)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "points": len(self._points),
+            "built_zooms": sorted(self._levels),
+            "level_builds": self.level_builds,
+            "incremental_updates": self.incremental_updates,
+        }
@@ -0,0 +1,76 @@
+import os
+import threading
+import time
+from datetime import datetime
+from typing import Optional
+
+# Reports of the same type within this distance and time window of an open
+# incident are attached to it instead of creating a new one. 0 disables.
+COALESCE_RADIUS_KM = float(os.getenv("COALESCE_RADIUS_KM", "1.0"))
+COALESCE_WINDOW_SECONDS = float(os.getenv("COALESCE_WINDOW_SECONDS", "1800"))
+
+
+def parse_timestamp(value) -> Optional[float]:
+    """Epoch seconds from an ISO timestamp as returned by the stores."""
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+class IncidentCoalescer:
+    """
+    Finds the open incident a new report duplicates.
+
+    Uses the active-incident cache's spatial grid, so a check costs a few
+    cell lookups no matter how many incidents are open. Matching is
+    best-effort: two reports arriving at the same instant can still both
+    create incidents.
+    """
+
+    def __init__(self, cache, radius_km: float = COALESCE_RADIUS_KM, window_seconds: float = COALESCE_WINDOW_SECONDS):
+        self.cache = cache
+        self.radius_km = radius_km
+        self.window_seconds = window_seconds
+        self._lock = threading.Lock()
+
+        # Metrics
+        self.checks = 0
+        self.coalesced = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.radius_km > 0 and self.window_seconds > 0
+
+    def find_match(self, crisis_type: str, latitude: float, longitude: float, now: float = None) -> Optional[dict]:
+        """The nearest open incident of the same type reported within the window."""
+        if not self.enabled or not self.cache.loaded:
+            return None
+        now = time.time() if now is None else now
+        crisis_type = (crisis_type or "").lower()
+        with self._lock:
+            self.checks += 1
+        for _, incident in self.cache.nearby(latitude, longitude, self.radius_km):
+            if (incident.get("type") or "").lower() != crisis_type:
+                continue
+            created = parse_timestamp(incident.get("created_at"))
+            if created is not None and now - created <= self.window_seconds:
+                return incident
+        return None
+
+    def record_coalesced(self):
+        with self._lock:
+            self.coalesced += 1
+
+    def stats(self) -> dict:
+        return {
+            "enabled": self.enabled,
+            "radius_km": self.radius_km,
+            "window_seconds": self.window_seconds,
+            "checks": self.checks,
+            # Each one is an incident insert and a push fan-out that did not happen
+            "coalesced_reports": self.coalesced,
+            "coalesce_ratio": round(self.coalesced / self.checks, 4) if self.checks else None,
+        }
@@ -1,4 +1,4 @@
-from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, UploadFile, File, Form, Depends, Header
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect, HTTPException, UploadFile, File, Form, Depends, Header, Query, BackgroundTasks, Request
 from datetime import datetime
 import uuid
 import asyncio
@@ -9,9 +9,7 @@ from typing import Dict, List, Optional
 from pydantic import BaseModel
 from enum import Enum
 import random
-from geopy.distance import geodesic
-from dotenv import load_dotenv
-from supabase import create_client, Client
+import logging
 from pathlib import Path
 
 # Add the backend directory to sys.path to ensure imports work in Vercel
@@ -22,33 +20,63 @@ if str(base_dir) not in sys.path:
 
 # Import AI & Web Push Services
 try:
+    from . import services
     from .gemini_service import analyze_crisis_with_llm
-    from .push_service import send_web_push
+    from .push_service import deliver_push
+    from .incident_cache import ActiveIncidentCache
+    from .coalescing import IncidentCoalescer
+    from .ttl_cache import TTLCache
+    from .image_pipeline import BUCKET, read_upload_capped, store_incident_image
+    from .push_outbox import PushOutbox, OutboxWorker
+    from .push_throttle import SubscriberThrottle
+    from .clustering import ClusterIndex
+    from .spatial_index import parse_bbox
+    from .storage.base import INCIDENT_COLUMNS
+    from .push_pool import ProcessPoolPusher, PUSH_FANOUT_MODE, PUSH_POOL_MIN_BATCH
 except ImportError:
     # Fallback to absolute if relative fails
+    from Feature1 import services
     from Feature1.gemini_service import analyze_crisis_with_llm
-    from Feature1.push_service import send_web_push
+    from Feature1.push_service import deliver_push
+    from Feature1.incident_cache import ActiveIncidentCache
+    from Feature1.coalescing import IncidentCoalescer
+    from Feature1.ttl_cache import TTLCache
+    from Feature1.image_pipeline import BUCKET, read_upload_capped, store_incident_image
+    from Feature1.push_outbox import PushOutbox, OutboxWorker
+    from Feature1.push_throttle import SubscriberThrottle
+    from Feature1.clustering import ClusterIndex
+    from Feature1.spatial_index import parse_bbox
+    from Feature1.storage.base import INCIDENT_COLUMNS
+    from Feature1.push_pool import ProcessPoolPusher, PUSH_FANOUT_MODE, PUSH_POOL_MIN_BATCH
 
-# Force load from backend directory
-env_path = Path(__file__).parent.parent / '.env'
-load_dotenv(dotenv_path=env_path)
+try:
+    from common.logging_setup import LOG_ITEM_SAMPLE_RATE
+    from common.responses import ORJSONResponse
+    from common.conditional import PROCESS_TOKEN, make_etag, not_modified, validator_headers
+except ImportError:
+    from backend.common.logging_setup import LOG_ITEM_SAMPLE_RATE
+    from backend.common.responses import ORJSONResponse
+    from backend.common.conditional import PROCESS_TOKEN, make_etag, not_modified, validator_headers
 
-# Settings
-RADIUS_KM = 5
+logger = logging.getLogger(__name__)
 
-# Supabase Client Setup
-SUPABASE_URL = os.getenv("SUPABASE_URL") or os.getenv("VITE_SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_KEY") or os.getenv("VITE_SUPABASE_ANON_KEY")
+# Load backend/.env once; clients themselves are created on first use
+services.load_env()
 
-supabase: Client = None
-if SUPABASE_URL and SUPABASE_KEY:
-    try:
-        supabase = create_client(SUPABASE_URL, SUPABASE_KEY)
-        print("DEBUG: Supabase Initialized")
-    except Exception as e:
-        print(f"DEBUG: Supabase Init Failed: {e}")
-else:
-    print("DEBUG: Supabase Credentials MISSING")
+# Settings
+RADIUS_KM = 5
+# Active-incident cache: reads older than this many seconds go back to the store
+ACTIVE_CACHE_MAX_STALENESS = float(os.getenv("ACTIVE_CACHE_MAX_STALENESS", "30"))
+# Background refresh period to pick up incident changes made outside this service
+ACTIVE_CACHE_REFRESH_INTERVAL = float(os.getenv("ACTIVE_CACHE_REFRESH_INTERVAL", "10"))
+# Chat messages returned per page by the incident detail view
+MESSAGE_PAGE_SIZE = 50
+MAX_MESSAGE_PAGE_SIZE = 200
+# Columns /crisis/active returns when the caller does not ask for `fields`
+ACTIVE_DEFAULT_FIELDS = ("id", "title", "type", "severity", "status", "latitude", "longitude", "created_at")
+ACTIVE_FIELDS = set(INCIDENT_COLUMNS) | {"created_at"}
+# Responder display names are cached for this long (seconds)
+PROFILE_NAME_TTL = float(os.getenv("PROFILE_NAME_TTL", "600"))
 
 # Create router
 router = APIRouter(prefix="/crisis", tags=["Crisis Dispatch"])
@@ -64,9 +92,128 @@ class PushSubscription(BaseModel):
     user_id: str
     subscription: dict
 
+# --- Active Incident Cache ---
+active_cache = ActiveIncidentCache(
+    max_staleness=ACTIVE_CACHE_MAX_STALENESS,
+    refresh_interval=ACTIVE_CACHE_REFRESH_INTERVAL
+)
+_cache_refresher: Optional[asyncio.Task] = None
+
+# Per-zoom map clusters, kept current by the cache's write-throughs
+clusters = ClusterIndex()
+active_cache.add_listener(clusters)
+
+# Duplicate reports of an open incident (same type, nearby, recent) are attached to it
+coalescer = IncidentCoalescer(active_cache)
+
+# responder_id -> profiles.full_name
+responder_names = TTLCache(maxsize=2048, ttl=PROFILE_NAME_TTL)
+
+def _load_active_incidents() -> List[dict]:
+    return services.store().list_active_incidents()
+
+async def _refresh_active_cache_forever():
+    # The first pass warms the cache; it runs in the background so startup
+    # does not wait on the storage client or a WAN round trip
+    first = True
+    while True:
+        try:
+            if await asyncio.to_thread(services.store):
+                await asyncio.to_thread(active_cache.refresh, _load_active_incidents)
+                if first:
+                    logger.info("Active cache warmed", extra={"incidents": active_cache.stats()["size"]})
+        except Exception as e:
+            logger.warning("Active cache refresh failed: %s", e)
+        first = False
+        await asyncio.sleep(active_cache.refresh_interval)
+
+@router.on_event("startup")
+async def warm_active_cache():
+    # The router is mounted twice (with and without /api), so this runs more than once
+    global _cache_refresher
+    if _cache_refresher is not None:
+        return
+    _cache_refresher = asyncio.create_task(_refresh_active_cache_forever())
+
+@router.on_event("shutdown")
+async def stop_active_cache():
+    global _cache_refresher
+    if _cache_refresher is not None:
+        _cache_refresher.cancel()
+        _cache_refresher = None
+
+# --- Push Subscription Hygiene ---
+def prune_subscriptions(subscription_ids: List[str]):
+    """Deletes subscriptions the push service reported as gone (404/410) in one batch."""
+    if not subscription_ids:
+        return
+    try:
+        services.store().delete_push_subscriptions(subscription_ids)
+        logger.info("Pruned expired push subscriptions", extra={"count": len(subscription_ids)})
+    except Exception as e:
+        logger.error("Subscription pruning failed: %s", e)
+
+# --- Recipient Selection ---
+def nearby_recipients(subscriptions: List[dict], latitude: float, longitude: float, radius_km: float = RADIUS_KM) -> List[dict]:
+    """
+    Outbox recipients for the subscriptions whose owner's last location is
+    within `radius_km` of the incident. Rows come from list_push_subscriptions().
+    """
+    from geopy.distance import geodesic
+
+    recipients = []
+    # Per-subscriber lines are sampled and skipped entirely above DEBUG
+    debug_items = logger.isEnabledFor(logging.DEBUG)
+    item_log = {"sample_rate": LOG_ITEM_SAMPLE_RATE}
+    for row in subscriptions:
+        profile = row.get("profiles")
+        if not profile:
+            if debug_items:
+                logger.debug("No profile for subscriber", extra={**item_log, "user_id": row.get("user_id")})
+            continue
+
+        p_lat, p_lon = profile.get("last_latitude"), profile.get("last_longitude")
+        if p_lat is not None and p_lon is not None:
+            dist = geodesic((p_lat, p_lon), (latitude, longitude)).km
+            if debug_items:
+                logger.debug("Subscriber distance", extra={**item_log, "user_id": row.get("user_id"), "distance_km": round(dist, 2)})
+            if dist <= radius_km:
+                recipients.append({
+                    "subscriber_id": row["user_id"],
+                    "subscription_id": row.get("id"),
+                    "subscription": row["subscription"]
+                })
+        else:
+            if debug_items:
+                logger.debug("Subscriber has no location synced", extra={**item_log, "user_id": row.get("user_id")})
+    return recipients
+
+# --- Push Outbox ---
+push_outbox = PushOutbox()
+# PUSH_FANOUT_MODE=process spreads payload encryption for large batches over all cores
+push_pool = ProcessPoolPusher() if PUSH_FANOUT_MODE == "process" else None
+outbox_worker = OutboxWorker(
+    push_outbox,
+    deliver=deliver_push,
+    on_gone=prune_subscriptions,
+    bulk_deliver=push_pool.deliver_many if push_pool else None,
+    bulk_min_batch=PUSH_POOL_MIN_BATCH,
+    throttle=SubscriberThrottle()
+)
+
+@router.on_event("startup")
+async def start_outbox_worker():
+    outbox_worker.start()
+
+@router.on_event("shutdown")
+async def stop_outbox_worker():
+    await outbox_worker.stop()
+    if push_pool:
+        push_pool.shutdown()
+
 # --- Realtime Management ---
 async def broadcast_to_dashboards(payload: dict):
-    print(f"DEBUG: Broadcast: {payload.get('type')}")
+    logger.debug("Broadcast: %s", payload.get("type"))
     pass
 
 # --- Endpoints ---
@@ -74,47 +221,67 @@ async def broadcast_to_dashboards(payload: dict):
 @router.post("/subscribe")
 async def subscribe_push(sub: PushSubscription):
     """Stores a user's push subscription."""
-    if not supabase:
-        raise HTTPException(status_code=500, detail="Supabase not initialized.")
+    store = services.store()
+    if not store:
+        raise HTTPException(status_code=500, detail="Storage not initialized.")
     
     try:
         # Upsert subscription
-        data = supabase.table("push_subscriptions").upsert({
-            "user_id": sub.user_id,
-            "subscription": sub.subscription
-        }, on_conflict="user_id").execute()
+        store.upsert_push_subscription(sub.user_id, sub.subscription)
         return {"status": "success", "message": "Subscribed"}
     except Exception as e:
-        print(f"DEBUG: Subscription failed: {e}")
+        logger.error("Subscription failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.post("/alert")
 async def create_crisis_alert(
+    background_tasks: BackgroundTasks,
     title: str = Form(...),
     description: str = Form(""),
     crisis_type: str = Form(...),
-    latitude: float = Form(...),
-    longitude: float = Form(...),
+    latitude: float = Form(..., ge=-90, le=90),
+    longitude: float = Form(..., ge=-180, le=180),
     image: Optional[UploadFile] = File(None),
     reporter_id: Optional[str] = Form(None)
 ):
-    if not supabase:
-        raise HTTPException(status_code=500, detail="Supabase not initialized. Check Vercel/Local env vars.")
+    store = services.store()
+    if not store:
+        raise HTTPException(status_code=500, detail="Storage not initialized. Check Vercel/Local env vars.")
 
     try:
-        # 1. Image Upload
+        # 1. Image Intake
+        # The upload is size- and type-checked here; storage upload and WebP
+        # resizing run after the response. Public URLs are deterministic, so
+        # the incident row references the original right away and is pointed
+        # at the display/thumbnail variants once they have been written.
+        upload = None
         image_public_url = None
         if image:
-            try:
-                file_content = await image.read()
-                file_ext = image.filename.split(".")[-1]
-                file_path = f"incidents/{uuid.uuid4()}.{file_ext}"
-                supabase.storage.from_("incident-images").upload(file_path, file_content)
-                image_public_url = supabase.storage.from_("incident-images").get_public_url(file_path)
-            except Exception as e:
-                print(f"Image Upload Failed: {e}")
-
-        # 2. AI Analysis
+            upload = await read_upload_capped(image)
+            image_public_url = store.image_bucket(BUCKET).get_public_url(upload.original_path)
+
+        # 2. Coalescing
+        # A surge of reports about one event becomes one incident and one fan-out
+        duplicate_of = coalescer.find_match(crisis_type, latitude, longitude)
+        if duplicate_of:
+            report = f"📍 Additional report: {title}"
+            if description:
+                report += f" — {description}"
+            if image_public_url:
+                report += f"\n{image_public_url}"
+            await asyncio.to_thread(store.attach_report, duplicate_of["id"], reporter_id, report)
+            coalescer.record_coalesced()
+            if upload:
+                background_tasks.add_task(store_incident_image, upload, lambda: store.image_bucket(BUCKET))
+            logger.info("Report coalesced", extra={"incident_id": duplicate_of["id"], "crisis_type": crisis_type})
+            return {
+                "message": "Report attached to existing incident",
+                "incident_id": duplicate_of["id"],
+                "queued_notifications": 0,
+                "coalesced": True
+            }
+
+        # 3. AI Analysis
         ai_analysis = {
             "severity": "critical", 
             "reasoning": "Standard emergency dispatch protocol.",
@@ -122,7 +289,7 @@ async def create_crisis_alert(
         }
         final_severity = ai_analysis.get("severity", "medium").lower()
 
-        # 3. DB Insert
+        # 4. DB Insert
         new_incident = {
             "title": title,
             "description": description,
@@ -132,18 +299,27 @@ async def create_crisis_alert(
             "severity": final_severity,
             "status": "pending",
             "image_url": image_public_url,
+            "thumbnail_url": None,
             "ai_analysis": ai_analysis,
             "reporter_id": reporter_id 
         }
-        data = supabase.table("incidents").insert(new_incident).execute()
-        incident_id = data.data[0]["id"] if data.data else None
+        created = store.create_incident(new_incident)
+        incident_id = created["id"] if created else None
+        if created:
+            active_cache.upsert(created)
+        if upload:
+            def use_variants(display_url: str, thumb_url: str):
+                if incident_id:
+                    active_cache.upsert(store.update_incident_images(incident_id, display_url, thumb_url))
 
-        # 4. Notify Nearby Users via Web Push
+            background_tasks.add_task(store_incident_image, upload, lambda: store.image_bucket(BUCKET), use_variants)
+
+        # 5. Notify Nearby Users via Web Push
+        queued_count = 0
         try:
-            # Fetch subscriptions and user locations
-            # Join with profiles to get last locations
-            res = supabase.table("push_subscriptions").select("*, profiles(last_latitude, last_longitude)").execute()
-            print(f"DEBUG: Found {len(res.data)} total push subscriptions.")
+            # Fetch subscriptions with their owners' last locations
+            subscriptions = store.list_push_subscriptions()
+            logger.info("Scanning push subscriptions", extra={"incident_id": incident_id, "subscriptions": len(subscriptions)})
             
             payload = {
                 "title": f"🚨 EMERGENCY: {title}",
@@ -151,79 +327,207 @@ async def create_crisis_alert(
                 "data": {
                     "incident_id": incident_id,
                     "latitude": latitude,
-                    "longitude": longitude
+                    "longitude": longitude,
+                    "severity": final_severity
                 }
             }
 
-            notification_count = 0
-            for row in res.data:
-                profile = row.get("profiles")
-                if not profile:
-                    print(f"DEBUG: No profile found for sub user_id: {row.get('user_id')}")
-                    continue
-                
-                p_lat, p_lon = profile.get("last_latitude"), profile.get("last_longitude")
-                if p_lat is not None and p_lon is not None:
-                    dist = geodesic((p_lat, p_lon), (latitude, longitude)).km
-                    print(f"DEBUG: User {row.get('user_id')} distance: {dist:.2f}km")
-                    if dist <= RADIUS_KM:
-                        success = send_web_push(row["subscription"], payload)
-                        if success: notification_count += 1
-                else:
-                    print(f"DEBUG: User {row.get('user_id')} has NO location synced.")
+            recipients = nearby_recipients(subscriptions, latitude, longitude)
             
-            print(f"DEBUG: Notifications triggered for {notification_count} users.")
+            # Delivery happens in the outbox worker; the jobs survive a process recycle
+            queued_count = await asyncio.to_thread(push_outbox.enqueue, incident_id, recipients, payload)
+            outbox_worker.wake()
+            logger.info("Notifications queued", extra={"incident_id": incident_id, "queued": queued_count})
         except Exception as e:
-            print(f"Push Notification Logic Failed: {e}")
+            logger.exception("Push notification logic failed: %s", e)
 
-        return {"message": "Incident Reported & Alerts Sent", "incident_id": incident_id}
+        return {"message": "Incident Reported & Alerts Queued", "incident_id": incident_id, "queued_notifications": queued_count, "coalesced": False}
 
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"ERROR in /alert: {str(e)}")
+        logger.exception("Error in /alert: %s", e)
         raise HTTPException(status_code=500, detail=f"Server Error: {str(e)}")
 
+def _parse_fields(fields: Optional[str]) -> Optional[tuple]:
+    """Column projection for /crisis/active; None means whole rows."""
+    if not fields:
+        return ACTIVE_DEFAULT_FIELDS
+    if fields.strip() == "*":
+        return None
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = [f for f in requested if f not in ACTIVE_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    # id is always included so clients can key and fetch details
+    return tuple(dict.fromkeys(["id", *requested]))
+
+def _active_etag(*params) -> str:
+    return make_etag(PROCESS_TOKEN, active_cache.version, *params)
+
 @router.get("/active")
-async def get_active_crises():
-    if not supabase:
-        raise HTTPException(status_code=500, detail="Supabase not initialized. Check Vercel Env Vars.")
-    
+async def get_active_crises(
+    request: Request,
+    bbox: Optional[str] = Query(None, description="west,south,east,north"),
+    fields: Optional[str] = Query(None, description="Comma-separated columns, or * for whole rows")
+):
+    """
+    Open incidents, newest first. `bbox` limits them to the visible map area
+    and `fields` picks the columns (a compact set by default).
+    """
+    if not services.store():
+        raise HTTPException(status_code=500, detail="Storage not initialized. Check Vercel Env Vars.")
     try:
-        response = supabase.table("incidents").select("*").neq("status", "closed").execute()
-        return {"crises": response.data}
+        bounds = parse_bbox(bbox) if bbox else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid bbox: {e}")
+    projection = _parse_fields(fields)
+
+    # While the cache is fresh its version covers the data, so a poll that
+    # changed nothing is answered without reading anything
+    if active_cache.is_fresh():
+        cached = not_modified(request, _active_etag(bbox, fields), active_cache.changed_at)
+        if cached:
+            return cached
+
+    try:
+        active_cache.ensure_fresh(_load_active_incidents)
+        # Cached store rows are serialized as-is, without jsonable_encoder
+        return ORJSONResponse(
+            {"crises": active_cache.query(bounds, projection)},
+            headers=validator_headers(_active_etag(bbox, fields), active_cache.changed_at)
+        )
     except Exception as e:
-        print(f"ERROR in /active: {str(e)}")
+        logger.error("Error in /active: %s", e)
         raise HTTPException(status_code=500, detail=f"Fetch Error: {str(e)}")
 
+@router.get("/clusters")
+async def get_incident_clusters(
+    request: Request,
+    zoom: int = Query(..., ge=0, le=22),
+    bbox: Optional[str] = Query(None, description="west,south,east,north")
+):
+    """
+    Active incidents grouped into grid cells sized for the map zoom, with a
+    count and the highest severity per cell. Cells holding a single incident
+    include its id.
+    """
+    if not services.store():
+        raise HTTPException(status_code=500, detail="Storage not initialized. Check Vercel Env Vars.")
+    try:
+        bounds = parse_bbox(bbox) if bbox else None
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid bbox: {e}")
+
+    if active_cache.is_fresh():
+        cached = not_modified(request, _active_etag("clusters", zoom, bbox), active_cache.changed_at)
+        if cached:
+            return cached
+
+    try:
+        active_cache.ensure_fresh(_load_active_incidents)
+    except Exception as e:
+        logger.error("Error in /clusters: %s", e)
+        raise HTTPException(status_code=500, detail=f"Fetch Error: {str(e)}")
+    return ORJSONResponse({
+        "zoom": clusters.clamp_zoom(zoom),
+        "version": active_cache.version,
+        "clusters": clusters.clusters(zoom, bounds),
+    }, headers=validator_headers(_active_etag("clusters", zoom, bbox), active_cache.changed_at))
+
+@router.get("/active/stats")
+async def get_active_cache_stats():
+    """Hit/miss counters and staleness of the in-memory active-incident cache, plus coalescing and clustering counters."""
+    return {**active_cache.stats(), "coalescing": coalescer.stats(), "clustering": clusters.stats()}
+
+@router.get("/outbox/stats")
+async def get_outbox_stats():
+    """Push outbox queue depth by status and worker delivery counters."""
+    return await asyncio.to_thread(outbox_worker.stats)
+
+@router.post("/outbox/drain")
+async def drain_outbox(time_budget: float = Query(20.0, gt=0, le=60)):
+    """
+    Delivers due push jobs until the queue is empty or the time budget is spent.
+    Meant for a scheduled trigger on hosts that freeze idle processes (Vercel).
+    """
+    processed = await outbox_worker.drain(time_budget=time_budget)
+    return {"processed": processed, **(await asyncio.to_thread(push_outbox.stats))}
+
 @router.get("/{incident_id}")
-async def get_incident_detail(incident_id: str):
-    if not supabase: raise HTTPException(500, "Supabase missing")
+async def get_incident_detail(
+    request: Request,
+    incident_id: str,
+    limit: int = Query(MESSAGE_PAGE_SIZE, ge=1, le=MAX_MESSAGE_PAGE_SIZE),
+    before: Optional[str] = None
+):
+    """
+    Incident details plus one page of its chat, newest page first.
+    Pass the returned `next_before` as `before=` to scroll further back.
+    """
+    store = services.store()
+    if not store: raise HTTPException(500, "Storage missing")
     try:
-        inc_res = supabase.table("incidents").select("*, profiles(full_name, phone_number)").eq("id", incident_id).execute()
-        if not inc_res.data: raise HTTPException(404, "Not found")
-        
-        incident = inc_res.data[0]
-        room_res = supabase.table("incident_rooms").select("id").eq("incident_id", incident_id).execute()
-        messages = []
-        if room_res.data:
-            room_id = room_res.data[0]["id"]
-            msg_res = supabase.table("incident_messages").select("*, profiles(full_name)").eq("room_id", room_id).order("created_at", desc=False).execute()
-            messages = msg_res.data
-        return {"incident": incident, "messages": messages}
+        # Incident, reporter, room and the latest messages in one query.
+        # One extra message is requested to learn whether an older page exists.
+        detail = await asyncio.to_thread(store.get_incident_detail, incident_id, limit + 1, before)
+        if not detail: raise HTTPException(404, "Not found")
+
+        incident = detail["incident"]
+        messages = detail["messages"]
+
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        messages.reverse()  # Chronological order for the chat view
+        response = ORJSONResponse({
+            "incident": incident,
+            "room_id": detail["room_id"],
+            "messages": messages,
+            "has_more": has_more,
+            "next_before": messages[0]["created_at"] if has_more and messages else None
+        })
+        # Chat messages are written straight to Supabase by clients, so no
+        # counter here sees them; validate on the body instead (saves the transfer)
+        etag = make_etag(response.body)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        response.headers.update(validator_headers(etag))
+        return response
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(500, str(e))
 
 @router.post("/{incident_id}/accept")
 async def accept_incident(incident_id: str, responder_id: str = Form(...)):
-    if not supabase: raise HTTPException(500, "Supabase missing")
+    """
+    Claims a pending incident for a responder in one round trip.
+    The store only updates rows still in 'pending' (the `accept_incident` RPC
+    in Supabase, see accept_incident_rpc.sql), so concurrent accepts have
+    exactly one winner.
+    """
+    store = services.store()
+    if not store: raise HTTPException(500, "Storage missing")
     try:
-        res = supabase.table("incidents").update({"status": "dispatched", "responder_id": responder_id}).eq("id", incident_id).execute()
-        updated_incident = res.data[0]
-        room_res = supabase.table("incident_rooms").select("id").eq("incident_id", incident_id).execute()
-        if room_res.data:
-            room_id = room_res.data[0]["id"]
-            prof_res = supabase.table("profiles").select("full_name").eq("id", responder_id).execute()
-            name = prof_res.data[0]["full_name"] if prof_res.data else "A responder"
-            supabase.table("incident_messages").insert({"room_id": room_id, "sender_id": responder_id, "content": f"🚨 {name} has accepted this incident."}).execute()
+        # A None name lets the store read profiles itself on a cache miss
+        result = await asyncio.to_thread(
+            store.accept_incident, incident_id, responder_id, responder_names.get(responder_id)
+        )
+
+        if not result.get("accepted"):
+            status = result.get("status")
+            if status is None:
+                raise HTTPException(404, "Not found")
+            raise HTTPException(409, f"Incident already {status}")
+
+        if result.get("responder_name"):
+            responder_names.set(responder_id, result["responder_name"])
+
+        updated_incident = result["incident"]
+        active_cache.upsert(updated_incident)
         return {"message": "Accepted", "incident": updated_incident}
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(500, str(e))
@@ -1,21 +1,30 @@
-import google.generativeai as genai
-import os
 import json
+import logging
 from typing import Dict, Any
-from dotenv import load_dotenv
-load_dotenv()
-# Configure Gemini
-# NOTE: Using a placeholder if environment variable is not set. 
-# The user must set GEMINI_API_KEY in their environment.
-GOOGLE_API_KEY = os.getenv("GEMINI_API_KEY")
+
+try:
+    from . import services
+except ImportError:
+    from Feature1 import services
+
+try:
+    from common.metrics import timed
+except ImportError:
+    from backend.common.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Gemini is configured lazily by services.gemini() on the first analysis.
+# NOTE: Falls back to a mock response if GEMINI_API_KEY is not set.
 
 def analyze_crisis_with_llm(description: str, crisis_type: str, cnn_score: float = 0.0, cnn_label: str = "") -> Dict[str, Any]:
     """
     Analyzes crisis using Gemini 2.0 Flash to determine severity, 
     agencies needed, and suggested actions.
     """
-    if not GOOGLE_API_KEY:
-        print("Warning: GEMINI_API_KEY not set. Returning mock AI response.")
+    genai = services.gemini()
+    if genai is None:
+        logger.warning("GEMINI_API_KEY not set. Returning mock AI response.")
         return _mock_ai_response(description)
 
     try:
@@ -52,11 +61,12 @@ def analyze_crisis_with_llm(description: str, crisis_type: str, cnn_score: float
         }}
         """
         
-        response = model.generate_content(prompt, generation_config={"response_mime_type": "application/json"})
+        with timed("gemini", "generate_content"):
+            response = model.generate_content(prompt, generation_config={"response_mime_type": "application/json"})
         return json.loads(response.text)
         
     except Exception as e:
-        print(f"Error calling Gemini: {e}")
+        logger.error("Error calling Gemini: %s", e)
         # Fallback to simple matching if AI fails
         return _mock_ai_response(description)
 
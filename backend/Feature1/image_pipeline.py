@@ -0,0 +1,161 @@
+import importlib.util
+import io
+import logging
+import os
+import uuid
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Optional
+
+from fastapi import HTTPException, UploadFile
+
+try:
+    from common.metrics import timed
+except ImportError:
+    from backend.common.metrics import timed
+
+logger = logging.getLogger(__name__)
+
+# Pillow is imported when the first image is processed. Without it the
+# original upload is stored as-is and no variants are made.
+PILLOW_AVAILABLE = importlib.util.find_spec("PIL") is not None
+
+# Settings
+BUCKET = "incident-images"
+MAX_IMAGE_BYTES = int(os.getenv("MAX_IMAGE_BYTES", str(10 * 1024 * 1024)))
+
+DISPLAY_MAX_SIZE = (1280, 1280)
+DISPLAY_QUALITY = 80
+THUMB_MAX_SIZE = (320, 320)
+THUMB_QUALITY = 60
+
+# Magic-byte signatures -> (extension, content type)
+_SIGNATURES = [
+    (b"\xff\xd8\xff", ("jpg", "image/jpeg")),
+    (b"\x89PNG\r\n\x1a\n", ("png", "image/png")),
+    (b"GIF87a", ("gif", "image/gif")),
+    (b"GIF89a", ("gif", "image/gif")),
+]
+
+
+def sniff_image_type(head: bytes) -> Optional[tuple]:
+    """Detects the image format from its first bytes, ignoring the filename."""
+    for magic, kind in _SIGNATURES:
+        if head.startswith(magic):
+            return kind
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ("webp", "image/webp")
+    return None
+
+
+@dataclass
+class IncidentImage:
+    """A validated upload (Starlette's spooled temp file), plus its storage plan."""
+    file: BinaryIO
+    size: int
+    ext: str
+    content_type: str
+    original_path: str
+    display_path: str
+    thumb_path: str
+
+    @property
+    def variants_enabled(self) -> bool:
+        return PILLOW_AVAILABLE
+
+
+async def read_upload_capped(image: UploadFile, max_bytes: int = MAX_IMAGE_BYTES) -> IncidentImage:
+    """
+    Checks an upload against the size cap (413) and its magic bytes (415)
+    before anything is stored. The request body as a whole is capped before
+    parsing by common.body_limit; this bounds the image itself. Starlette's
+    spooled file is reused rather than copied.
+    """
+    size = image.size
+    if size is None:
+        image.file.seek(0, os.SEEK_END)
+        size = image.file.tell()
+    if size > max_bytes:
+        raise HTTPException(413, f"Image exceeds {max_bytes // (1024 * 1024)} MB limit")
+    if size == 0:
+        raise HTTPException(400, "Empty image upload")
+
+    await image.seek(0)
+    kind = sniff_image_type(await image.read(16))
+    if kind is None:
+        raise HTTPException(415, "Unsupported image type. Use JPEG, PNG, WebP or GIF.")
+    await image.seek(0)
+
+    ext, content_type = kind
+    base = f"incidents/{uuid.uuid4()}"
+    # FastAPI closes form files only after background tasks have run
+    return IncidentImage(
+        file=image.file,
+        size=size,
+        ext=ext,
+        content_type=content_type,
+        original_path=f"{base}/original.{ext}",
+        display_path=f"{base}/display.webp",
+        thumb_path=f"{base}/thumb.webp",
+    )
+
+
+def _encode_webp(img, max_size: tuple, quality: int) -> bytes:
+    from PIL import Image
+
+    variant = img.copy()
+    variant.thumbnail(max_size, Image.LANCZOS)
+    buf = io.BytesIO()
+    variant.save(buf, format="WEBP", quality=quality, method=4)
+    return buf.getvalue()
+
+
+def make_variants(data: bytes) -> tuple:
+    """Returns (display_webp, thumb_webp) bytes for an image."""
+    from PIL import Image, ImageOps
+
+    img = Image.open(io.BytesIO(data))
+    # Let the JPEG decoder downscale while decoding; much cheaper for phone photos
+    img.draft("RGB", DISPLAY_MAX_SIZE)
+    img = ImageOps.exif_transpose(img)
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+    return (
+        _encode_webp(img, DISPLAY_MAX_SIZE, DISPLAY_QUALITY),
+        _encode_webp(img, THUMB_MAX_SIZE, THUMB_QUALITY),
+    )
+
+
+def store_incident_image(upload: IncidentImage, bucket_factory: Callable,
+                         on_variants: Optional[Callable[[str, str], None]] = None):
+    """
+    Background task: uploads the original and, when Pillow is available, a
+    downscaled WebP display image and thumbnail to Supabase Storage.
+    `bucket_factory` returns the storage bucket proxy (`supabase.storage.from_`).
+
+    Incidents reference the original until the variants exist: once both
+    are uploaded, `on_variants(display_url, thumb_url)` is called so the
+    caller can switch over. An image Pillow cannot decode keeps the original.
+    """
+    try:
+        data = upload.file.read()
+        bucket = bucket_factory()
+        with timed("supabase", "storage.upload"):
+            bucket.upload(upload.original_path, data, {"content-type": upload.content_type})
+    except Exception as e:
+        logger.error("Image upload failed: %s", e, extra={"path": upload.original_path})
+        return
+    finally:
+        upload.file.close()
+
+    if not upload.variants_enabled:
+        return
+    try:
+        display, thumb = make_variants(data)
+        with timed("supabase", "storage.upload"):
+            bucket.upload(upload.display_path, display, {"content-type": "image/webp"})
+        with timed("supabase", "storage.upload"):
+            bucket.upload(upload.thumb_path, thumb, {"content-type": "image/webp"})
+        if on_variants:
+            on_variants(bucket.get_public_url(upload.display_path), bucket.get_public_url(upload.thumb_path))
+    except Exception as e:
+        logger.warning("Image variants failed, keeping the original: %s", e, extra={"path": upload.original_path})
@@ -0,0 +1,265 @@
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+try:
+    from .spatial_index import Bbox, GridIndex, haversine_km, in_bbox
+except ImportError:
+    from Feature1.spatial_index import Bbox, GridIndex, haversine_km, in_bbox
+
+# Statuses that take an incident off the active board (mirrors the
+# `.neq("status", "closed")` filter used by /crisis/active).
+INACTIVE_STATUSES = {"closed"}
+
+
+def _apply_write(incidents: Dict[str, dict], incident_id: str, row: Optional[dict]) -> Optional[dict]:
+    """Applies one write-through (None = removal) to `incidents`. Returns the stored row, None if gone."""
+    if row is None or row.get("status") in INACTIVE_STATUSES:
+        incidents.pop(incident_id, None)
+        return None
+    # Merge so partial rows (e.g. update responses) keep existing fields
+    merged = dict(incidents.get(incident_id, {}))
+    merged.update(row)
+    incidents[incident_id] = merged
+    return merged
+
+
+class ActiveIncidentCache:
+    """
+    In-process table of active incidents, keyed by incident id.
+
+    The crisis router is the only writer of incident state in this service, so
+    its handlers update the table write-through after each successful Supabase
+    write. A periodic refresh replaces the whole table to pick up changes made
+    elsewhere (dashboards, SQL console, other instances).
+
+    Incidents are also kept in a spatial grid so `nearby()` is a cell lookup
+    rather than a scan of the whole table.
+
+    A refresh loads its snapshot outside the lock, so write-throughs that
+    land while it is loading are journaled and re-applied on top of the
+    snapshot; otherwise the older snapshot would drop them.
+
+    Listeners added with `add_listener()` (e.g. clustering.ClusterIndex) are
+    told about every change under the cache lock: `reset(rows)` after a full
+    reload that changed something and `update(incident_id, row_or_None)`
+    after a write-through.
+    """
+
+    def __init__(self, max_staleness: float = 30.0, refresh_interval: float = 10.0, cell_km: float = 1.0):
+        # Reads older than max_staleness force a synchronous reload
+        self.max_staleness = max_staleness
+        self.refresh_interval = refresh_interval
+
+        self._lock = threading.Lock()
+        self._incidents: Dict[str, dict] = {}
+        self._grid = GridIndex(cell_km)
+        self._loaded_at: Optional[float] = None
+        # Bumped on every change so readers can tell whether the data moved
+        self.version = 0
+        # Wall-clock time of the last version bump (for Last-Modified)
+        self.changed_at = time.time()
+        self._listeners = []
+        # Write-throughs made while a refresh is loading: (seq, id, row or None)
+        self._write_seq = 0
+        self._loads_in_flight = 0
+        self._journal: List[Tuple[int, str, Optional[dict]]] = []
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.refresh_failures = 0
+        self.write_throughs = 0
+
+    # --- State ---
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def age(self) -> Optional[float]:
+        """Seconds since the last full load, or None if never loaded."""
+        if self._loaded_at is None:
+            return None
+        return time.monotonic() - self._loaded_at
+
+    def is_fresh(self) -> bool:
+        age = self.age()
+        return age is not None and age <= self.max_staleness
+
+    # --- Writes ---
+
+    def add_listener(self, listener):
+        with self._lock:
+            self._listeners.append(listener)
+            if self._loaded_at is not None:
+                listener.reset(self._incidents.values())
+
+    def replace_all(self, rows: List[dict], since: Optional[int] = None):
+        """
+        Replaces the table with a full snapshot of active incidents. With
+        `since` (a write sequence taken before the snapshot was loaded),
+        write-throughs made after it are re-applied on top.
+        """
+        incidents = {str(row["id"]): row for row in rows if row.get("id") is not None}
+        with self._lock:
+            if since is not None:
+                for seq, incident_id, row in self._journal:
+                    if seq > since:
+                        _apply_write(incidents, incident_id, row)
+            changed = incidents != self._incidents or self._loaded_at is None
+            self._incidents = incidents
+            self._grid.clear()
+            for incident_id, row in incidents.items():
+                self._index(incident_id, row)
+            # A refresh that finds nothing new keeps the version, so HTTP validators
+            # stay valid, and leaves listeners (and the cluster levels they built) alone
+            if changed:
+                for listener in self._listeners:
+                    listener.reset(incidents.values())
+                self._bump()
+            self._loaded_at = time.monotonic()
+            self.refreshes += 1
+
+    def upsert(self, row: dict):
+        """Write-through for a single incident row returned by Supabase."""
+        if not row or row.get("id") is None:
+            return
+        incident_id = str(row["id"])
+        with self._lock:
+            self._journal_write(incident_id, row)
+            merged = _apply_write(self._incidents, incident_id, row)
+            if merged is None:
+                self._grid.remove(incident_id)
+            else:
+                self._index(incident_id, merged)
+            for listener in self._listeners:
+                listener.update(incident_id, merged)
+            self._bump()
+            self.write_throughs += 1
+
+    def remove(self, incident_id: str):
+        with self._lock:
+            self._journal_write(str(incident_id), None)
+            self._grid.remove(str(incident_id))
+            if self._incidents.pop(str(incident_id), None) is not None:
+                for listener in self._listeners:
+                    listener.update(str(incident_id), None)
+                self._bump()
+                self.write_throughs += 1
+
+    def _journal_write(self, incident_id: str, row: Optional[dict]):
+        self._write_seq += 1
+        if self._loads_in_flight:
+            self._journal.append((self._write_seq, incident_id, row))
+
+    def _bump(self):
+        self.version += 1
+        self.changed_at = time.time()
+
+    def _index(self, incident_id: str, row: dict):
+        lat, lon = row.get("latitude"), row.get("longitude")
+        if lat is None or lon is None:
+            self._grid.remove(incident_id)
+        else:
+            self._grid.insert(incident_id, float(lat), float(lon))
+
+    # --- Reads ---
+
+    def get(self, incident_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self._incidents.get(str(incident_id))
+            return dict(row) if row is not None else None
+
+    def snapshot(self) -> List[dict]:
+        """Returns a copy of all active incidents, newest first."""
+        with self._lock:
+            rows = list(self._incidents.values())
+        rows.sort(key=lambda r: r.get("created_at") or "", reverse=True)
+        return rows
+
+    def query(self, bbox: Optional[Bbox] = None, fields: Optional[Iterable[str]] = None) -> List[dict]:
+        """
+        Active incidents inside bbox (all if None), newest first, each cut
+        down to `fields` (whole row copies if None). The bbox goes through
+        the grid, so only incidents in the visible cells are looked at.
+        """
+        with self._lock:
+            if bbox is None:
+                rows = list(self._incidents.values())
+            else:
+                rows = []
+                for incident_id in self._grid.within(bbox):
+                    row = self._incidents[incident_id]
+                    if in_bbox(float(row["latitude"]), float(row["longitude"]), bbox):
+                        rows.append(row)
+            if fields is None:
+                rows = [dict(row) for row in rows]
+            else:
+                rows = [{field: row.get(field) for field in fields} for row in rows]
+        rows.sort(key=lambda r: r.get("created_at") or "", reverse=True)
+        return rows
+
+    def nearby(self, lat: float, lon: float, radius_km: float) -> List[Tuple[float, dict]]:
+        """(distance_km, incident copy) for active incidents within radius_km, nearest first."""
+        found = []
+        with self._lock:
+            for incident_id in self._grid.candidates(lat, lon, radius_km):
+                row = self._incidents[incident_id]
+                distance = haversine_km(lat, lon, float(row["latitude"]), float(row["longitude"]))
+                if distance <= radius_km:
+                    found.append((distance, dict(row)))
+        found.sort(key=lambda item: item[0])
+        return found
+
+    def read(self, loader: Callable[[], List[dict]]) -> List[dict]:
+        """
+        Serves active incidents from memory while the table is within its
+        staleness bound; otherwise reloads it synchronously through `loader`.
+        """
+        self.ensure_fresh(loader)
+        return self.snapshot()
+
+    def ensure_fresh(self, loader: Callable[[], List[dict]]):
+        """Counts a read and reloads through `loader` if the table is stale."""
+        if self.is_fresh():
+            self.hits += 1
+        else:
+            self.misses += 1
+            self.refresh(loader)
+
+    def refresh(self, loader: Callable[[], List[dict]]):
+        with self._lock:
+            self._loads_in_flight += 1
+            since = self._write_seq
+        try:
+            try:
+                rows = loader()
+            except Exception:
+                self.refresh_failures += 1
+                raise
+            self.replace_all(rows, since=since)
+        finally:
+            with self._lock:
+                self._loads_in_flight -= 1
+                if not self._loads_in_flight:
+                    self._journal.clear()
+
+    def stats(self) -> dict:
+        total_reads = self.hits + self.misses
+        age = self.age()
+        return {
+            "size": len(self._incidents),
+            "version": self.version,
+            "changed_at": self.changed_at,
+            "age_seconds": round(age, 3) if age is not None else None,
+            "max_staleness_seconds": self.max_staleness,
+            "refresh_interval_seconds": self.refresh_interval,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total_reads, 4) if total_reads else None,
+            "refreshes": self.refreshes,
+            "refresh_failures": self.refresh_failures,
+            "write_throughs": self.write_throughs,
+        }
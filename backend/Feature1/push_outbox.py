@@ -0,0 +1,431 @@
+import asyncio
+import json
+import logging
+import os
+import random
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Optional
+
+try:
+    from .push_service import PushOutcome
+    from .push_throttle import build_digest
+except ImportError:
+    from Feature1.push_service import PushOutcome
+    from Feature1.push_throttle import build_digest
+
+logger = logging.getLogger(__name__)
+
+# --- CONFIGURATION ---
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+# Vercel only allows writes under /tmp
+_DEFAULT_OUTBOX_DB = "/tmp/push_outbox.db" if os.getenv("VERCEL") else os.path.join(BASE_DIR, "push_outbox.db")
+PUSH_OUTBOX_DB = os.getenv("PUSH_OUTBOX_DB", _DEFAULT_OUTBOX_DB)
+
+PUSH_WORKER_CONCURRENCY = int(os.getenv("PUSH_WORKER_CONCURRENCY", "16"))
+PUSH_WORKER_BATCH_SIZE = int(os.getenv("PUSH_WORKER_BATCH_SIZE", "200"))
+PUSH_WORKER_POLL_INTERVAL = float(os.getenv("PUSH_WORKER_POLL_INTERVAL", "5"))
+PUSH_MAX_ATTEMPTS = int(os.getenv("PUSH_MAX_ATTEMPTS", "6"))
+PUSH_BACKOFF_BASE = 2.0
+PUSH_BACKOFF_MAX = 15 * 60
+# A claimed job not completed within this many seconds is handed out again.
+# Workers renew it every third of the lease while the batch is sending, so
+# it only runs out when the worker holding the jobs has died.
+PUSH_CLAIM_LEASE = 120
+
+# Job statuses
+PENDING = "pending"
+IN_FLIGHT = "in_flight"
+SENT = "sent"
+GONE = "gone"
+FAILED = "failed"
+# Gave up after PUSH_MAX_ATTEMPTS transient failures
+DEAD = "dead"
+
+
+def backoff_delay(attempts: int) -> float:
+    """Exponential backoff with full jitter for the given attempt count."""
+    return random.uniform(0, min(PUSH_BACKOFF_MAX, PUSH_BACKOFF_BASE * (2 ** attempts)))
+
+
+class PushOutbox:
+    """
+    Durable queue of push jobs in a local SQLite file.
+
+    Alerts enqueue one job per (incident, subscriber); the UNIQUE constraint
+    makes re-enqueueing the same alert a no-op. Workers claim due jobs under a
+    lease, so jobs held by a process that died are picked up again.
+    """
+
+    def __init__(self, db_file: str = PUSH_OUTBOX_DB, max_attempts: int = PUSH_MAX_ATTEMPTS):
+        self.db_file = db_file
+        self.max_attempts = max_attempts
+        # The file and schema are created on first use, not at import
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not self._schema_ready:
+            self._init_schema(conn)
+            self._schema_ready = True
+        return conn
+
+    def _init_schema(self, conn: sqlite3.Connection):
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS push_jobs (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                incident_id TEXT NOT NULL,
+                subscriber_id TEXT NOT NULL,
+                subscription_id TEXT,
+                subscription TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pending',
+                attempts INTEGER NOT NULL DEFAULT 0,
+                next_attempt_at REAL NOT NULL,
+                last_error TEXT,
+                created_at REAL NOT NULL,
+                updated_at REAL NOT NULL,
+                UNIQUE (incident_id, subscriber_id)
+            );
+            CREATE INDEX IF NOT EXISTS idx_push_jobs_due ON push_jobs (status, next_attempt_at);
+        """)
+        conn.commit()
+
+    def enqueue(self, incident_id: str, recipients: Iterable[dict], payload: dict) -> int:
+        """
+        Queues one job per recipient (keys: subscriber_id, subscription_id,
+        subscription). Returns how many jobs were new.
+        """
+        now = time.time()
+        payload_json = json.dumps(payload)
+        rows = [
+            (str(incident_id), str(r["subscriber_id"]), r.get("subscription_id"),
+             json.dumps(r["subscription"]), payload_json, now, now, now)
+            for r in recipients
+        ]
+        if not rows:
+            return 0
+        conn = self._connect()
+        try:
+            before = conn.total_changes
+            conn.executemany("""
+                INSERT OR IGNORE INTO push_jobs
+                (incident_id, subscriber_id, subscription_id, subscription, payload, next_attempt_at, created_at, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            """, rows)
+            conn.commit()
+            return conn.total_changes - before
+        finally:
+            conn.close()
+
+    def claim(self, limit: int = PUSH_WORKER_BATCH_SIZE, lease: float = PUSH_CLAIM_LEASE) -> List[dict]:
+        """Marks up to `limit` due jobs as in flight and returns them."""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            rows = conn.execute("""
+                SELECT * FROM push_jobs
+                WHERE status IN (?, ?) AND next_attempt_at <= ?
+                ORDER BY next_attempt_at
+                LIMIT ?
+            """, (PENDING, IN_FLIGHT, now, limit)).fetchall()
+            if rows:
+                conn.executemany(
+                    "UPDATE push_jobs SET status = ?, next_attempt_at = ?, updated_at = ? WHERE id = ?",
+                    [(IN_FLIGHT, now + lease, now, row["id"]) for row in rows]
+                )
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+        jobs = []
+        for row in rows:
+            job = dict(row)
+            job["subscription"] = json.loads(job["subscription"])
+            job["payload"] = json.loads(job["payload"])
+            jobs.append(job)
+        return jobs
+
+    def complete(self, results: List[tuple]):
+        """
+        Records (job, PushOutcome, error) results. Transient failures and
+        skipped endpoints are rescheduled with backoff until max_attempts.
+        """
+        now = time.time()
+        updates = []
+        for job, outcome, error in results:
+            attempts = job["attempts"] + 1
+            if outcome == PushOutcome.SENT:
+                status, next_at = SENT, now
+            elif outcome == PushOutcome.GONE:
+                status, next_at = GONE, now
+            elif outcome == PushOutcome.FAILED:
+                status, next_at = FAILED, now
+            elif attempts >= self.max_attempts:
+                status, next_at = DEAD, now
+            else:
+                status, next_at = PENDING, now + backoff_delay(attempts)
+            updates.append((status, attempts, next_at, error, now, job["id"]))
+        if not updates:
+            return
+        conn = self._connect()
+        try:
+            conn.executemany("""
+                UPDATE push_jobs
+                SET status = ?, attempts = ?, next_attempt_at = ?, last_error = ?, updated_at = ?
+                WHERE id = ?
+            """, updates)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def defer(self, job_ids: Iterable[int], until: float):
+        """Puts claimed jobs back as pending until `until` without counting an attempt."""
+        now = time.time()
+        updates = [(PENDING, until, now, job_id) for job_id in job_ids]
+        if not updates:
+            return
+        conn = self._connect()
+        try:
+            conn.executemany(
+                "UPDATE push_jobs SET status = ?, next_attempt_at = ?, updated_at = ? WHERE id = ?", updates
+            )
+            conn.commit()
+        finally:
+            conn.close()
+
+    def renew(self, job_ids: Iterable[int], lease: float = PUSH_CLAIM_LEASE):
+        """Extends the lease on jobs still in flight."""
+        until = time.time() + lease
+        updates = [(until, job_id, IN_FLIGHT) for job_id in job_ids]
+        if not updates:
+            return
+        conn = self._connect()
+        try:
+            conn.executemany("UPDATE push_jobs SET next_attempt_at = ? WHERE id = ? AND status = ?", updates)
+            conn.commit()
+        finally:
+            conn.close()
+
+    def purge(self, older_than: float = 7 * 24 * 3600) -> int:
+        """Deletes finished jobs last touched more than `older_than` seconds ago."""
+        conn = self._connect()
+        try:
+            cur = conn.execute(
+                "DELETE FROM push_jobs WHERE status IN (?, ?, ?, ?) AND updated_at < ?",
+                (SENT, GONE, FAILED, DEAD, time.time() - older_than)
+            )
+            conn.commit()
+            return cur.rowcount
+        finally:
+            conn.close()
+
+    def stats(self) -> dict:
+        conn = self._connect()
+        try:
+            rows = conn.execute("SELECT status, COUNT(*) AS count FROM push_jobs GROUP BY status").fetchall()
+            due = conn.execute(
+                "SELECT COUNT(*) AS count FROM push_jobs WHERE status IN (?, ?) AND next_attempt_at <= ?",
+                (PENDING, IN_FLIGHT, time.time())
+            ).fetchone()["count"]
+        finally:
+            conn.close()
+        return {"by_status": {row["status"]: row["count"] for row in rows}, "due": due}
+
+
+class OutboxWorker:
+    """
+    Drains a PushOutbox with bounded concurrency.
+
+    `deliver(subscription, payload) -> PushOutcome` does the actual send and
+    runs in worker threads. `on_gone(subscription_ids)` receives subscriptions
+    the push service reported as gone so they can be deleted in one batch.
+    Batches of at least `bulk_min_batch` jobs go to `bulk_deliver(items)`
+    instead when it is set (see push_pool.ProcessPoolPusher).
+
+    With a `throttle` (push_throttle.SubscriberThrottle), non-critical jobs
+    for a subscriber who is rate limited are deferred, and jobs for the same
+    subscriber that come due together go out as one digest.
+    """
+
+    def __init__(self, outbox: PushOutbox, deliver: Callable,
+                 on_gone: Optional[Callable[[List[str]], None]] = None,
+                 concurrency: int = PUSH_WORKER_CONCURRENCY,
+                 batch_size: int = PUSH_WORKER_BATCH_SIZE,
+                 poll_interval: float = PUSH_WORKER_POLL_INTERVAL,
+                 bulk_deliver: Optional[Callable] = None,
+                 bulk_min_batch: int = 0,
+                 throttle=None,
+                 lease: float = PUSH_CLAIM_LEASE):
+        self.outbox = outbox
+        self.deliver = deliver
+        self.on_gone = on_gone
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.bulk_deliver = bulk_deliver
+        self.bulk_min_batch = bulk_min_batch
+        self.throttle = throttle
+        self.lease = lease
+        self._wake: Optional[asyncio.Event] = None
+        self._task: Optional[asyncio.Task] = None
+        # Sends block on HTTP, so give them their own threads instead of the default pool
+        self._executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="push")
+
+        # Metrics
+        self.delivered = 0
+        self.attempted = 0
+
+    async def _send(self, semaphore: asyncio.Semaphore, job: dict) -> tuple:
+        async with semaphore:
+            try:
+                loop = asyncio.get_running_loop()
+                outcome = await loop.run_in_executor(self._executor, self.deliver, job["subscription"], job["payload"])
+                return job, outcome, None
+            except Exception as e:
+                return job, PushOutcome.TRANSIENT, str(e)
+
+    async def _send_bulk(self, jobs: List[dict]) -> List[tuple]:
+        items = [(job["subscription"], job["payload"]) for job in jobs]
+        try:
+            outcomes = await asyncio.to_thread(self.bulk_deliver, items)
+        except Exception as e:
+            return [(job, PushOutcome.TRANSIENT, str(e)) for job in jobs]
+        return [(job, outcome, None) for job, outcome in zip(jobs, outcomes)]
+
+    def _apply_throttle(self, jobs: List[dict]) -> tuple:
+        """
+        Splits claimed jobs into what to send now and what to defer.
+
+        Jobs whose severity bypasses the throttle always go out on their own. The rest are grouped per
+        subscriber: deferred while the subscriber is throttled, otherwise
+        sent as-is (one job) or merged into a digest whose outcome is copied
+        to every job in it. Returns (send_jobs, {until: [job ids]}).
+        """
+        send, deferred, groups = [], {}, {}
+        for job in jobs:
+            if self.throttle.bypasses(job["payload"]):
+                send.append(job)
+                self.throttle.record_sent(job["subscriber_id"], critical=True)
+            else:
+                groups.setdefault(job["subscriber_id"], []).append(job)
+
+        for subscriber_id, group in groups.items():
+            ready_at = self.throttle.ready_at(subscriber_id)
+            if ready_at is not None:
+                deferred.setdefault(ready_at, []).extend(job["id"] for job in group)
+                self.throttle.record_deferred(len(group))
+                continue
+            self.throttle.record_sent(subscriber_id, merged=len(group))
+            if len(group) == 1:
+                send.append(group[0])
+            else:
+                group.sort(key=lambda job: job["created_at"])
+                # Newest subscription wins if the subscriber re-subscribed in between
+                send.append({**group[-1], "payload": build_digest([job["payload"] for job in group]), "merged": group})
+        return send, deferred
+
+    async def _keep_leases(self, job_ids: List[int]):
+        # A slow batch outlives a fixed lease; renewing keeps it from being claimed twice
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                await asyncio.to_thread(self.outbox.renew, job_ids, self.lease)
+            except Exception as e:
+                logger.warning("Push lease renewal failed: %s", e)
+
+    async def drain_once(self) -> int:
+        """Claims and sends one batch. Returns the number of jobs processed."""
+        jobs = await asyncio.to_thread(self.outbox.claim, self.batch_size, self.lease)
+        if not jobs:
+            return 0
+        renewer = asyncio.create_task(self._keep_leases([job["id"] for job in jobs]))
+        try:
+            return await self._process(jobs)
+        finally:
+            renewer.cancel()
+
+    async def _process(self, jobs: List[dict]) -> int:
+        """Throttles, sends and records one claimed batch."""
+        send_jobs = jobs
+        if self.throttle is not None:
+            send_jobs, deferred = self._apply_throttle(jobs)
+            for until, job_ids in deferred.items():
+                await asyncio.to_thread(self.outbox.defer, job_ids, until)
+        if not send_jobs:
+            results = []
+        elif self.bulk_deliver and len(send_jobs) >= self.bulk_min_batch:
+            results = await self._send_bulk(send_jobs)
+        else:
+            semaphore = asyncio.Semaphore(self.concurrency)
+            results = await asyncio.gather(*(self._send(semaphore, job) for job in send_jobs))
+        # A digest settles every job merged into it
+        results = [
+            (member, outcome, error)
+            for job, outcome, error in results
+            for member in job.get("merged", (job,))
+        ]
+        await asyncio.to_thread(self.outbox.complete, results)
+
+        self.attempted += len(results)
+        self.delivered += sum(1 for _, outcome, _ in results if outcome == PushOutcome.SENT)
+        gone = [job["subscription_id"] for job, outcome, _ in results
+                if outcome == PushOutcome.GONE and job.get("subscription_id")]
+        if gone and self.on_gone:
+            await asyncio.to_thread(self.on_gone, gone)
+        return len(jobs)
+
+    async def drain(self, time_budget: Optional[float] = None) -> int:
+        """Sends batches until nothing is due or the time budget runs out."""
+        deadline = time.monotonic() + time_budget if time_budget else None
+        total = 0
+        while True:
+            processed = await self.drain_once()
+            total += processed
+            if not processed or (deadline and time.monotonic() >= deadline):
+                return total
+
+    def wake(self):
+        """Asks the background loop to drain now instead of at the next poll."""
+        if self._wake is not None:
+            self._wake.set()
+
+    def start(self):
+        if self._task is None:
+            self._wake = asyncio.Event()
+            self._task = asyncio.create_task(self._run_forever())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    async def _run_forever(self):
+        while True:
+            try:
+                await self.drain()
+            except Exception as e:
+                logger.exception("Push outbox drain failed: %s", e)
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+
+    def stats(self) -> dict:
+        return {
+            "running": self._task is not None,
+            "concurrency": self.concurrency,
+            "attempted": self.attempted,
+            "delivered": self.delivered,
+            "throttle": self.throttle.stats() if self.throttle is not None else None,
+            **self.outbox.stats(),
+        }
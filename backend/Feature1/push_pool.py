@@ -0,0 +1,123 @@
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+
+try:
+    from .push_service import (
+        PushOutcome, classify_push_status, failure_tracker,
+        VAPID_PRIVATE_KEY, VAPID_MAILTO
+    )
+except ImportError:
+    from Feature1.push_service import (
+        PushOutcome, classify_push_status, failure_tracker,
+        VAPID_PRIVATE_KEY, VAPID_MAILTO
+    )
+
+try:
+    from common.metrics import timed
+except ImportError:
+    from backend.common.metrics import timed
+
+# "thread" sends from the outbox worker's threads; "process" splits large
+# batches across a process pool so ECDH + AES-GCM encryption uses every core
+PUSH_FANOUT_MODE = os.getenv("PUSH_FANOUT_MODE", "thread")
+PUSH_POOL_PROCESSES = int(os.getenv("PUSH_POOL_PROCESSES", str(os.cpu_count() or 1)))
+PUSH_POOL_CHUNK_SIZE = int(os.getenv("PUSH_POOL_CHUNK_SIZE", "50"))
+# Batches smaller than this are not worth the inter-process round trip
+PUSH_POOL_MIN_BATCH = int(os.getenv("PUSH_POOL_MIN_BATCH", "100"))
+# The parent runs threads (log listener, executors, the event loop), and a
+# forked child can inherit a lock one of them held; start workers clean
+_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+# --- Worker process side ---
+
+_sender = None
+
+
+def _init_worker(private_key: Optional[str], subject: str):
+    """Runs once per pool process: parses the VAPID key and opens sessions lazily."""
+    global _sender
+    try:
+        from .push_sender import PushSender
+    except ImportError:
+        from Feature1.push_sender import PushSender
+    _sender = PushSender(private_key, subject)
+
+
+def _send_chunk(chunk: List[Tuple[int, dict, str]]) -> List[Tuple[int, str]]:
+    """Encrypts and sends (index, subscription, payload_json) items; returns (index, outcome)."""
+    from pywebpush import WebPushException
+
+    results = []
+    for index, subscription, data in chunk:
+        try:
+            response = _sender.send(subscription, data)
+            outcome = classify_push_status(response.status_code)
+        except WebPushException as ex:
+            outcome = classify_push_status(ex.response.status_code if ex.response is not None else None)
+        except Exception:
+            outcome = PushOutcome.TRANSIENT
+        results.append((index, outcome.value))
+    return results
+
+# --- Parent process side ---
+
+
+class ProcessPoolPusher:
+    """
+    Sends large push batches across a process pool.
+
+    The parent keeps the endpoint failure tracker: it drops endpoints that are
+    being skipped before dispatch and records every outcome afterwards, so the
+    behaviour matches `push_service.deliver_push` in thread mode.
+    """
+
+    def __init__(self, processes: int = PUSH_POOL_PROCESSES, chunk_size: int = PUSH_POOL_CHUNK_SIZE,
+                 private_key: Optional[str] = VAPID_PRIVATE_KEY, subject: str = VAPID_MAILTO):
+        self.processes = processes
+        self.chunk_size = chunk_size
+        self._private_key = private_key
+        self._subject = subject
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.processes,
+                mp_context=multiprocessing.get_context(_START_METHOD),
+                initializer=_init_worker,
+                initargs=(self._private_key, self._subject),
+            )
+        return self._executor
+
+    def deliver_many(self, items: List[Tuple[dict, dict]]) -> List[PushOutcome]:
+        """Sends (subscription, payload) pairs; returns one PushOutcome per item, in order."""
+        outcomes = [PushOutcome.SKIPPED] * len(items)
+        work = [
+            (index, subscription, json.dumps(payload))
+            for index, (subscription, payload) in enumerate(items)
+            if not failure_tracker.should_skip(subscription.get("endpoint", ""))
+        ]
+
+        chunks = [work[i:i + self.chunk_size] for i in range(0, len(work), self.chunk_size)]
+        with timed("webpush", "send_batch"):
+            for chunk_results in self._pool().map(_send_chunk, chunks):
+                for index, outcome_value in chunk_results:
+                    outcomes[index] = PushOutcome(outcome_value)
+
+        for (subscription, _), outcome in zip(items, outcomes):
+            endpoint = subscription.get("endpoint", "")
+            if outcome == PushOutcome.SKIPPED:
+                continue
+            if outcome in (PushOutcome.SENT, PushOutcome.GONE):
+                failure_tracker.record_success(endpoint)
+            else:
+                failure_tracker.record_failure(endpoint)
+        return outcomes
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,115 @@
+import os
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from py_vapid import Vapid
+from pywebpush import WebPusher, WebPushException
+
+# VAPID JWTs may live up to 24h; pywebpush uses 12h and so do we
+VAPID_TOKEN_LIFETIME = 12 * 60 * 60
+# Re-sign this long before expiry so no in-flight push carries an expired token
+VAPID_REFRESH_MARGIN = 10 * 60
+# Connections kept alive per push service (FCM, Mozilla autopush, Apple, ...)
+PUSH_POOL_SIZE = int(os.getenv("PUSH_POOL_SIZE", "32"))
+PUSH_TIMEOUT = 10
+
+
+def audience_for(endpoint: str) -> str:
+    """VAPID `aud` claim for a push endpoint: its scheme://host origin."""
+    url = urlparse(endpoint)
+    return f"{url.scheme}://{url.netloc}"
+
+
+class PushSender:
+    """
+    Reusable web push sender.
+
+    `pywebpush.webpush` parses the VAPID key and signs a fresh ES256 JWT on
+    every call. Subscribers share a handful of push services, so this sender
+    parses the key once and keeps one signed header set and one HTTP session
+    per audience origin. Payload encryption stays per subscriber.
+    """
+
+    def __init__(self, private_key: Optional[str], subject: str,
+                 token_lifetime: int = VAPID_TOKEN_LIFETIME,
+                 refresh_margin: int = VAPID_REFRESH_MARGIN,
+                 session_factory=requests.Session):
+        self._private_key = private_key
+        self.subject = subject
+        self.token_lifetime = token_lifetime
+        self.refresh_margin = refresh_margin
+        self._session_factory = session_factory
+
+        self._vapid: Optional[Vapid] = None
+        self._lock = threading.Lock()
+        # aud -> (expiry epoch seconds, signed headers)
+        self._headers: Dict[str, Tuple[int, dict]] = {}
+        # aud -> keep-alive session
+        self._sessions: Dict[str, requests.Session] = {}
+
+        self.signatures = 0
+
+    def _load_vapid(self) -> Vapid:
+        if self._vapid is None:
+            if not self._private_key:
+                raise WebPushException("VAPID dict missing 'private_key'")
+            if os.path.isfile(self._private_key):
+                self._vapid = Vapid.from_file(private_key_file=self._private_key)
+            else:
+                self._vapid = Vapid.from_string(private_key=self._private_key)
+        return self._vapid
+
+    def vapid_headers(self, aud: str) -> dict:
+        """Signed VAPID headers for an audience, re-signed shortly before expiry."""
+        now = int(time.time())
+        with self._lock:
+            cached = self._headers.get(aud)
+            if cached and cached[0] - self.refresh_margin > now:
+                return cached[1]
+            exp = now + self.token_lifetime
+            headers = self._load_vapid().sign({"sub": self.subject, "aud": aud, "exp": exp})
+            self._headers[aud] = (exp, headers)
+            self.signatures += 1
+            return headers
+
+    def session(self, aud: str) -> requests.Session:
+        with self._lock:
+            session = self._sessions.get(aud)
+            if session is None:
+                session = self._session_factory()
+                adapter = HTTPAdapter(pool_connections=1, pool_maxsize=PUSH_POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[aud] = session
+            return session
+
+    def send(self, subscription_info: dict, data: str, ttl: int = 0,
+             timeout: float = PUSH_TIMEOUT) -> requests.Response:
+        """
+        Encrypts and posts one notification. Raises WebPushException for any
+        non-success status, like `pywebpush.webpush`.
+        """
+        aud = audience_for(subscription_info.get("endpoint", ""))
+        response = WebPusher(subscription_info, requests_session=self.session(aud)).send(
+            data,
+            dict(self.vapid_headers(aud)),
+            ttl=ttl,
+            content_encoding="aes128gcm",
+            timeout=timeout,
+        )
+        if response.status_code > 202:
+            raise WebPushException(
+                f"Push failed: {response.status_code} {response.reason}\nResponse body:{response.text}",
+                response=response,
+            )
+        return response
+
+    def close(self):
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
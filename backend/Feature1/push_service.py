@@ -1,38 +1,139 @@
 import os
 import json
-from pywebpush import webpush, WebPushException
-from dotenv import load_dotenv
-from pathlib import Path
+import logging
+import threading
+import time
+from enum import Enum
 
-# Load env vars
-env_path = Path(__file__).parent.parent / '.env'
-load_dotenv(dotenv_path=env_path)
+try:
+    from . import services
+except ImportError:
+    from Feature1 import services
+
+try:
+    from common.metrics import timed
+    from common.logging_setup import LOG_ITEM_SAMPLE_RATE
+except ImportError:
+    from backend.common.metrics import timed
+    from backend.common.logging_setup import LOG_ITEM_SAMPLE_RATE
+
+logger = logging.getLogger(__name__)
+
+# pywebpush (and its crypto stack) is imported on first send, not at startup
+services.load_env()
 
 VAPID_PUBLIC_KEY = os.getenv("VAPID_PUBLIC_KEY")
 VAPID_PRIVATE_KEY = os.getenv("VAPID_PRIVATE_KEY")
 VAPID_MAILTO = os.getenv("VAPID_MAILTO", "mailto:admin@sankatsaathi.com")
 
-print(f"DEBUG: VAPID Status: PUB={bool(VAPID_PUBLIC_KEY)}, PRIV={bool(VAPID_PRIVATE_KEY)}, MAIL={bool(VAPID_MAILTO)}")
+# Endpoints failing this many times in a row are skipped for PUSH_SKIP_COOLDOWN seconds
+PUSH_MAX_CONSECUTIVE_FAILURES = int(os.getenv("PUSH_MAX_CONSECUTIVE_FAILURES", "5"))
+PUSH_SKIP_COOLDOWN = float(os.getenv("PUSH_SKIP_COOLDOWN", "3600"))
 
-def send_web_push(subscription_info, data):
+
+class PushOutcome(str, Enum):
+    SENT = "sent"
+    # 404/410: the subscription no longer exists and should be deleted
+    GONE = "gone"
+    # 429/5xx/network: worth retrying later
+    TRANSIENT = "transient"
+    # Other 4xx: the request itself was rejected
+    FAILED = "failed"
+    # Not attempted because the endpoint keeps failing
+    SKIPPED = "skipped"
+
+
+def classify_push_status(status_code) -> PushOutcome:
+    """Maps a push service HTTP status (None for network errors) to an outcome."""
+    if status_code is None:
+        return PushOutcome.TRANSIENT
+    if 200 <= status_code < 300:
+        return PushOutcome.SENT
+    if status_code in (404, 410):
+        return PushOutcome.GONE
+    if status_code == 429 or status_code >= 500:
+        return PushOutcome.TRANSIENT
+    return PushOutcome.FAILED
+
+
+class EndpointFailureTracker:
+    """Counts consecutive failures per push endpoint so chronic failures can be skipped."""
+
+    def __init__(self, max_failures: int = PUSH_MAX_CONSECUTIVE_FAILURES, cooldown: float = PUSH_SKIP_COOLDOWN):
+        self.max_failures = max_failures
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        # endpoint -> (consecutive failures, monotonic time of last failure)
+        self._failures = {}
+
+    def should_skip(self, endpoint: str) -> bool:
+        with self._lock:
+            entry = self._failures.get(endpoint)
+        if not entry or entry[0] < self.max_failures:
+            return False
+        # After the cooldown one probe is let through; a failure restarts the cooldown
+        return time.monotonic() - entry[1] < self.cooldown
+
+    def record_failure(self, endpoint: str):
+        with self._lock:
+            count, _ = self._failures.get(endpoint, (0, 0.0))
+            self._failures[endpoint] = (count + 1, time.monotonic())
+
+    def record_success(self, endpoint: str):
+        with self._lock:
+            self._failures.pop(endpoint, None)
+
+    def forget(self, endpoint: str):
+        self.record_success(endpoint)
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = [c for c, _ in self._failures.values()]
+        return {
+            "tracked_endpoints": len(counts),
+            "skipping_endpoints": sum(1 for c in counts if c >= self.max_failures),
+        }
+
+
+failure_tracker = EndpointFailureTracker()
+
+
+def deliver_push(subscription_info, data) -> PushOutcome:
     """
-    Sends a web push notification.
+    Sends a web push notification and classifies the result.
     :param subscription_info: Dict containing endpoint, keys (p256dh, auth)
     :param data: Dict containing title, body, icon, etc.
     """
+    endpoint = (subscription_info or {}).get("endpoint", "")
+    if failure_tracker.should_skip(endpoint):
+        return PushOutcome.SKIPPED
+
+    from pywebpush import WebPushException
+
     try:
-        response = webpush(
-            subscription_info=subscription_info,
-            data=json.dumps(data),
-            vapid_private_key=VAPID_PRIVATE_KEY,
-            vapid_claims={"sub": VAPID_MAILTO}
-        )
-        print(f"DEBUG: Push sent. Status: {response.status_code}")
-        return response.status_code == 201
+        # Parses the VAPID key once and reuses signed headers and sessions per push service
+        with timed("webpush", "send"):
+            response = services.push_sender().send(subscription_info, json.dumps(data))
+        outcome = classify_push_status(response.status_code)
+        logger.debug("Push sent", extra={"sample_rate": LOG_ITEM_SAMPLE_RATE, "status": response.status_code})
     except WebPushException as ex:
-        print(f"ERROR: Web Push failed: {ex}")
-        # If 410 (Gone) or 404, we should ideally remove the subscription from DB
-        return False
+        status_code = ex.response.status_code if ex.response is not None else None
+        outcome = classify_push_status(status_code)
+        logger.warning("Web push failed: %s", ex, extra={"outcome": outcome.value, "status": status_code})
     except Exception as e:
-        print(f"ERROR: Unexpected push error: {e}")
-        return False
+        logger.error("Unexpected push error: %s", e)
+        outcome = PushOutcome.TRANSIENT
+
+    if outcome == PushOutcome.SENT:
+        failure_tracker.record_success(endpoint)
+    elif outcome == PushOutcome.GONE:
+        # The caller deletes the subscription; nothing left to track
+        failure_tracker.forget(endpoint)
+    else:
+        failure_tracker.record_failure(endpoint)
+    return outcome
+
+
+def send_web_push(subscription_info, data):
+    """Sends a web push notification. Returns True if the push service accepted it."""
+    return deliver_push(subscription_info, data) == PushOutcome.SENT
@@ -0,0 +1,143 @@
+import os
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+# A subscriber who got a push less than this many seconds ago gets later
+# alerts merged into one digest sent when the window closes. 0 disables.
+PUSH_DIGEST_WINDOW = float(os.getenv("PUSH_DIGEST_WINDOW", "60"))
+# Token bucket per subscriber: burst size and refill rate (tokens per minute)
+PUSH_BUCKET_CAPACITY = float(os.getenv("PUSH_BUCKET_CAPACITY", "5"))
+PUSH_BUCKET_REFILL_PER_MINUTE = float(os.getenv("PUSH_BUCKET_REFILL_PER_MINUTE", "2"))
+# These severities (comma-separated) are sent at once, outside the window and
+# the bucket. Empty by default: /alert labels every report "critical" until
+# severity is actually assessed, so a "critical" bypass would throttle nothing.
+# Set PUSH_BYPASS_SEVERITIES=critical once that label means something.
+BYPASS_SEVERITIES = frozenset(
+    s.strip().lower() for s in os.getenv("PUSH_BYPASS_SEVERITIES", "").split(",") if s.strip()
+)
+# Subscribers idle this long are forgotten (their bucket is full again anyway)
+_IDLE_TTL = 3600
+
+
+def alert_severity(payload: dict) -> str:
+    return str((payload.get("data") or {}).get("severity") or "").lower()
+
+
+def build_digest(payloads: List[dict]) -> dict:
+    """One summary notification for several alerts; the newest one is opened on click."""
+    titles = [p.get("title", "").replace("🚨 EMERGENCY: ", "") for p in payloads]
+    latest = payloads[-1].get("data") or {}
+    return {
+        "title": f"🚨 {len(payloads)} emergency alerts near you",
+        "body": "; ".join(titles[:5]) + (f" and {len(titles) - 5} more" if len(titles) > 5 else ""),
+        "data": {
+            **latest,
+            "digest": True,
+            "incident_ids": [(p.get("data") or {}).get("incident_id") for p in payloads],
+        },
+    }
+
+
+class _SubscriberState:
+    __slots__ = ("tokens", "updated", "last_sent")
+
+    def __init__(self, capacity: float, now: float):
+        self.tokens = capacity
+        self.updated = now
+        self.last_sent = None
+
+
+class SubscriberThrottle:
+    """
+    Per-subscriber token bucket plus a digest window.
+
+    `ready_at()` says when a subscriber may get their next throttled push;
+    the outbox worker defers jobs until then and merges whatever piled up
+    into one digest. State is in memory, like the endpoint failure tracker.
+    """
+
+    def __init__(self, digest_window: float = PUSH_DIGEST_WINDOW,
+                 capacity: float = PUSH_BUCKET_CAPACITY,
+                 refill_per_minute: float = PUSH_BUCKET_REFILL_PER_MINUTE,
+                 bypass_severities: Iterable[str] = BYPASS_SEVERITIES):
+        self.digest_window = digest_window
+        self.bypass_severities = frozenset(bypass_severities)
+        self.capacity = capacity
+        self.refill_rate = refill_per_minute / 60.0
+        self._lock = threading.Lock()
+        self._subscribers: Dict[str, _SubscriberState] = {}
+        self._last_prune = time.time()
+
+        # Metrics
+        self.sent = 0
+        self.critical_bypassed = 0
+        self.deferred = 0
+        self.digests_sent = 0
+        self.alerts_merged = 0
+
+    def _state(self, subscriber_id: str, now: float) -> _SubscriberState:
+        state = self._subscribers.get(subscriber_id)
+        if state is None:
+            state = self._subscribers[subscriber_id] = _SubscriberState(self.capacity, now)
+        else:
+            state.tokens = min(self.capacity, state.tokens + (now - state.updated) * self.refill_rate)
+            state.updated = now
+        return state
+
+    def bypasses(self, payload: dict) -> bool:
+        """True for alerts sent at once, whatever the subscriber's throttle state."""
+        return alert_severity(payload) in self.bypass_severities
+
+    def ready_at(self, subscriber_id: str, now: float = None) -> Optional[float]:
+        """None if a non-critical push may go out now, else the earliest time it may."""
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._state(str(subscriber_id), now)
+            ready = now
+            if self.digest_window > 0 and state.last_sent is not None:
+                ready = max(ready, state.last_sent + self.digest_window)
+            if state.tokens < 1:
+                ready = max(ready, now + (1 - state.tokens) / self.refill_rate if self.refill_rate else float("inf"))
+            return None if ready <= now else ready
+
+    def record_sent(self, subscriber_id: str, merged: int = 1, critical: bool = False, now: float = None):
+        """Records one push to the subscriber, standing in for `merged` alerts."""
+        now = time.time() if now is None else now
+        with self._lock:
+            state = self._state(str(subscriber_id), now)
+            # Critical pushes never wait, but still use up the bucket if they can
+            state.tokens = max(0.0, state.tokens - 1)
+            state.last_sent = now
+            self.sent += 1
+            if critical:
+                self.critical_bypassed += 1
+            if merged > 1:
+                self.digests_sent += 1
+                self.alerts_merged += merged
+            if now - self._last_prune > _IDLE_TTL:
+                self._prune(now)
+
+    def record_deferred(self, count: int):
+        with self._lock:
+            self.deferred += count
+
+    def _prune(self, now: float):
+        self._subscribers = {k: s for k, s in self._subscribers.items() if now - s.updated < _IDLE_TTL}
+        self._last_prune = now
+
+    def stats(self) -> dict:
+        return {
+            "digest_window_seconds": self.digest_window,
+            "bucket_capacity": self.capacity,
+            "refill_per_minute": self.refill_rate * 60,
+            "bypass_severities": sorted(self.bypass_severities),
+            "tracked_subscribers": len(self._subscribers),
+            "pushes_sent": self.sent,
+            "critical_bypassed": self.critical_bypassed,
+            "deferrals": self.deferred,
+            "digests_sent": self.digests_sent,
+            "alerts_merged": self.alerts_merged,
+            # Alerts folded into a digest minus the digests themselves
+            "pushes_saved": self.alerts_merged - self.digests_sent,
+        }
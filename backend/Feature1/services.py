@@ -0,0 +1,144 @@
+"""
+Lazily created service clients.
+
+Importing the app used to load .env several times, create the Supabase client
+and import google.generativeai, pywebpush and geopy up front. That cost was
+paid on every cold start, even for /api/health. Clients are now registered
+here as factories and built on first use; heavy SDK imports live inside the
+factories.
+"""
+import logging
+import os
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict
+
+logger = logging.getLogger(__name__)
+
+_factories: Dict[str, Callable[[], Any]] = {}
+_instances: Dict[str, Any] = {}
+_lock = threading.RLock()
+_env_loaded = False
+
+
+def load_env():
+    """Loads backend/.env once per process."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _lock:
+        if not _env_loaded:
+            from dotenv import load_dotenv
+            load_dotenv(dotenv_path=Path(__file__).parent.parent / '.env')
+            _env_loaded = True
+
+
+def register(name: str, factory: Callable[[], Any]):
+    """Registers (or replaces) the factory for a service."""
+    with _lock:
+        _factories[name] = factory
+        _instances.pop(name, None)
+
+
+def get(name: str) -> Any:
+    """Returns the service instance, creating it on first use."""
+    try:
+        return _instances[name]
+    except KeyError:
+        pass
+    with _lock:
+        if name not in _instances:
+            load_env()
+            _instances[name] = _factories[name]()
+        return _instances[name]
+
+
+def override(name: str, instance: Any):
+    """Installs a ready-made instance (tests, benchmarks, offline fakes)."""
+    with _lock:
+        _instances[name] = instance
+
+
+def reset(name: str = None):
+    """Drops cached instances so the next get() rebuilds them."""
+    with _lock:
+        if name is None:
+            _instances.clear()
+        else:
+            _instances.pop(name, None)
+
+
+def is_created(name: str) -> bool:
+    return name in _instances
+
+
+# --- Built-in services ---
+
+def _create_supabase():
+    url = os.getenv("SUPABASE_URL") or os.getenv("VITE_SUPABASE_URL")
+    key = os.getenv("SUPABASE_KEY") or os.getenv("VITE_SUPABASE_ANON_KEY")
+    if not (url and key):
+        logger.warning("Supabase credentials missing")
+        return None
+    try:
+        from supabase import create_client
+        return create_client(url, key)
+    except Exception as e:
+        logger.error("Supabase init failed: %s", e)
+        return None
+
+
+def _create_gemini():
+    """The configured google.generativeai module, or None without GEMINI_API_KEY."""
+    api_key = os.getenv("GEMINI_API_KEY")
+    if not api_key:
+        return None
+    import google.generativeai as genai
+    genai.configure(api_key=api_key)
+    return genai
+
+
+def _create_push_sender():
+    try:
+        from .push_sender import PushSender
+    except ImportError:
+        from Feature1.push_sender import PushSender
+    private_key = os.getenv("VAPID_PRIVATE_KEY")
+    subject = os.getenv("VAPID_MAILTO", "mailto:admin@sankatsaathi.com")
+    logger.info("VAPID status", extra={"public": bool(os.getenv("VAPID_PUBLIC_KEY")), "private": bool(private_key), "mailto": bool(subject)})
+    return PushSender(private_key, subject)
+
+
+def _create_store():
+    """The IncidentStore picked by STORAGE_BACKEND, or None if it cannot be built."""
+    try:
+        from . import storage
+    except ImportError:
+        from Feature1 import storage
+    if storage.STORAGE_BACKEND == "sqlite":
+        logger.info("Using embedded SQLite storage", extra={"db": storage.SQLITE_STORE_DB})
+        return storage.SQLiteStore(storage.SQLITE_STORE_DB, storage.STORAGE_MEDIA_DIR, storage.STORAGE_MEDIA_URL)
+    client = supabase()
+    return storage.SupabaseStore(client) if client else None
+
+
+register("supabase", _create_supabase)
+register("gemini", _create_gemini)
+register("push_sender", _create_push_sender)
+register("store", _create_store)
+
+
+def supabase():
+    return get("supabase")
+
+
+def store():
+    return get("store")
+
+
+def gemini():
+    return get("gemini")
+
+
+def push_sender():
+    return get("push_sender")
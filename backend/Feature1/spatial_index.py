@@ -0,0 +1,129 @@
+import math
+from typing import Dict, Hashable, Iterable, Set, Tuple
+
+EARTH_RADIUS_KM = 6371.0
+KM_PER_DEGREE_LAT = 111.32
+
+# (west, south, east, north) in degrees
+Bbox = Tuple[float, float, float, float]
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Great-circle distance in km."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(math.sqrt(min(1.0, a)))
+
+
+def parse_bbox(value: str) -> Bbox:
+    """"west,south,east,north" in degrees. Raises ValueError if malformed."""
+    parts = [float(p) for p in value.split(",")]
+    if len(parts) != 4:
+        raise ValueError("bbox needs four numbers: west,south,east,north")
+    west, south, east, north = parts
+    if not (-90 <= south <= north <= 90) or not (-180 <= west <= 180 and -180 <= east <= 180):
+        raise ValueError("bbox out of range")
+    return west, south, east, north
+
+
+def in_bbox(lat: float, lon: float, bbox: Bbox) -> bool:
+    west, south, east, north = bbox
+    if not south <= lat <= north:
+        return False
+    # west > east means the box crosses the antimeridian
+    return west <= lon <= east if west <= east else lon >= west or lon <= east
+
+
+class GridIndex:
+    """
+    Uniform lat/lon grid mapping cells to item keys.
+
+    `candidates()` returns the keys in every cell that can hold a point within
+    the radius, so a radius query looks at a handful of cells instead of every
+    item. Callers still check the exact distance.
+    """
+
+    def __init__(self, cell_km: float = 1.0):
+        self.cell_km = cell_km
+        self.cell_deg = cell_km / KM_PER_DEGREE_LAT
+        self._cells: Dict[Tuple[int, int], Set[Hashable]] = {}
+        self._positions: Dict[Hashable, Tuple[int, int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def cell(self, lat: float, lon: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_deg), math.floor(lon / self.cell_deg))
+
+    def insert(self, key: Hashable, lat: float, lon: float):
+        cell = self.cell(lat, lon)
+        old = self._positions.get(key)
+        if old == cell:
+            return
+        if old is not None:
+            self._discard(key, old)
+        self._cells.setdefault(cell, set()).add(key)
+        self._positions[key] = cell
+
+    def remove(self, key: Hashable):
+        cell = self._positions.pop(key, None)
+        if cell is not None:
+            self._discard(key, cell)
+
+    def clear(self):
+        self._cells.clear()
+        self._positions.clear()
+
+    def _discard(self, key: Hashable, cell: Tuple[int, int]):
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.discard(key)
+            if not bucket:
+                del self._cells[cell]
+
+    def candidates(self, lat: float, lon: float, radius_km: float) -> Iterable[Hashable]:
+        row, col = self.cell(lat, lon)
+        lat_span = math.ceil(radius_km / self.cell_km)
+        # A degree of longitude shrinks with cos(latitude), most at the band's poleward edge
+        edge = min(90.0, abs(lat) + radius_km / KM_PER_DEGREE_LAT)
+        cos_edge = max(math.cos(math.radians(edge)), 1e-6)
+        lon_span = math.ceil(radius_km / (self.cell_km * cos_edge))
+        col_lo, col_hi = col - lon_span, col + lon_span
+        # Near the poles the span can pass all the way round: cap it at every column
+        west_col, east_col = self.cell(0, -180)[1], self.cell(0, 180)[1]
+        if col_hi - col_lo >= east_col - west_col:
+            col_lo, col_hi = west_col, east_col
+        row_lo, row_hi = row - lat_span, row + lat_span
+        if (row_hi - row_lo + 1) * (col_hi - col_lo + 1) > len(self._cells):
+            # More cells to look at than are occupied: walk the occupied ones
+            for (r, c), bucket in self._cells.items():
+                if row_lo <= r <= row_hi and col_lo <= c <= col_hi:
+                    yield from bucket
+            return
+        for r in range(row_lo, row_hi + 1):
+            for c in range(col_lo, col_hi + 1):
+                bucket = self._cells.get((r, c))
+                if bucket:
+                    yield from bucket
+
+    def within(self, bbox: Bbox) -> Iterable[Hashable]:
+        """Keys in every cell the bbox touches; callers still check exact containment."""
+        west, south, east, north = bbox
+        row_lo, col_lo = self.cell(south, west)
+        row_hi, col_hi = self.cell(north, east)
+        col_ranges = [(col_lo, col_hi)] if west <= east else [
+            (col_lo, self.cell(0, 180)[1]), (self.cell(0, -180)[1], col_hi)
+        ]
+        span = (row_hi - row_lo + 1) * sum(hi - lo + 1 for lo, hi in col_ranges)
+        if span > len(self._cells):
+            # Viewport covers more cells than are occupied: walk the occupied ones
+            for (r, c), bucket in self._cells.items():
+                if row_lo <= r <= row_hi and any(lo <= c <= hi for lo, hi in col_ranges):
+                    yield from bucket
+            return
+        for r in range(row_lo, row_hi + 1):
+            for lo, hi in col_ranges:
+                for c in range(lo, hi + 1):
+                    bucket = self._cells.get((r, c))
+                    if bucket:
+                        yield from bucket
@@ -0,0 +1,27 @@
+"""
+Storage backends for incidents, chat rooms, messages, profiles and push
+subscriptions.
+
+STORAGE_BACKEND=supabase (default) uses the Supabase client. STORAGE_BACKEND=sqlite
+keeps everything in an embedded SQLite file (SQLITE_STORE_DB) with images on
+local disk, for edge or offline deployments and benchmarks.
+"""
+import os
+
+from .base import IncidentStore
+from .sqlite_store import LocalBucket, SQLiteStore
+from .supabase_store import SupabaseStore
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "supabase").lower()
+# Vercel only allows writes under /tmp
+_DEFAULT_SQLITE_DB = "/tmp/sankat_store.db" if os.getenv("VERCEL") else os.path.join(BASE_DIR, "sankat_store.db")
+SQLITE_STORE_DB = os.getenv("SQLITE_STORE_DB", _DEFAULT_SQLITE_DB)
+# Where the sqlite backend keeps uploaded images and the URL path they are served under
+STORAGE_MEDIA_DIR = os.getenv("STORAGE_MEDIA_DIR", os.path.join(os.path.dirname(SQLITE_STORE_DB), "media"))
+STORAGE_MEDIA_URL = os.getenv("STORAGE_MEDIA_URL", "/media")
+
+__all__ = [
+    "IncidentStore", "SupabaseStore", "SQLiteStore", "LocalBucket",
+    "STORAGE_BACKEND", "SQLITE_STORE_DB", "STORAGE_MEDIA_DIR", "STORAGE_MEDIA_URL",
+]
@@ -0,0 +1,99 @@
+from abc import ABC, abstractmethod
+from typing import Iterable, List, Optional
+
+# Incident columns the stores accept on insert
+INCIDENT_COLUMNS = (
+    "id", "reporter_id", "title", "description", "latitude", "longitude", "severity",
+    "status", "type", "image_url", "thumbnail_url", "ai_analysis", "responder_id",
+)
+
+
+class IncidentStore(ABC):
+    """
+    Repository for incidents, chat rooms, messages, profiles and push
+    subscriptions. Rows are plain dicts shaped like the Supabase tables, so
+    callers do not care which backend is configured.
+
+    Creating an incident also creates its chat room (the `on_incident_created`
+    trigger does this in Supabase).
+    """
+
+    name = "base"
+
+    # --- Incidents ---
+
+    @abstractmethod
+    def list_active_incidents(self) -> List[dict]:
+        """All incidents whose status is not 'closed'."""
+
+    @abstractmethod
+    def create_incident(self, incident: dict) -> dict:
+        """Inserts an incident and returns the stored row (with id, created_at)."""
+
+    @abstractmethod
+    def get_incident_detail(self, incident_id: str, limit: int, before: Optional[str] = None) -> Optional[dict]:
+        """
+        The incident with its reporter under "profiles" ({full_name,
+        phone_number} or None), plus "room_id" and "messages": up to `limit`
+        chat messages older than `before`, newest first, each with the
+        sender under "profiles". Returns None if the incident does not exist.
+        """
+
+    @abstractmethod
+    def update_incident_images(self, incident_id: str, image_url: Optional[str],
+                               thumbnail_url: Optional[str]) -> Optional[dict]:
+        """Points an incident at its stored image variants. Returns the updated row, None if missing."""
+
+    @abstractmethod
+    def accept_incident(self, incident_id: str, responder_id: str, responder_name: Optional[str] = None) -> dict:
+        """
+        Moves a 'pending' incident to 'dispatched' for the responder and posts
+        a system message in its room, atomically. Returns {"accepted": True,
+        "incident", "responder_name"} or {"accepted": False, "status"} with
+        status None when the incident does not exist.
+        """
+
+    # --- Rooms & messages ---
+
+    @abstractmethod
+    def get_room(self, incident_id: str) -> Optional[dict]:
+        pass
+
+    @abstractmethod
+    def post_message(self, room_id: str, sender_id: Optional[str], content: str) -> dict:
+        pass
+
+    def attach_report(self, incident_id: str, reporter_id: Optional[str], content: str) -> Optional[dict]:
+        """Posts a duplicate report into the incident's room; None if it has no room."""
+        room = self.get_room(incident_id)
+        return self.post_message(room["id"], reporter_id, content) if room else None
+
+    # --- Profiles ---
+
+    @abstractmethod
+    def get_profile(self, user_id: str) -> Optional[dict]:
+        pass
+
+    @abstractmethod
+    def upsert_profile(self, profile: dict) -> dict:
+        pass
+
+    # --- Push subscriptions ---
+
+    @abstractmethod
+    def upsert_push_subscription(self, user_id: str, subscription: dict) -> dict:
+        """One subscription per user; a new one replaces the old."""
+
+    @abstractmethod
+    def list_push_subscriptions(self) -> List[dict]:
+        """Subscriptions with the owner's last location under "profiles" (or None)."""
+
+    @abstractmethod
+    def delete_push_subscriptions(self, subscription_ids: Iterable[str]):
+        pass
+
+    # --- Images ---
+
+    @abstractmethod
+    def image_bucket(self, bucket: str):
+        """Object with upload(path, data, options) and get_public_url(path)."""
@@ -0,0 +1,350 @@
+import json
+import os
+import sqlite3
+import uuid
+from datetime import datetime, timezone
+from typing import Iterable, List, Optional
+
+from .base import INCIDENT_COLUMNS, IncidentStore
+
+try:
+    from common.metrics import timed
+except ImportError:
+    from backend.common.metrics import timed
+
+# Columns stored as JSON text
+_JSON_COLUMNS = {"incidents": ("ai_analysis",), "push_subscriptions": ("subscription",)}
+
+_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS profiles (
+        id TEXT PRIMARY KEY,
+        full_name TEXT,
+        role TEXT DEFAULT 'user',
+        avatar_url TEXT,
+        phone_number TEXT,
+        last_latitude REAL,
+        last_longitude REAL,
+        created_at TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS incidents (
+        id TEXT PRIMARY KEY,
+        reporter_id TEXT REFERENCES profiles(id),
+        title TEXT NOT NULL,
+        description TEXT,
+        latitude REAL NOT NULL,
+        longitude REAL NOT NULL,
+        severity TEXT DEFAULT 'medium',
+        status TEXT DEFAULT 'pending',
+        type TEXT,
+        image_url TEXT,
+        thumbnail_url TEXT,
+        ai_analysis TEXT,
+        responder_id TEXT REFERENCES profiles(id),
+        created_at TEXT NOT NULL,
+        updated_at TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_incidents_status ON incidents (status);
+    CREATE TABLE IF NOT EXISTS incident_rooms (
+        id TEXT PRIMARY KEY,
+        incident_id TEXT UNIQUE REFERENCES incidents(id) ON DELETE CASCADE,
+        created_at TEXT NOT NULL
+    );
+    CREATE TABLE IF NOT EXISTS incident_messages (
+        id TEXT PRIMARY KEY,
+        room_id TEXT REFERENCES incident_rooms(id) ON DELETE CASCADE,
+        sender_id TEXT REFERENCES profiles(id),
+        content TEXT NOT NULL,
+        created_at TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_messages_room ON incident_messages (room_id, created_at);
+    CREATE TABLE IF NOT EXISTS push_subscriptions (
+        id TEXT PRIMARY KEY,
+        user_id TEXT UNIQUE,
+        subscription TEXT NOT NULL,
+        created_at TEXT NOT NULL
+    );
+"""
+
+
+def _now() -> str:
+    # Fixed-width ISO timestamps sort correctly as text
+    return datetime.now(timezone.utc).isoformat(timespec="microseconds")
+
+
+class LocalBucket:
+    """Image bucket on the local disk, served by the app under STORAGE_MEDIA_URL."""
+
+    def __init__(self, root: str, name: str, public_base: str):
+        self.root = os.path.join(root, name)
+        self.name = name
+        self.public_base = public_base.rstrip("/")
+
+    def upload(self, path: str, data: bytes, options=None):
+        target = os.path.join(self.root, path)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with open(target, "wb") as f:
+            f.write(data)
+
+    def get_public_url(self, path: str) -> str:
+        return f"{self.public_base}/{self.name}/{path}"
+
+
+class SQLiteStore(IncidentStore):
+    """
+    IncidentStore in an embedded SQLite file, for edge or offline deployments
+    and benchmarks. Mirrors the Supabase schema, the room-creation trigger and
+    the accept_incident RPC.
+    """
+
+    name = "sqlite"
+
+    def __init__(self, db_file: str, media_dir: str = None, media_url: str = "/media"):
+        self.db_file = db_file
+        self.media_dir = media_dir or os.path.join(os.path.dirname(os.path.abspath(db_file)), "media")
+        self.media_url = media_url
+        # The file and schema are created on first use, not at import
+        self._schema_ready = False
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        if not self._schema_ready:
+            conn.executescript(_SCHEMA)
+            conn.commit()
+            self._schema_ready = True
+        return conn
+
+    @staticmethod
+    def _row(table: str, row: sqlite3.Row) -> Optional[dict]:
+        if row is None:
+            return None
+        data = dict(row)
+        for column in _JSON_COLUMNS.get(table, ()):
+            if data.get(column) is not None:
+                data[column] = json.loads(data[column])
+        return data
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, table: str, row: dict):
+        row = dict(row)
+        for column in _JSON_COLUMNS.get(table, ()):
+            if row.get(column) is not None:
+                row[column] = json.dumps(row[column])
+        columns = ", ".join(row)
+        marks = ", ".join("?" for _ in row)
+        conn.execute(f"INSERT INTO {table} ({columns}) VALUES ({marks})", tuple(row.values()))
+
+    # --- Incidents ---
+
+    def list_active_incidents(self) -> List[dict]:
+        conn = self._connect()
+        try:
+            with timed("sqlite", "incidents.select_active"):
+                rows = conn.execute("SELECT * FROM incidents WHERE status != 'closed'").fetchall()
+            return [self._row("incidents", r) for r in rows]
+        finally:
+            conn.close()
+
+    def create_incident(self, incident: dict) -> dict:
+        unknown = set(incident) - set(INCIDENT_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown incident columns: {', '.join(sorted(unknown))}")
+        now = _now()
+        row = {"id": str(uuid.uuid4()), **incident, "created_at": now, "updated_at": now}
+        conn = self._connect()
+        try:
+            with timed("sqlite", "incidents.insert"):
+                self._insert(conn, "incidents", row)
+                self._insert(conn, "incident_rooms", {"id": str(uuid.uuid4()), "incident_id": row["id"], "created_at": now})
+                conn.commit()
+                stored = conn.execute("SELECT * FROM incidents WHERE id = ?", (row["id"],)).fetchone()
+            return self._row("incidents", stored)
+        finally:
+            conn.close()
+
+    def get_incident_detail(self, incident_id: str, limit: int, before: Optional[str] = None) -> Optional[dict]:
+        conn = self._connect()
+        try:
+            with timed("sqlite", "incidents.select_detail"):
+                incident = self._row("incidents", conn.execute(
+                    "SELECT * FROM incidents WHERE id = ?", (incident_id,)).fetchone())
+                if incident is None:
+                    return None
+                reporter = conn.execute(
+                    "SELECT full_name, phone_number FROM profiles WHERE id = ?", (incident.get("reporter_id"),)
+                ).fetchone()
+                incident["profiles"] = dict(reporter) if reporter else None
+
+                room = conn.execute("SELECT id FROM incident_rooms WHERE incident_id = ?", (incident_id,)).fetchone()
+                messages = []
+                if room:
+                    sql = """
+                        SELECT m.*, p.full_name AS _sender_name, p.id AS _sender_id
+                        FROM incident_messages m LEFT JOIN profiles p ON p.id = m.sender_id
+                        WHERE m.room_id = ?
+                    """
+                    params = [room["id"]]
+                    if before:
+                        sql += " AND m.created_at < ?"
+                        params.append(before)
+                    sql += " ORDER BY m.created_at DESC LIMIT ?"
+                    params.append(limit)
+                    for r in conn.execute(sql, params).fetchall():
+                        message = dict(r)
+                        name = message.pop("_sender_name")
+                        message["profiles"] = {"full_name": name} if message.pop("_sender_id") else None
+                        messages.append(message)
+            return {"incident": incident, "room_id": room["id"] if room else None, "messages": messages}
+        finally:
+            conn.close()
+
+    def update_incident_images(self, incident_id: str, image_url: Optional[str],
+                               thumbnail_url: Optional[str]) -> Optional[dict]:
+        conn = self._connect()
+        try:
+            with timed("sqlite", "incidents.update_images"):
+                conn.execute(
+                    "UPDATE incidents SET image_url = ?, thumbnail_url = ?, updated_at = ? WHERE id = ?",
+                    (image_url, thumbnail_url, _now(), incident_id)
+                )
+                conn.commit()
+                row = conn.execute("SELECT * FROM incidents WHERE id = ?", (incident_id,)).fetchone()
+            return self._row("incidents", row)
+        finally:
+            conn.close()
+
+    def accept_incident(self, incident_id: str, responder_id: str, responder_name: Optional[str] = None) -> dict:
+        conn = self._connect()
+        try:
+            with timed("sqlite", "incidents.accept"):
+                conn.execute("BEGIN IMMEDIATE")
+                claimed = conn.execute("""
+                    UPDATE incidents SET status = 'dispatched', responder_id = ?, updated_at = ?
+                    WHERE id = ? AND status = 'pending'
+                """, (responder_id, _now(), incident_id)).rowcount
+                if not claimed:
+                    # Lost the race (or the incident does not exist): report the current status
+                    row = conn.execute("SELECT status FROM incidents WHERE id = ?", (incident_id,)).fetchone()
+                    conn.rollback()
+                    return {"accepted": False, "status": row["status"] if row else None}
+
+                name = responder_name
+                if name is None:
+                    profile = conn.execute("SELECT full_name FROM profiles WHERE id = ?", (responder_id,)).fetchone()
+                    name = profile["full_name"] if profile else None
+                room = conn.execute("SELECT id FROM incident_rooms WHERE incident_id = ?", (incident_id,)).fetchone()
+                if room:
+                    self._insert(conn, "incident_messages", {
+                        "id": str(uuid.uuid4()), "room_id": room["id"], "sender_id": responder_id,
+                        "content": f"🚨 {name or 'A responder'} has accepted this incident.", "created_at": _now(),
+                    })
+                incident = self._row("incidents", conn.execute(
+                    "SELECT * FROM incidents WHERE id = ?", (incident_id,)).fetchone())
+                conn.commit()
+            return {"accepted": True, "incident": incident, "responder_name": name}
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.close()
+
+    # --- Rooms & messages ---
+
+    def get_room(self, incident_id: str) -> Optional[dict]:
+        conn = self._connect()
+        try:
+            return self._row("incident_rooms", conn.execute(
+                "SELECT * FROM incident_rooms WHERE incident_id = ?", (incident_id,)).fetchone())
+        finally:
+            conn.close()
+
+    def post_message(self, room_id: str, sender_id: Optional[str], content: str) -> dict:
+        row = {"id": str(uuid.uuid4()), "room_id": room_id, "sender_id": sender_id,
+               "content": content, "created_at": _now()}
+        conn = self._connect()
+        try:
+            with timed("sqlite", "incident_messages.insert"):
+                self._insert(conn, "incident_messages", row)
+                conn.commit()
+            return row
+        finally:
+            conn.close()
+
+    # --- Profiles ---
+
+    def get_profile(self, user_id: str) -> Optional[dict]:
+        conn = self._connect()
+        try:
+            return self._row("profiles", conn.execute("SELECT * FROM profiles WHERE id = ?", (user_id,)).fetchone())
+        finally:
+            conn.close()
+
+    def upsert_profile(self, profile: dict) -> dict:
+        row = {"created_at": _now(), **profile}
+        columns = ", ".join(row)
+        marks = ", ".join("?" for _ in row)
+        updates = ", ".join(f"{c} = excluded.{c}" for c in row if c not in ("id", "created_at"))
+        conn = self._connect()
+        try:
+            conn.execute(
+                f"INSERT INTO profiles ({columns}) VALUES ({marks}) "
+                f"ON CONFLICT(id) DO " + (f"UPDATE SET {updates}" if updates else "NOTHING"),
+                tuple(row.values())
+            )
+            conn.commit()
+            return self._row("profiles", conn.execute("SELECT * FROM profiles WHERE id = ?", (row["id"],)).fetchone())
+        finally:
+            conn.close()
+
+    # --- Push subscriptions ---
+
+    def upsert_push_subscription(self, user_id: str, subscription: dict) -> dict:
+        conn = self._connect()
+        try:
+            with timed("sqlite", "push_subscriptions.upsert"):
+                conn.execute("""
+                    INSERT INTO push_subscriptions (id, user_id, subscription, created_at) VALUES (?, ?, ?, ?)
+                    ON CONFLICT(user_id) DO UPDATE SET subscription = excluded.subscription
+                """, (str(uuid.uuid4()), user_id, json.dumps(subscription), _now()))
+                conn.commit()
+                row = conn.execute("SELECT * FROM push_subscriptions WHERE user_id = ?", (user_id,)).fetchone()
+            return self._row("push_subscriptions", row)
+        finally:
+            conn.close()
+
+    def list_push_subscriptions(self) -> List[dict]:
+        conn = self._connect()
+        try:
+            with timed("sqlite", "push_subscriptions.select"):
+                rows = conn.execute("""
+                    SELECT s.*, p.id AS _profile_id, p.last_latitude, p.last_longitude
+                    FROM push_subscriptions s LEFT JOIN profiles p ON p.id = s.user_id
+                """).fetchall()
+            subscriptions = []
+            for r in rows:
+                sub = self._row("push_subscriptions", r)
+                location = {"last_latitude": sub.pop("last_latitude"), "last_longitude": sub.pop("last_longitude")}
+                sub["profiles"] = location if sub.pop("_profile_id") else None
+                subscriptions.append(sub)
+            return subscriptions
+        finally:
+            conn.close()
+
+    def delete_push_subscriptions(self, subscription_ids: Iterable[str]):
+        ids = list(subscription_ids)
+        if not ids:
+            return
+        conn = self._connect()
+        try:
+            with timed("sqlite", "push_subscriptions.delete"):
+                conn.execute(f"DELETE FROM push_subscriptions WHERE id IN ({', '.join('?' for _ in ids)})", ids)
+                conn.commit()
+        finally:
+            conn.close()
+
+    # --- Images ---
+
+    def image_bucket(self, bucket: str) -> LocalBucket:
+        return LocalBucket(self.media_dir, bucket, self.media_url)
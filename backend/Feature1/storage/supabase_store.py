@@ -0,0 +1,118 @@
+from typing import Iterable, List, Optional
+
+from .base import IncidentStore
+
+try:
+    from common.metrics import timed
+except ImportError:
+    from backend.common.metrics import timed
+
+_MESSAGES = "incident_rooms.incident_messages"
+
+
+class SupabaseStore(IncidentStore):
+    """IncidentStore on the Supabase (PostgREST) client."""
+
+    name = "supabase"
+
+    def __init__(self, client):
+        self.client = client
+
+    def list_active_incidents(self) -> List[dict]:
+        with timed("supabase", "incidents.select_active"):
+            res = self.client.table("incidents").select("*").neq("status", "closed").execute()
+        return res.data or []
+
+    def create_incident(self, incident: dict) -> dict:
+        with timed("supabase", "incidents.insert"):
+            res = self.client.table("incidents").insert(incident).execute()
+        return res.data[0] if res.data else None
+
+    def get_incident_detail(self, incident_id: str, limit: int, before: Optional[str] = None) -> Optional[dict]:
+        # Incident, reporter, room and the latest messages in a single nested select.
+        # incidents has two foreign keys to profiles (reporter, responder), so the embed names one
+        query = self.client.table("incidents").select(
+            "*, profiles!incidents_reporter_id_fkey(full_name, phone_number), "
+            "incident_rooms(id, incident_messages(*, profiles(full_name)))"
+        ).eq("id", incident_id) \
+            .order("created_at", desc=True, foreign_table=_MESSAGES) \
+            .limit(limit, foreign_table=_MESSAGES)
+        if before:
+            query = query.lt(f"{_MESSAGES}.created_at", before)
+        with timed("supabase", "incidents.select_detail"):
+            res = query.execute()
+        if not res.data:
+            return None
+
+        incident = res.data[0]
+        room = incident.pop("incident_rooms", None)
+        # incident_rooms.incident_id is unique, so PostgREST may embed an object or a list
+        if isinstance(room, list):
+            room = room[0] if room else None
+        messages = (room or {}).get("incident_messages") or []
+        return {"incident": incident, "room_id": room.get("id") if room else None, "messages": messages}
+
+    def update_incident_images(self, incident_id: str, image_url: Optional[str],
+                               thumbnail_url: Optional[str]) -> Optional[dict]:
+        with timed("supabase", "incidents.update_images"):
+            res = self.client.table("incidents").update(
+                {"image_url": image_url, "thumbnail_url": thumbnail_url}
+            ).eq("id", incident_id).execute()
+        return res.data[0] if res.data else None
+
+    def accept_incident(self, incident_id: str, responder_id: str, responder_name: Optional[str] = None) -> dict:
+        # See accept_incident_rpc.sql
+        params = {
+            "p_incident_id": incident_id,
+            "p_responder_id": responder_id,
+            "p_responder_name": responder_name,
+        }
+        with timed("supabase", "rpc.accept_incident"):
+            res = self.client.rpc("accept_incident", params).execute()
+        return res.data or {}
+
+    def get_room(self, incident_id: str) -> Optional[dict]:
+        with timed("supabase", "incident_rooms.select"):
+            res = self.client.table("incident_rooms").select("*").eq("incident_id", incident_id).execute()
+        return res.data[0] if res.data else None
+
+    def post_message(self, room_id: str, sender_id: Optional[str], content: str) -> dict:
+        with timed("supabase", "incident_messages.insert"):
+            res = self.client.table("incident_messages").insert(
+                {"room_id": room_id, "sender_id": sender_id, "content": content}
+            ).execute()
+        return res.data[0] if res.data else None
+
+    def get_profile(self, user_id: str) -> Optional[dict]:
+        with timed("supabase", "profiles.select"):
+            res = self.client.table("profiles").select("*").eq("id", user_id).execute()
+        return res.data[0] if res.data else None
+
+    def upsert_profile(self, profile: dict) -> dict:
+        with timed("supabase", "profiles.upsert"):
+            res = self.client.table("profiles").upsert(profile, on_conflict="id").execute()
+        return res.data[0] if res.data else None
+
+    def upsert_push_subscription(self, user_id: str, subscription: dict) -> dict:
+        with timed("supabase", "push_subscriptions.upsert"):
+            res = self.client.table("push_subscriptions").upsert({
+                "user_id": user_id,
+                "subscription": subscription
+            }, on_conflict="user_id").execute()
+        return res.data[0] if res.data else None
+
+    def list_push_subscriptions(self) -> List[dict]:
+        # Join with profiles to get last locations
+        with timed("supabase", "push_subscriptions.select"):
+            res = self.client.table("push_subscriptions").select("*, profiles(last_latitude, last_longitude)").execute()
+        return res.data or []
+
+    def delete_push_subscriptions(self, subscription_ids: Iterable[str]):
+        ids = list(subscription_ids)
+        if not ids:
+            return
+        with timed("supabase", "push_subscriptions.delete"):
+            self.client.table("push_subscriptions").delete().in_("id", ids).execute()
+
+    def image_bucket(self, bucket: str):
+        return self.client.storage.from_(bucket)
@@ -0,0 +1,66 @@
+import datetime
+import os
+import threading
+import time
+from collections import deque
+
+# GNews plan limits (free tier: 100 requests/day). Counted per process.
+GNEWS_DAILY_QUOTA = int(os.getenv("GNEWS_DAILY_QUOTA", "100"))
+GNEWS_MINUTE_QUOTA = int(os.getenv("GNEWS_MINUTE_QUOTA", "30"))
+
+
+class QuotaExceeded(Exception):
+    pass
+
+
+class QuotaBudget:
+    """
+    Daily plus sliding per-minute request budget for an upstream API.
+
+    `try_acquire()` spends one request if both windows have room. The daily
+    window resets at UTC midnight, matching how GNews counts.
+    """
+
+    def __init__(self, daily: int = GNEWS_DAILY_QUOTA, per_minute: int = GNEWS_MINUTE_QUOTA):
+        self.daily = daily
+        self.per_minute = per_minute
+        self._lock = threading.Lock()
+        self._day = None
+        self._used_today = 0
+        self._recent = deque()
+
+        # Metrics
+        self.granted = 0
+        self.denied = 0
+
+    def _roll(self, now: float):
+        day = datetime.datetime.fromtimestamp(now, datetime.timezone.utc).date()
+        if day != self._day:
+            self._day = day
+            self._used_today = 0
+        while self._recent and now - self._recent[0] >= 60:
+            self._recent.popleft()
+
+    def try_acquire(self) -> bool:
+        now = time.time()
+        with self._lock:
+            self._roll(now)
+            if self._used_today >= self.daily or len(self._recent) >= self.per_minute:
+                self.denied += 1
+                return False
+            self._used_today += 1
+            self._recent.append(now)
+            self.granted += 1
+            return True
+
+    def stats(self) -> dict:
+        with self._lock:
+            self._roll(time.time())
+            return {
+                "daily_limit": self.daily,
+                "minute_limit": self.per_minute,
+                "remaining_today": max(0, self.daily - self._used_today),
+                "remaining_this_minute": max(0, self.per_minute - len(self._recent)),
+                "granted": self.granted,
+                "denied": self.denied,
+            }
@@ -0,0 +1,406 @@
+"""
+Caching proxy for news article images.
+
+Publisher images are fetched once, downscaled to WebP variants and kept
+under content-hash filenames in a size-bounded on-disk LRU cache, so
+clients download a small thumbnail from us instead of a multi-MB original
+from a slow origin. `news_images` maps each source URL to its content hash;
+identical images behind different URLs share files. Articles without a
+usable image get a placeholder drawn locally.
+"""
+import hashlib
+import importlib.util
+import io
+import ipaddress
+import logging
+import os
+import socket
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Optional
+from urllib.parse import urljoin, urlsplit
+from xml.sax.saxutils import escape
+
+try:
+    from common.metrics import timed
+    from common.conditional import make_etag
+except ImportError:
+    from backend.common.metrics import timed
+    from backend.common.conditional import make_etag
+
+logger = logging.getLogger(__name__)
+
+# Pillow is imported when the first image is processed. Without it the
+# original is cached and served as-is for every size.
+PILLOW_AVAILABLE = importlib.util.find_spec("PIL") is not None
+
+# Settings
+NEWS_IMAGE_CACHE_DIR = os.getenv(
+    "NEWS_IMAGE_CACHE_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "image_cache")
+)
+NEWS_IMAGE_CACHE_MAX_BYTES = int(os.getenv("NEWS_IMAGE_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+# Larger source images are not fetched
+NEWS_IMAGE_MAX_SOURCE_BYTES = int(os.getenv("NEWS_IMAGE_MAX_SOURCE_BYTES", str(10 * 1024 * 1024)))
+NEWS_IMAGE_FETCH_TIMEOUT = float(os.getenv("NEWS_IMAGE_FETCH_TIMEOUT", "10"))
+# Redirects are followed by hand so every hop's address is checked
+NEWS_IMAGE_MAX_REDIRECTS = 3
+# A failed fetch is retried after this long; until then the placeholder is served
+NEWS_IMAGE_RETRY_SECONDS = int(os.getenv("NEWS_IMAGE_RETRY_SECONDS", "3600"))
+CHUNK_SIZE = 64 * 1024
+
+# size name -> (max box, WebP quality); largest first, each is resized from the previous
+VARIANTS = {
+    "display": ((1280, 1280), 80),
+    "thumb": ((480, 480), 65),
+}
+DEFAULT_VARIANT = "thumb"
+
+# Filenames are content hashes, so a cached response never changes
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+# Placeholders standing in for a failed fetch; shorter so the retry is seen
+RETRY_CACHE_CONTROL = f"public, max-age={NEWS_IMAGE_RETRY_SECONDS}"
+
+# Stored as image_url by earlier ingests when GNews had no image
+LEGACY_PLACEHOLDER_PREFIX = "https://via.placeholder.com/"
+
+# Served without Pillow; SVG is excluded since it can carry script
+_PASSTHROUGH_TYPES = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/gif": "gif",
+    "image/webp": "webp",
+}
+
+
+class ImageFetchError(Exception):
+    pass
+
+
+@dataclass
+class ProxiedImage:
+    body: bytes
+    media_type: str
+    etag: str
+    cache_control: str
+
+
+class DiskLRU:
+    """
+    Files in one directory, evicted least-recently-used first once their
+    total size passes `max_bytes`. Recency survives restarts through file
+    mtimes, which hits refresh.
+    """
+
+    def __init__(self, directory: str = NEWS_IMAGE_CACHE_DIR, max_bytes: int = NEWS_IMAGE_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # name -> size, oldest first
+        self._bytes = 0
+        self._load()
+
+        # Metrics
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _load(self):
+        os.makedirs(self.directory, exist_ok=True)
+        found = []
+        for entry in os.scandir(self.directory):
+            if not entry.is_file():
+                continue
+            if entry.name.endswith(".tmp"):
+                # Left by a write interrupted before its rename
+                os.remove(entry.path)
+                continue
+            stat = entry.stat()
+            found.append((stat.st_mtime, entry.name, stat.st_size))
+        for _, name, size in sorted(found):
+            self._entries[name] = size
+            self._bytes += size
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.directory, name)
+
+    def get(self, name: str) -> Optional[bytes]:
+        with self._lock:
+            if name not in self._entries:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(name)
+        try:
+            with open(self._path(name), "rb") as f:
+                data = f.read()
+            os.utime(self._path(name))
+        except FileNotFoundError:
+            with self._lock:
+                self._bytes -= self._entries.pop(name, 0)
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return data
+
+    def put(self, name: str, data: bytes):
+        tmp = self._path(f"{name}.{threading.get_ident()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, self._path(name))
+        with self._lock:
+            self._bytes += len(data) - self._entries.pop(name, 0)
+            self._entries[name] = len(data)
+            # Never evict what was just written, even if it alone is over budget
+            while self._bytes > self.max_bytes and len(self._entries) > 1:
+                old, size = self._entries.popitem(last=False)
+                self._bytes -= size
+                self.evictions += 1
+                try:
+                    os.remove(self._path(old))
+                except FileNotFoundError:
+                    pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "files": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+            }
+
+
+def init_schema(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS news_images (
+            image_url TEXT PRIMARY KEY,
+            content_hash TEXT,
+            ext TEXT,
+            resized INTEGER,
+            fetched_at REAL NOT NULL
+        )
+    """)
+
+
+def is_placeholder_url(url: Optional[str]) -> bool:
+    return not url or url.startswith(LEGACY_PLACEHOLDER_PREFIX)
+
+
+def check_public_url(url: str):
+    """
+    Raises ImageFetchError unless `url` is http(s) and its host resolves only
+    to public addresses. Image URLs come from GNews article data, so without
+    this the proxy could be pointed at loopback, the private network or a
+    cloud metadata endpoint.
+    """
+    try:
+        parts = urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+    except ValueError as e:
+        raise ImageFetchError(f"bad URL: {e}") from e
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise ImageFetchError(f"not an http(s) URL: {url}")
+    try:
+        infos = socket.getaddrinfo(parts.hostname, port, proto=socket.IPPROTO_TCP)
+    except (socket.gaierror, UnicodeError) as e:
+        raise ImageFetchError(f"cannot resolve {parts.hostname}: {e}") from e
+    for info in infos:
+        address = ipaddress.ip_address(info[4][0].split("%")[0])
+        address = getattr(address, "ipv4_mapped", None) or address
+        # is_global excludes private, loopback, link-local, reserved and shared ranges
+        if not address.is_global or address.is_multicast:
+            raise ImageFetchError(f"{parts.hostname} resolves to a non-public address")
+
+
+def fetch_image(url: str, max_bytes: int = NEWS_IMAGE_MAX_SOURCE_BYTES) -> tuple:
+    """Downloads a public image with a hard size cap. Returns (bytes, content type)."""
+    import requests
+
+    try:
+        with timed("news_image", "fetch"):
+            for _ in range(NEWS_IMAGE_MAX_REDIRECTS + 1):
+                check_public_url(url)
+                with requests.get(url, stream=True, timeout=NEWS_IMAGE_FETCH_TIMEOUT, allow_redirects=False,
+                                  headers={"User-Agent": "SankatSaathi/1.0"}) as response:
+                    if response.is_redirect:
+                        url = urljoin(url, response.headers["Location"])
+                        continue
+                    response.raise_for_status()
+                    content_type = response.headers.get("Content-Type", "").split(";")[0].strip().lower()
+                    if not content_type.startswith("image/"):
+                        raise ImageFetchError(f"not an image ({content_type or 'no content type'})")
+                    declared = response.headers.get("Content-Length")
+                    if declared and declared.isdigit() and int(declared) > max_bytes:
+                        raise ImageFetchError("image too large")
+                    buf = io.BytesIO()
+                    for chunk in response.iter_content(CHUNK_SIZE):
+                        buf.write(chunk)
+                        if buf.tell() > max_bytes:
+                            raise ImageFetchError("image too large")
+                    break
+            else:
+                raise ImageFetchError("too many redirects")
+    except requests.RequestException as e:
+        raise ImageFetchError(str(e)) from e
+    if not buf.tell():
+        raise ImageFetchError("empty image")
+    return buf.getvalue(), content_type
+
+
+def make_variants(data: bytes) -> Dict[str, bytes]:
+    """WebP bytes for every entry in VARIANTS."""
+    from PIL import Image, ImageOps
+
+    img = Image.open(io.BytesIO(data))
+    largest = next(iter(VARIANTS.values()))[0]
+    # Let the JPEG decoder downscale while decoding
+    img.draft("RGB", largest)
+    img = ImageOps.exif_transpose(img)
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+    variants = {}
+    for name, (max_size, quality) in VARIANTS.items():
+        img.thumbnail(max_size, Image.LANCZOS)
+        buf = io.BytesIO()
+        img.save(buf, format="WEBP", quality=quality, method=4)
+        variants[name] = buf.getvalue()
+    return variants
+
+
+def render_placeholder(variant: str, label: Optional[str] = None) -> bytes:
+    """A dark SVG card with the article's category, sized like the variant."""
+    width, height = VARIANTS[variant][0][0], VARIANTS[variant][0][0] * 2 // 3
+    label = escape((label or "Disaster News").upper())
+    return (
+        f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="0 0 600 400">'
+        f'<rect width="600" height="400" fill="#0a0a0f"/>'
+        f'<text x="300" y="210" fill="#5a5a6e" font-family="monospace" font-size="32" '
+        f'text-anchor="middle" letter-spacing="4">{label}</text></svg>'
+    ).encode()
+
+
+def _cache_name(content_hash: str, variant: str, resized: bool, ext: str) -> str:
+    return f"{content_hash}-{variant if resized else 'original'}.{ext}"
+
+
+def _media_type(ext: str) -> str:
+    return "image/jpeg" if ext == "jpg" else f"image/{ext}"
+
+
+class ImageProxy:
+    """
+    Resolves a source URL to a cached variant, fetching it on first use.
+    Concurrent requests for the same URL wait for one fetch.
+    """
+
+    def __init__(self, cache: Optional[DiskLRU] = None):
+        self._cache = cache
+        self._cache_lock = threading.Lock()
+        self._inflight: Dict[str, threading.Lock] = {}
+        self._inflight_lock = threading.Lock()
+
+        # Metrics
+        self.fetches = 0
+        self.fetch_failures = 0
+        self.placeholders = 0
+
+    @property
+    def cache(self) -> DiskLRU:
+        # Scans the cache directory, so not at import time
+        with self._cache_lock:
+            if self._cache is None:
+                self._cache = DiskLRU()
+            return self._cache
+
+    def placeholder(self, variant: str, label: Optional[str], cache_control: str) -> ProxiedImage:
+        self.placeholders += 1
+        return ProxiedImage(render_placeholder(variant, label), "image/svg+xml",
+                            make_etag("placeholder", variant, label), cache_control)
+
+    def _cached(self, row, variant: str) -> Optional[ProxiedImage]:
+        if not row or not row["content_hash"]:
+            return None
+        body = self.cache.get(_cache_name(row["content_hash"], variant, row["resized"], row["ext"]))
+        if body is None:
+            return None
+        return ProxiedImage(body, _media_type(row["ext"]), make_etag(row["content_hash"], variant),
+                            IMMUTABLE_CACHE_CONTROL)
+
+    def get(self, conn: sqlite3.Connection, url: Optional[str], variant: str = DEFAULT_VARIANT,
+            label: Optional[str] = None) -> ProxiedImage:
+        if is_placeholder_url(url):
+            # The article will never have an image
+            return self.placeholder(variant, label, IMMUTABLE_CACHE_CONTROL)
+
+        row = conn.execute("SELECT * FROM news_images WHERE image_url = ?", (url,)).fetchone()
+        image = self._cached(row, variant)
+        if image:
+            return image
+        if row and not row["content_hash"] and time.time() - row["fetched_at"] < NEWS_IMAGE_RETRY_SECONDS:
+            return self.placeholder(variant, label, RETRY_CACHE_CONTROL)
+
+        with self._inflight_lock:
+            lock = self._inflight.setdefault(url, threading.Lock())
+        try:
+            with lock:
+                # Another request may have fetched it while this one waited
+                row = conn.execute("SELECT * FROM news_images WHERE image_url = ?", (url,)).fetchone()
+                image = self._cached(row, variant)
+                if image:
+                    return image
+                if not self._fetch(conn, url):
+                    return self.placeholder(variant, label, RETRY_CACHE_CONTROL)
+                row = conn.execute("SELECT * FROM news_images WHERE image_url = ?", (url,)).fetchone()
+                # Straight from the fetch, unless the cache is smaller than one image
+                return self._cached(row, variant) or self.placeholder(variant, label, RETRY_CACHE_CONTROL)
+        finally:
+            with self._inflight_lock:
+                if self._inflight.get(url) is lock:
+                    del self._inflight[url]
+
+    def _fetch(self, conn: sqlite3.Connection, url: str) -> bool:
+        """Fetches, converts and caches one source image, recording the outcome. True on success."""
+        self.fetches += 1
+        content_hash = ext = None
+        resized = PILLOW_AVAILABLE
+        try:
+            data, content_type = fetch_image(url)
+            content_hash = hashlib.blake2b(data, digest_size=16).hexdigest()
+            if resized:
+                with timed("news_image", "resize"):
+                    variants = make_variants(data)
+                ext = "webp"
+                for variant, body in variants.items():
+                    self.cache.put(_cache_name(content_hash, variant, True, ext), body)
+            else:
+                ext = _PASSTHROUGH_TYPES.get(content_type)
+                if not ext:
+                    raise ImageFetchError(f"unsupported type {content_type}")
+                self.cache.put(_cache_name(content_hash, DEFAULT_VARIANT, False, ext), data)
+        except Exception as e:
+            # Pillow rejects corrupt or undecodable files here too
+            self.fetch_failures += 1
+            content_hash = ext = None
+            logger.warning("News image fetch failed: %s", e, extra={"image_url": url})
+        conn.execute("""
+            INSERT INTO news_images (image_url, content_hash, ext, resized, fetched_at) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (image_url) DO UPDATE SET
+                content_hash = excluded.content_hash, ext = excluded.ext,
+                resized = excluded.resized, fetched_at = excluded.fetched_at
+        """, (url, content_hash, ext, resized, time.time()))
+        conn.commit()
+        return content_hash is not None
+
+    def stats(self) -> dict:
+        return {
+            "variants_enabled": PILLOW_AVAILABLE,
+            "fetches": self.fetches,
+            "fetch_failures": self.fetch_failures,
+            "placeholders_served": self.placeholders,
+            "cache": self.cache.stats(),
+        }
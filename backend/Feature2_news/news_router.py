@@ -1,13 +1,36 @@
 from fastapi import APIRouter, HTTPException, Request, Body, Query
+from fastapi.responses import Response
 from pydantic import BaseModel
 from typing import Optional, List
 import sqlite3
 import os
-import requests
 import datetime
 import math
 import logging
+import re
 import time
+import uuid
+import asyncio
+
+try:
+    from common.metrics import timed
+    from common.logging_setup import LOG_ITEM_SAMPLE_RATE
+    from common.responses import ORJSONResponse, dumps
+    from common.conditional import is_not_modified, make_etag, not_modified, validator_headers
+except ImportError:
+    from backend.common.metrics import timed
+    from backend.common.logging_setup import LOG_ITEM_SAMPLE_RATE
+    from backend.common.responses import ORJSONResponse, dumps
+    from backend.common.conditional import is_not_modified, make_etag, not_modified, validator_headers
+
+try:
+    from .gnews_quota import QuotaBudget, QuotaExceeded
+    from . import image_proxy, region_feeds, retention
+except ImportError:
+    from Feature2_news.gnews_quota import QuotaBudget, QuotaExceeded
+    from Feature2_news import image_proxy, region_feeds, retention
+
+logger = logging.getLogger(__name__)
 
 # Create Router
 router = APIRouter(prefix="/news", tags=["News"])
@@ -16,12 +39,41 @@ router = APIRouter(prefix="/news", tags=["News"])
 # Use absolute path for database to ensure it's always found
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 # We might want to store DB in the same folder as the script for now
-DB_FILE = os.path.join(BASE_DIR, 'disaster_news.db')
+DB_FILE = os.getenv("NEWS_DB_FILE", os.path.join(BASE_DIR, 'disaster_news.db'))
+# Articles past retention are moved here (attached as `archive` when queried)
+ARCHIVE_DB_FILE = os.getenv("NEWS_ARCHIVE_DB_FILE", os.path.splitext(DB_FILE)[0] + "_archive.db")
+# The image proxy's URL -> content hash table; kept apart so image fetches
+# do not touch the news DB's mtime, which the read endpoints' ETags go by
+IMAGE_DB_FILE = os.getenv("NEWS_IMAGE_DB_FILE", os.path.splitext(DB_FILE)[0] + "_images.db")
+# Rewritten with a new token whenever articles change; the read endpoints' ETags go by it
+VERSION_FILE = os.getenv("NEWS_VERSION_FILE", os.path.splitext(DB_FILE)[0] + ".version")
 
 # API KEYS (Ideally move to .env, but keeping here for direct port as per plan)
 # NOTE: User provided this key in the original Flask app
 GNEWS_API_KEY = os.getenv("GNEWS_API_KEY", "36b38d93610935363447703e54bb8688")
 
+# Upstream endpoints; overridable so the load test can point at local stand-ins
+GNEWS_SEARCH_URL = os.getenv("GNEWS_SEARCH_URL", "https://gnews.io/api/v4/search")
+NOMINATIM_SEARCH_URL = os.getenv("NOMINATIM_SEARCH_URL", "https://nominatim.openstreetmap.org/search")
+# Nominatim usage policy allows at most 1 request/sec
+NOMINATIM_DELAY = float(os.getenv("NOMINATIM_DELAY", "1.1"))
+# Concurrent GNews requests during a batch ingest, and regions allowed per batch
+GNEWS_CONCURRENCY = int(os.getenv("GNEWS_CONCURRENCY", "4"))
+MAX_BATCH_REGIONS = 25
+# Articles per GNews page, and how many pages to follow when a page comes back full
+GNEWS_PAGE_SIZE = 10
+GNEWS_MAX_PAGES = int(os.getenv("GNEWS_MAX_PAGES", "3"))
+# get_news ranks this many newest articles and returns the top FEED_SIZE
+FEED_WINDOW = 50
+FEED_SIZE = 20
+# SQLite caps bound parameters per statement
+SQLITE_IN_CHUNK = 400
+
+# Shared by every fetch in this process
+gnews_quota = QuotaBudget()
+# Serves article images through GET /news/image/{id}
+news_images = image_proxy.ImageProxy()
+
 # Keywords for disaster detection and categorization
 DISASTER_KEYWORDS = {
     'flood': 'Flood',
@@ -35,11 +87,23 @@ DISASTER_KEYWORDS = {
     'drought': 'Drought'
 }
 
+# Location extraction: runs of up to three capitalised words, minus common non-places
+PROPER_NOUN_PATTERN = re.compile(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,2}\b')
+LOCATION_IGNORE_WORDS = frozenset({
+    'The', 'A', 'An', 'In', 'On', 'At', 'Of', 'To', 'For', 'With', 'From',
+    'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday',
+    'Flood', 'Earthquake', 'Cyclone', 'Fire', 'Storm', 'Hurricane', 'Alert', 'Warning'
+})
+
 # --- Pydantic Models ---
 class NewsFetchRequest(BaseModel):
     location: str = "India"
 
+class NewsBatchFetchRequest(BaseModel):
+    regions: List[str]
+
 class NewsArticle(BaseModel):
+    id: int
     title: str
     description: Optional[str]
     image_url: Optional[str]
@@ -50,6 +114,7 @@ class NewsArticle(BaseModel):
     location_name: Optional[str]
     latitude: Optional[float]
     longitude: Optional[float]
+    created_at: Optional[str] = None
     distance_km: Optional[float] = None
 
 # --- DATABASE HELPERS ---
@@ -75,24 +140,93 @@ def init_db():
                 created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
             )
         """)
+        # Ingest checks titles as well as URLs for duplicates
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_disaster_news_title ON disaster_news (title)")
+        # Feed ordering and retention both go by publish date
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_disaster_news_published ON disaster_news (published_at)")
+        # Newest publishedAt seen per normalized GNews query, sent as `from` next time
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS gnews_watermarks (
+                query TEXT PRIMARY KEY,
+                newest_published_at TEXT NOT NULL,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        region_feeds.init_schema(conn)
         conn.commit()
         conn.close()
-        logging.info(f"Database initialized at {DB_FILE}")
+
+        conn = sqlite3.connect(IMAGE_DB_FILE)
+        image_proxy.init_schema(conn)
+        conn.commit()
+        conn.close()
+        logger.info("Database initialized at %s", DB_FILE)
     except Exception as e:
-        logging.error(f"DB Init Error: {e}")
+        logger.error("DB init error: %s", e)
 
-def get_db_connection():
-    """Establishes connection to SQLite database."""
+def get_db_connection(include_archive: bool = False):
+    """Establishes connection to SQLite database, optionally with the archive attached."""
     try:
         conn = sqlite3.connect(DB_FILE, timeout=30)
         conn.row_factory = sqlite3.Row
         # Enable Write-Ahead Logging (WAL) for better concurrency
         conn.execute("PRAGMA journal_mode=WAL")
+        if include_archive:
+            retention.attach_archive(conn, ARCHIVE_DB_FILE)
+        return conn
+    except Exception as e:
+        logger.error("Error connecting to SQLite: %s", e)
+        return None
+
+def get_image_db_connection():
+    """Connection to the image proxy's table, or None."""
+    try:
+        conn = sqlite3.connect(IMAGE_DB_FILE, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
         return conn
     except Exception as e:
-        logging.error(f"Error connecting to SQLite: {e}")
+        logger.error("Error connecting to SQLite: %s", e)
         return None
 
+def news_source(include_archive: bool = False) -> str:
+    """Table expression for reads: the hot table, or hot plus archive."""
+    if not include_archive:
+        return "disaster_news"
+    return (f"(SELECT {retention.NEWS_COLUMNS} FROM main.disaster_news "
+            f"UNION ALL SELECT {retention.NEWS_COLUMNS} FROM {retention.ARCHIVE}.disaster_news)")
+
+def news_data_version() -> tuple:
+    """
+    (version token, last-modified epoch) for the news data without querying
+    the DB. Every process that changes articles rewrites VERSION_FILE after
+    committing; the DB and WAL mtimes are no use here since checkpoints and
+    connections coming and going move them without any data changing.
+    """
+    try:
+        with open(VERSION_FILE) as f:
+            return f.read(), os.fstat(f.fileno()).st_mtime
+    except OSError:
+        return "", None
+
+def _bump_news_version():
+    tmp = f"{VERSION_FILE}.{uuid.uuid4().hex}.tmp"
+    try:
+        with open(tmp, "w") as f:
+            f.write(uuid.uuid4().hex)
+        os.replace(tmp, VERSION_FILE)
+    except OSError as e:
+        logger.error("News version update failed: %s", e)
+
+def news_validators(request: Request, *params):
+    """
+    (etag, last_modified, 304 response or None) for a news read endpoint.
+    `params` are the query parameters that shape the response.
+    """
+    version, last_modified = news_data_version()
+    etag = make_etag(version, *params)
+    return etag, last_modified, not_modified(request, etag, last_modified)
+
 # --- UTILITY FUNCTIONS ---
 
 def determine_category(title, description):
@@ -108,23 +242,26 @@ def get_coordinates(location_name):
     if not location_name or len(location_name) > 50:
         return None, None
         
+    import requests
+
     try:
         # Respect Nominatim Usage Policy (max 1 request/sec)
-        time.sleep(1.1) 
+        time.sleep(NOMINATIM_DELAY)
         
-        url = f"https://nominatim.openstreetmap.org/search?q={location_name}&format=json&limit=1"
+        url = f"{NOMINATIM_SEARCH_URL}?q={location_name}&format=json&limit=1"
         headers = {
             'User-Agent': 'SanketSathi_DisasterApp/1.0 (sanketsathi@example.com)',
             'Accept-Language': 'en'
         }
-        response = requests.get(url, headers=headers, timeout=3)
+        with timed("nominatim", "search"):
+            response = requests.get(url, headers=headers, timeout=3)
         
         if response.status_code == 200:
             data = response.json()
             if data:
                 return float(data[0]['lat']), float(data[0]['lon'])
     except Exception as e:
-        logging.error(f"Geocoding error for {location_name}: {e}")
+        logger.error("Geocoding error for %s: %s", location_name, e)
     return None, None
 
 def calculate_distance(lat1, lon1, lat2, lon2):
@@ -149,185 +286,510 @@ def calculate_distance(lat1, lon1, lat2, lon2):
 
 def extract_location_from_text(text):
     """Extract potential location names from article text."""
-    import re
-    # Limit to words that look like proper nouns
-    words = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+){0,2}\b', text or '')
-    
-    ignore_list = {'The', 'A', 'An', 'In', 'On', 'At', 'Of', 'To', 'For', 'With', 'From', 
-                   'Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday',
-                   'Flood', 'Earthquake', 'Cyclone', 'Fire', 'Storm', 'Hurricane', 'Alert', 'Warning'}
-    
-    candidates = [w for w in words if w not in ignore_list and w.split()[0] not in ignore_list]
-    
-    return candidates[0] if candidates else None
+    # Limit to words that look like proper nouns; the first usable one wins
+    for match in PROPER_NOUN_PATTERN.finditer(text or ''):
+        words = match.group()
+        if words not in LOCATION_IGNORE_WORDS and words.split()[0] not in LOCATION_IGNORE_WORDS:
+            return words
+    return None
+
+def rank_news(results: List[dict], location: Optional[str] = None,
+              latitude: Optional[float] = None, longitude: Optional[float] = None) -> List[dict]:
+    """Orders candidate articles for a reader: nearest first, else text matches first. Returns the top FEED_SIZE."""
+    user_location = location.lower().strip() if location else ""
+
+    # Calculate Distance
+    if latitude is not None and longitude is not None:
+        for item in results:
+            i_lat = item.get('latitude')
+            i_lon = item.get('longitude')
+
+            if i_lat is not None and i_lon is not None:
+                dist = calculate_distance(latitude, longitude, i_lat, i_lon)
+                item['distance_km'] = round(dist, 2)
+            else:
+                item['distance_km'] = float('inf')
+
+        results.sort(key=lambda x: x.get('distance_km', float('inf')))
+
+    # Fallback Text Match
+    elif user_location and user_location != "india":
+        def sort_key(item):
+            content = (str(item['title']) + " " + (str(item['description']) or "") + " " + (str(item.get('location_name')) or "")).lower()
+            if user_location in content:
+                return 0
+            return 1
+        results.sort(key=sort_key)
+
+    return results[:FEED_SIZE]
+
+def refresh_region_feeds(conn, inserted: List[dict] = (), force: bool = False) -> int:
+    """
+    Rebuilds the region feeds that `inserted` articles (or articles leaving
+    the candidate window) can change; all of them when `force`. Returns how
+    many were rebuilt.
+    """
+    window = [dict(row) for row in conn.execute(
+        f"SELECT * FROM disaster_news ORDER BY published_at DESC LIMIT {FEED_WINDOW}"
+    )]
+    window_ids = {row['id'] for row in window}
+    state = {} if force else region_feeds.load_state(conn)
+    rebuilt = []
+    for region in region_feeds.REGIONS:
+        if not force and not region_feeds.needs_rebuild(region, state.get(region.name), window_ids, inserted, FEED_SIZE):
+            continue
+        ranked = rank_news([dict(row) for row in window], None, region.latitude, region.longitude)
+        cutoff = ranked[-1]['distance_km'] if ranked else None
+        feed = dumps(ranked)
+        if force and region_feeds.read_feed(conn, region) == feed:
+            # Startup rebuilds every feed; leave the DB untouched where nothing changed
+            continue
+        rebuilt.append((region.name, [row['id'] for row in ranked], cutoff, feed))
+    region_feeds.save_feeds(conn, rebuilt)
+    if rebuilt:
+        logger.debug("Region feeds rebuilt", extra={"regions": [r[0] for r in rebuilt]})
+    return len(rebuilt)
 
 # --- ROUTES ---
 
+_started = False
+_retention_task: Optional[asyncio.Task] = None
+
+def run_retention() -> dict:
+    """Archives articles past retention and vacuums the hot table."""
+    conn = get_db_connection()
+    if not conn:
+        raise RuntimeError("Database connection failed")
+    try:
+        # Lets retention give freed pages back without a full VACUUM each time;
+        # the one full VACUUM this needs happens on the first run, not at startup
+        retention.enable_incremental_vacuum(conn)
+        result = retention.archive_old_articles(conn, ARCHIVE_DB_FILE)
+        if result["archived"]:
+            # Feeds holding archived articles are rebuilt
+            result["feeds_rebuilt"] = refresh_region_feeds(conn)
+    finally:
+        conn.close()
+    if result["archived"]:
+        _bump_news_version()
+    return result
+
+async def _run_retention_forever():
+    # First run one interval after startup, so a restart never archives or vacuums
+    while True:
+        await asyncio.sleep(retention.NEWS_RETENTION_INTERVAL)
+        try:
+            await asyncio.to_thread(run_retention)
+        except Exception as e:
+            logger.exception("News retention failed: %s", e)
+
 @router.on_event("startup")
 async def startup_event():
+    global _started, _retention_task
+    # The router is mounted twice, so this hook fires twice per app start
+    if _started:
+        return
+    _started = True
     init_db()
-
-@router.post("/fetch-news")
-async def trigger_fetch_news(payload: NewsFetchRequest):
-    """Fetches news from GNews, processes them, and stores in DB."""
+    # Region list or ranking may have changed since the feeds were built
+    conn = get_db_connection()
+    if conn:
+        try:
+            if refresh_region_feeds(conn, force=True):
+                _bump_news_version()
+        except Exception as e:
+            logger.error("Region feed build failed: %s", e)
+        finally:
+            conn.close()
+    if retention.NEWS_RETENTION_INTERVAL > 0:
+        _retention_task = asyncio.create_task(_run_retention_forever())
+
+@router.on_event("shutdown")
+async def shutdown_event():
+    global _started, _retention_task
+    _started = False
+    if _retention_task is not None:
+        _retention_task.cancel()
+        _retention_task = None
+
+@router.post("/retention/run")
+async def trigger_retention():
+    """
+    Runs retention now. Meant for a scheduled trigger on hosts that freeze
+    idle processes (Vercel), where the background loop does not get to run.
+    """
     try:
-        location = payload.location
+        return await asyncio.to_thread(run_retention)
+    except Exception as e:
+        logger.exception("News retention failed: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
 
-        # Search query
-        base_query = " OR ".join(DISASTER_KEYWORDS.keys())
-        final_query = f"({base_query}) AND {location}"
-        
-        url = f"https://gnews.io/api/v4/search?q={final_query}&lang=en&max=10&sortby=publishedAt&apikey={GNEWS_API_KEY}"
+class GNewsError(Exception):
+    pass
+
+def disaster_query(location: Optional[str] = None) -> str:
+    """GNews query for disaster keywords, narrowed to a location if given."""
+    base_query = " OR ".join(DISASTER_KEYWORDS.keys())
+    return f"({base_query}) AND {location}" if location else f"({base_query})"
+
+def gnews_search(query: str, op: str = "search", since: Optional[str] = None, page: int = 1) -> List[dict]:
+    """One GNews search, charged to the quota. Raises QuotaExceeded or GNewsError."""
+    import requests
+
+    if not gnews_quota.try_acquire():
+        raise QuotaExceeded("GNews request budget exhausted")
+    params = {"q": query, "lang": "en", "max": GNEWS_PAGE_SIZE, "sortby": "publishedAt", "apikey": GNEWS_API_KEY}
+    if since:
+        params["from"] = since
+    if page > 1:
+        params["page"] = page
+    with timed("gnews", op):
+        response = requests.get(GNEWS_SEARCH_URL, params=params, timeout=10)
+    data = response.json()
+    if response.status_code != 200:
+        raise GNewsError(f"GNews Error: {data}")
+    return data.get('articles', [])
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+def parse_published(value) -> Optional[datetime.datetime]:
+    if not isinstance(value, str):
+        return None
+    try:
+        parsed = datetime.datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=datetime.timezone.utc)
+
+def format_watermark(value: datetime.datetime) -> str:
+    """GNews `from` format: ISO 8601 in UTC, second precision."""
+    return value.astimezone(datetime.timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+def get_watermarks(queries: List[str]) -> dict:
+    """normalized query -> newest published_at stored for it."""
+    if not queries:
+        return {}
+    conn = get_db_connection()
+    if not conn:
+        return {}
+    try:
+        rows = conn.execute(
+            f"SELECT query, newest_published_at FROM gnews_watermarks WHERE query IN ({','.join('?' * len(queries))})",
+            queries
+        ).fetchall()
+        return {row['query']: row['newest_published_at'] for row in rows}
+    finally:
+        conn.close()
 
-        print(f"Fetching news for: {location}")
-        response = requests.get(url, timeout=10)
-        data = response.json()
-        articles = data.get('articles', [])
-        
-        # Fallback Strategy
-        if not articles:
-            print(f"No local news for {location}. Switching to broad search.")
-            fallback_query = f"({base_query})"
-            url_fallback = f"https://gnews.io/api/v4/search?q={fallback_query}&lang=en&max=10&sortby=publishedAt&apikey={GNEWS_API_KEY}"
-            
-            response = requests.get(url_fallback, timeout=10)
-            data = response.json()
-            articles = data.get('articles', [])
+def save_watermarks(watermarks: dict):
+    """Advances watermarks; never moves one backwards."""
+    if not watermarks:
+        return
+    conn = get_db_connection()
+    if not conn:
+        raise RuntimeError("Database connection failed")
+    try:
+        conn.executemany("""
+            INSERT INTO gnews_watermarks (query, newest_published_at, updated_at) VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (query) DO UPDATE SET
+                newest_published_at = MAX(newest_published_at, excluded.newest_published_at),
+                updated_at = CURRENT_TIMESTAMP
+        """, list(watermarks.items()))
+        conn.commit()
+    finally:
+        conn.close()
 
-        if response.status_code != 200:
-             raise HTTPException(status_code=500, detail=f"GNews Error: {data}")
+def fetch_since(query: str, watermark: Optional[str], op: str = "search") -> tuple:
+    """
+    Articles for `query` published after `watermark`, newest first.
+
+    Asks GNews for pages from the watermark on, following the next page only
+    while pages come back full, up to GNEWS_MAX_PAGES. Returns (articles,
+    new watermark or None). The watermark advances to the newest article
+    once paging ends on a short page or at the page cap, so a busy query
+    still gets one. If a page fails, the articles read so far are returned
+    without a new watermark, and the next fetch re-reads the gap; a page 1
+    failure raises.
+    """
+    bound = parse_published(watermark)
+    articles, interrupted = [], False
+    for page in range(1, GNEWS_MAX_PAGES + 1):
+        try:
+            batch = gnews_search(query, op, since=watermark, page=page)
+        except Exception as e:
+            if page == 1:
+                raise
+            logger.warning("GNews paging stopped early", extra={"query": query, "page": page, "error": str(e)})
+            interrupted = True
+            break
+        articles.extend(batch)
+        if len(batch) < GNEWS_PAGE_SIZE:
+            break
+
+    # `from` is inclusive, so the article at the watermark comes back again
+    fresh = []
+    for article in articles:
+        published = parse_published(article.get('publishedAt'))
+        if bound is None or published is None or published > bound:
+            fresh.append(article)
+    newest = max(filter(None, (parse_published(a.get('publishedAt')) for a in fresh)), default=None)
+    if interrupted or newest is None:
+        return fresh, None
+    return fresh, format_watermark(newest)
+
+def process_article(article: dict, location: str, geocode) -> Optional[dict]:
+    """Normalizes a GNews article into a disaster_news row; None if unusable."""
+    title = article.get('title')
+    desc = article.get('description')
+    url = article.get('url')
+
+    if not title or not url:
+        return None
 
-        processed_articles = []
-        
+    pub_date_str = article.get('publishedAt')
+    # Date normalization
+    pub_date = pub_date_str if isinstance(pub_date_str, str) else datetime.datetime.now().isoformat()
+
+    # Geocoding
+    article_text = f"{title} {desc or ''}"
+    found_location = extract_location_from_text(article_text)
+    location_name_to_use = found_location if found_location else location
+
+    lat, lon = geocode(location_name_to_use)
+
+    # Fallback geocoding
+    if lat is None and location and location.lower() != "india" and location.lower() in article_text.lower():
+        if location_name_to_use != location:
+            lat, lon = geocode(location)
+
+    return {
+        'title': title,
+        'description': desc,
+        # Missing images are drawn by the image proxy
+        'image_url': article.get('image'),
+        'source_name': article.get('source', {}).get('name'),
+        'article_url': url,
+        'published_at': pub_date,
+        'category': determine_category(title, desc),
+        'location_name': location_name_to_use,
+        'latitude': lat,
+        'longitude': lon
+    }
+
+def process_batch(work: List[tuple]) -> List[dict]:
+    """
+    Processes (articles, location) pairs into rows. Geocoding results are
+    shared across the batch, so each place name costs one Nominatim call.
+    """
+    geocoded = {}
+
+    def geocode(name):
+        if name not in geocoded:
+            geocoded[name] = get_coordinates(name)
+        return geocoded[name]
+
+    rows, seen_urls = [], set()
+    for articles, location in work:
         for article in articles:
-            title = article.get('title')
-            desc = article.get('description')
-            url = article.get('url')
-            
-            if not title or not url:
+            if article.get('url') in seen_urls:
                 continue
-                
-            img_url = article.get('image')
-            source = article.get('source', {}).get('name')
-            pub_date_str = article.get('publishedAt') 
-            
-            # Date normalization
-            pub_date = pub_date_str if isinstance(pub_date_str, str) else datetime.datetime.now().isoformat()
-
-            category = determine_category(title, desc)
-
-            if not img_url:
-                img_url = "https://via.placeholder.com/600x400?text=Disaster+News"
-
-            # Geocoding
-            article_text = f"{title} {desc or ''}"
-            found_location = extract_location_from_text(article_text)
-            location_name_to_use = found_location if found_location else location
-            
-            lat, lon = get_coordinates(location_name_to_use)
-            
-            # Fallback geocoding
-            if lat is None and location and location.lower() != "india" and location.lower() in article_text.lower():
-                 if location_name_to_use != location:
-                     lat, lon = get_coordinates(location)
-            
-            processed_articles.append({
-                'title': title,
-                'description': desc,
-                'image_url': img_url,
-                'source_name': source,
-                'article_url': url,
-                'published_at': pub_date,
-                'category': category,
-                'location_name': location_name_to_use,
-                'latitude': lat,
-                'longitude': lon
-            })
-
-        # Database Insertion
-        new_count = 0
-        conn = get_db_connection()
-        if not conn:
-             raise HTTPException(status_code=500, detail="Database connection failed")
-             
+            row = process_article(article, location, geocode)
+            if row:
+                seen_urls.add(row['article_url'])
+                rows.append(row)
+    return rows
+
+def store_articles(rows: List[dict]) -> int:
+    """Inserts rows not already stored (by URL or title) in one transaction. Returns the count added."""
+    if not rows:
+        return 0
+    conn = get_db_connection()
+    if not conn:
+        raise RuntimeError("Database connection failed")
+    try:
+        known_urls, known_titles = set(), set()
+        urls = [row['article_url'] for row in rows]
+        titles = [row['title'] for row in rows]
+        for i in range(0, len(rows), SQLITE_IN_CHUNK):
+            url_chunk, title_chunk = urls[i:i + SQLITE_IN_CHUNK], titles[i:i + SQLITE_IN_CHUNK]
+            existing = conn.execute(
+                f"SELECT article_url, title FROM disaster_news WHERE article_url IN ({','.join('?' * len(url_chunk))}) "
+                f"OR title IN ({','.join('?' * len(title_chunk))})",
+                url_chunk + title_chunk
+            ).fetchall()
+            known_urls.update(row['article_url'] for row in existing)
+            known_titles.update(row['title'] for row in existing)
+
+        # Anything older would only be archived on the next retention run
+        cutoff = retention.retention_cutoff()
+        fresh = []
+        for row in rows:
+            if row['article_url'] in known_urls or row['title'] in known_titles:
+                continue
+            if row['published_at'] and row['published_at'] < cutoff:
+                continue
+            known_urls.add(row['article_url'])
+            known_titles.add(row['title'])
+            fresh.append(row)
+        before = conn.total_changes
+        conn.executemany("""
+            INSERT OR IGNORE INTO disaster_news
+            (title, description, image_url, source_name, article_url, published_at, category, location_name, latitude, longitude)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """, [(
+            row['title'], row['description'], row['image_url'], row['source_name'],
+            row['article_url'], row['published_at'], row['category'],
+            row['location_name'], row['latitude'], row['longitude']
+        ) for row in fresh])
+        conn.commit()
+        added = conn.total_changes - before
+        if added:
+            _bump_news_version()
+            try:
+                refresh_region_feeds(conn, fresh)
+            except Exception as e:
+                # The articles are stored; the next write or restart rebuilds the feeds
+                logger.error("Region feed refresh failed: %s", e)
+        return added
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+async def ingest_regions(regions: List[str]) -> dict:
+    """
+    Fetches news for several regions concurrently under the GNews quota,
+    then geocodes and stores everything in one bulk write.
+
+    Each query resumes from its stored high-water mark. Regions that have
+    never had local results share a single broad fallback search, processed
+    in the context of the first of them.
+    """
+    regions = list(dict.fromkeys(r.strip() for r in regions if r and r.strip()))
+    semaphore = asyncio.Semaphore(GNEWS_CONCURRENCY)
+    queries = {region: normalize_query(disaster_query(region)) for region in regions}
+    fallback_query = normalize_query(disaster_query())
+    known = await asyncio.to_thread(get_watermarks, list(queries.values()) + [fallback_query])
+    advanced = {}
+
+    async def fetch(region):
+        async with semaphore:
+            try:
+                articles, mark = await asyncio.to_thread(fetch_since, disaster_query(region), known.get(queries[region]))
+                return region, articles, mark, None
+            except Exception as e:
+                return region, [], None, e
+
+    report, work, needs_fallback = {}, [], []
+    for region, articles, mark, error in await asyncio.gather(*(fetch(r) for r in regions)):
+        report[region] = {"fetched": len(articles), "fallback": False, "since": known.get(queries[region])}
+        if mark:
+            advanced[queries[region]] = mark
+        if error is not None:
+            report[region].update(error=str(error), quota_exhausted=isinstance(error, QuotaExceeded))
+        elif articles:
+            work.append((articles, region))
+        elif queries[region] not in known:
+            # Never had local news; with a watermark, empty just means nothing new
+            needs_fallback.append(region)
+
+    if needs_fallback:
+        logger.info("No local news, switching to broad search", extra={"regions": needs_fallback})
         try:
-            cursor = conn.cursor()
-            for item in processed_articles:
-                try:
-                    check_sql = "SELECT id FROM disaster_news WHERE article_url = ? OR title = ?"
-                    cursor.execute(check_sql, (item['article_url'], item['title']))
-                    if not cursor.fetchone():
-                        insert_sql = """
-                            INSERT INTO disaster_news 
-                            (title, description, image_url, source_name, article_url, published_at, category, location_name, latitude, longitude)
-                            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                        """
-                        cursor.execute(insert_sql, (
-                            item['title'], item['description'], item['image_url'], item['source_name'], 
-                            item['article_url'], item['published_at'], item['category'], 
-                            item['location_name'], item['latitude'], item['longitude']
-                        ))
-                        new_count += 1
-                except Exception as err:
-                    print(f"Error inserting: {err}")
-            
-            conn.commit()
+            fallback, mark = await asyncio.to_thread(fetch_since, disaster_query(), known.get(fallback_query), "search_fallback")
+            if mark:
+                advanced[fallback_query] = mark
+            work.append((fallback, needs_fallback[0]))
+            for region in needs_fallback:
+                report[region].update(fallback=True, fetched=len(fallback))
         except Exception as e:
-            conn.rollback()
-            raise HTTPException(status_code=500, detail=f"DB Error: {e}")
-        finally:
-            conn.close()
+            for region in needs_fallback:
+                report[region].update(error=str(e), quota_exhausted=isinstance(e, QuotaExceeded))
 
-        return {"status": "success", "new_articles_count": new_count}
+    rows = await asyncio.to_thread(process_batch, work)
+    new_count = await asyncio.to_thread(store_articles, rows)
+    # Only after the articles are stored, so a failed write is fetched again
+    await asyncio.to_thread(save_watermarks, advanced)
+    logger.info("News ingest finished", extra={"regions": len(regions), "processed": len(rows), "new_articles": new_count})
+    return {"regions": report, "processed": len(rows), "new_articles_count": new_count, "quota": gnews_quota.stats()}
 
+@router.post("/fetch-news")
+async def trigger_fetch_news(payload: NewsFetchRequest):
+    """Fetches news from GNews, processes them, and stores in DB."""
+    try:
+        location = payload.location
+        logger.info("Fetching news", extra={"location": location})
+        result = await ingest_regions([location])
+        report = result["regions"].get(location.strip(), {})
+        if report.get("quota_exhausted"):
+            raise HTTPException(status_code=429, detail=report["error"])
+        if "error" in report:
+            raise HTTPException(status_code=500, detail=report["error"])
+        return {"status": "success", "new_articles_count": result["new_articles_count"]}
+
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"CRITICAL ERROR: {e}")
+        logger.exception("News fetch failed: %s", e)
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.post("/fetch-news/batch")
+async def trigger_fetch_news_batch(payload: NewsBatchFetchRequest):
+    """
+    Fetches news for many regions at once, e.g. from a scheduled job.
+    Regions the quota could not cover are reported rather than failing the batch.
+    """
+    if not payload.regions or len(payload.regions) > MAX_BATCH_REGIONS:
+        raise HTTPException(status_code=400, detail=f"Provide 1-{MAX_BATCH_REGIONS} regions")
+    try:
+        result = await ingest_regions(payload.regions)
+        return {"status": "success", **result}
+    except Exception as e:
+        logger.exception("Batch news fetch failed: %s", e)
+        raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/quota")
+async def get_gnews_quota():
+    """Remaining GNews request budget for this process."""
+    return gnews_quota.stats()
+
+@router.get("/image-cache")
+async def get_image_cache_stats():
+    """Image proxy fetches and on-disk cache usage for this process."""
+    return await asyncio.to_thread(news_images.stats)
+
 @router.get("/", response_model=List[NewsArticle])
 async def get_news(
+    request: Request,
     location: Optional[str] = None,
     latitude: Optional[float] = None,
-    longitude: Optional[float] = None
+    longitude: Optional[float] = None,
+    include_archive: bool = False
 ):
-    """Retrieves stored news, prioritizing distance."""
+    """Retrieves stored news, prioritizing distance. `include_archive` also searches archived articles."""
+    etag, last_modified, cached = news_validators(request, location, latitude, longitude, include_archive)
+    if cached:
+        return cached
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(include_archive)
         if not conn:
              raise HTTPException(status_code=500, detail="Database connection failed")
 
-        user_location = location.lower().strip() if location else ""
-        
+        # Popular regions have their ranked feed ready-made
+        region = None if include_archive else region_feeds.match_region(location, latitude, longitude)
+        feed = region_feeds.read_feed(conn, region) if region else None
+        if feed is not None:
+            return Response(feed, media_type="application/json", headers=validator_headers(etag, last_modified))
+
         cursor = conn.cursor()
-        cursor.execute("SELECT * FROM disaster_news ORDER BY published_at DESC LIMIT 50")
-        rows = cursor.fetchall()
-        
-        results = [dict(row) for row in rows]
-        
-        # Calculate Distance
-        if latitude is not None and longitude is not None:
-            for item in results:
-                i_lat = item.get('latitude')
-                i_lon = item.get('longitude')
-                
-                if i_lat is not None and i_lon is not None:
-                    dist = calculate_distance(latitude, longitude, i_lat, i_lon)
-                    item['distance_km'] = round(dist, 2)
-                else:
-                    item['distance_km'] = float('inf')
-            
-            results.sort(key=lambda x: x.get('distance_km', float('inf')))
-        
-        # Fallback Text Match
-        elif user_location and user_location != "india":
-            def sort_key(item):
-                content = (str(item['title']) + " " + (str(item['description']) or "") + " " + (str(item.get('location_name')) or "")).lower()
-                if user_location in content:
-                    return 0 
-                return 1
-            results.sort(key=sort_key)
+        cursor.execute(f"SELECT * FROM {news_source(include_archive)} ORDER BY published_at DESC LIMIT {FEED_WINDOW}")
+        results = rank_news([dict(row) for row in cursor.fetchall()], location, latitude, longitude)
 
-        return results[:20]
+        # Rows come from our own table, so they skip response_model validation
+        # (the model still documents the shape in OpenAPI)
+        return ORJSONResponse(results, headers=validator_headers(etag, last_modified))
 
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -335,10 +797,55 @@ async def get_news(
         if 'conn' in locals() and conn:
             conn.close()
 
+def load_article_image(article_id: int, size: str) -> Optional[image_proxy.ProxiedImage]:
+    """The proxied image of a hot or archived article; None if there is no such article."""
+    conn = get_db_connection()
+    if not conn:
+        raise RuntimeError("Database connection failed")
+    try:
+        query = "SELECT image_url, category FROM {} WHERE id = ?"
+        row = conn.execute(query.format("disaster_news"), (article_id,)).fetchone()
+        if row is None and os.path.exists(ARCHIVE_DB_FILE):
+            retention.attach_archive(conn, ARCHIVE_DB_FILE)
+            row = conn.execute(query.format(f"{retention.ARCHIVE}.disaster_news"), (article_id,)).fetchone()
+    finally:
+        conn.close()
+    if row is None:
+        return None
+    conn = get_image_db_connection()
+    if not conn:
+        raise RuntimeError("Database connection failed")
+    try:
+        return news_images.get(conn, row['image_url'], size, row['category'])
+    finally:
+        conn.close()
+
+@router.get("/image/{article_id}")
+async def get_news_image(request: Request, article_id: int, size: str = image_proxy.DEFAULT_VARIANT):
+    """
+    An article's image, fetched from the publisher once and served as a
+    cached WebP (`size`: thumb or display), or a placeholder if it has none.
+    """
+    if size not in image_proxy.VARIANTS:
+        raise HTTPException(status_code=400, detail=f"size must be one of: {', '.join(image_proxy.VARIANTS)}")
+    try:
+        image = await asyncio.to_thread(load_article_image, article_id, size)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+    if image is None:
+        raise HTTPException(status_code=404, detail="Article not found")
+    headers = {"ETag": image.etag, "Cache-Control": image.cache_control}
+    if is_not_modified(request, image.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(image.body, media_type=image.media_type, headers=headers)
+
 
 @router.get("/categories")
-async def get_categories():
+async def get_categories(request: Request):
     """Get all available disaster categories."""
+    etag, last_modified, cached = news_validators(request)
+    if cached:
+        return cached
     try:
         conn = get_db_connection()
         if not conn:
@@ -350,39 +857,43 @@ async def get_categories():
         conn.close()
         
         categories = [row['category'] for row in rows]
-        return {"categories": categories}
+        return ORJSONResponse({"categories": categories}, headers=validator_headers(etag, last_modified))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 @router.get("/stats")
-async def get_stats():
+async def get_stats(request: Request, include_archive: bool = False):
     """Get news statistics."""
+    etag, last_modified, cached = news_validators(request, include_archive)
+    if cached:
+        return cached
     try:
-        conn = get_db_connection()
+        conn = get_db_connection(include_archive)
+        source = news_source(include_archive)
         if not conn:
             raise HTTPException(status_code=500, detail="Database connection failed")
         
         cursor = conn.cursor()
         
         # Total articles
-        cursor.execute("SELECT COUNT(*) as count FROM disaster_news")
+        cursor.execute(f"SELECT COUNT(*) as count FROM {source}")
         total = cursor.fetchone()['count']
         
         # Latest article date
-        cursor.execute("SELECT MAX(published_at) as latest FROM disaster_news")
+        cursor.execute(f"SELECT MAX(published_at) as latest FROM {source}")
         latest = cursor.fetchone()['latest']
         
         # Category breakdown
-        cursor.execute("SELECT category, COUNT(*) as count FROM disaster_news GROUP BY category ORDER BY count DESC")
+        cursor.execute(f"SELECT category, COUNT(*) as count FROM {source} GROUP BY category ORDER BY count DESC")
         category_rows = cursor.fetchall()
         category_breakdown = {row['category']: row['count'] for row in category_rows}
         
         conn.close()
         
-        return {
+        return ORJSONResponse({
             "total_articles": total,
             "latest_article_date": latest,
             "category_breakdown": category_breakdown
-        }
+        }, headers=validator_headers(etag, last_modified))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -0,0 +1,128 @@
+"""
+Materialized news feeds for frequently requested regions.
+
+Each configured region (name, centroid) has a ready-made ranked feed -
+exactly what GET /news/ returns for the centroid's coordinates - stored
+as serialized JSON in `region_feeds`, so serving it is one primary-key
+read. Feeds are rebuilt only when a write can change them (see
+`needs_rebuild`).
+"""
+import json
+import logging
+import math
+import os
+import sqlite3
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# "Name:lat:lon;Name:lat:lon;..."
+NEWS_REGIONS = os.getenv(
+    "NEWS_REGIONS",
+    "Delhi:28.6139:77.2090;Mumbai:19.0760:72.8777;Chennai:13.0827:80.2707;"
+    "Kolkata:22.5726:88.3639;Bengaluru:12.9716:77.5946;Hyderabad:17.3850:78.4867"
+)
+# Coordinate requests this close to a region's centroid get its feed (distances
+# in it are measured from the centroid, so keep this small)
+NEWS_REGION_SNAP_KM = float(os.getenv("NEWS_REGION_SNAP_KM", "10"))
+
+
+@dataclass(frozen=True)
+class Region:
+    name: str
+    latitude: float
+    longitude: float
+
+
+def parse_regions(value: str) -> List[Region]:
+    regions = []
+    for entry in filter(None, (e.strip() for e in value.split(";"))):
+        try:
+            name, lat, lon = entry.rsplit(":", 2)
+            regions.append(Region(name.strip(), float(lat), float(lon)))
+        except ValueError:
+            logger.warning("Ignoring malformed NEWS_REGIONS entry %r", entry)
+    return regions
+
+
+REGIONS = parse_regions(NEWS_REGIONS)
+_BY_NAME = {region.name.lower(): region for region in REGIONS}
+
+
+def _distance_km(lat1, lon1, lat2, lon2) -> float:
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6371 * math.asin(math.sqrt(min(1.0, a)))
+
+
+def match_region(location: Optional[str], latitude: Optional[float], longitude: Optional[float]) -> Optional[Region]:
+    """The region whose feed answers this request, if any. Coordinates win over the name, as in get_news."""
+    if latitude is not None and longitude is not None:
+        nearest = min(REGIONS, key=lambda r: _distance_km(latitude, longitude, r.latitude, r.longitude), default=None)
+        if nearest and _distance_km(latitude, longitude, nearest.latitude, nearest.longitude) <= NEWS_REGION_SNAP_KM:
+            return nearest
+        return None
+    if location:
+        return _BY_NAME.get(location.strip().lower())
+    return None
+
+
+def init_schema(conn: sqlite3.Connection):
+    conn.execute("""
+        CREATE TABLE IF NOT EXISTS region_feeds (
+            region TEXT PRIMARY KEY,
+            article_ids TEXT NOT NULL,
+            cutoff_km REAL,
+            feed BLOB NOT NULL,
+            built_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+
+
+def read_feed(conn: sqlite3.Connection, region: Region) -> Optional[bytes]:
+    row = conn.execute("SELECT feed FROM region_feeds WHERE region = ?", (region.name,)).fetchone()
+    return bytes(row[0]) if row else None
+
+
+def load_state(conn: sqlite3.Connection) -> Dict[str, dict]:
+    """region -> {"ids": set of article ids in the feed, "cutoff_km": distance of its last item (inf if unlocated)}."""
+    return {
+        row[0]: {"ids": set(json.loads(row[1])), "cutoff_km": row[2]}
+        for row in conn.execute("SELECT region, article_ids, cutoff_km FROM region_feeds")
+    }
+
+
+def needs_rebuild(region: Region, state: Optional[dict], window_ids: set,
+                  inserted: Iterable[dict], feed_size: int) -> bool:
+    """
+    A feed changes only if one of its articles left the candidate window or
+    a new article ranks above its last item (or the feed is not full yet).
+    """
+    if state is None or not state["ids"] <= window_ids:
+        return True
+    inserted = list(inserted)
+    cutoff = state["cutoff_km"]
+    if len(state["ids"]) < feed_size:
+        return bool(inserted)
+    for row in inserted:
+        if row.get("latitude") is None or row.get("longitude") is None:
+            # Ranks among the other unlocated articles, which only matters if the feed holds some
+            if math.isinf(cutoff):
+                return True
+            continue
+        if _distance_km(region.latitude, region.longitude, row["latitude"], row["longitude"]) <= cutoff:
+            return True
+    return False
+
+
+def save_feeds(conn: sqlite3.Connection, feeds: List[tuple]):
+    """Stores (region, article_ids, cutoff_km, feed_bytes) tuples."""
+    conn.executemany("""
+        INSERT INTO region_feeds (region, article_ids, cutoff_km, feed, built_at)
+        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT (region) DO UPDATE SET
+            article_ids = excluded.article_ids, cutoff_km = excluded.cutoff_km,
+            feed = excluded.feed, built_at = CURRENT_TIMESTAMP
+    """, [(name, json.dumps(sorted(ids)), cutoff, feed) for name, ids, cutoff, feed in feeds])
+    conn.commit()
@@ -0,0 +1,125 @@
+"""
+Retention for the news table.
+
+Articles older than NEWS_RETENTION_DAYS move in batches from
+`disaster_news` into the same table in an attached archive database, so
+the hot table that reads, stats and de-duplication scan stays small. Freed
+pages are handed back with incremental vacuum. Archived rows stay
+queryable by attaching the archive (see `include_archive` on the routes).
+"""
+import datetime
+import logging
+import os
+import sqlite3
+
+logger = logging.getLogger(__name__)
+
+NEWS_RETENTION_DAYS = float(os.getenv("NEWS_RETENTION_DAYS", "30"))
+NEWS_ARCHIVE_BATCH_SIZE = int(os.getenv("NEWS_ARCHIVE_BATCH_SIZE", "500"))
+# Seconds between background retention runs; 0 disables the loop
+NEWS_RETENTION_INTERVAL = float(os.getenv("NEWS_RETENTION_INTERVAL", str(6 * 3600)))
+# Free pages returned to the filesystem per run
+NEWS_VACUUM_PAGES = int(os.getenv("NEWS_VACUUM_PAGES", "2000"))
+
+ARCHIVE = "archive"
+NEWS_COLUMNS = (
+    "id, title, description, image_url, source_name, article_url, published_at, "
+    "category, location_name, latitude, longitude, created_at"
+)
+
+
+def retention_cutoff(max_age_days: float = NEWS_RETENTION_DAYS, now: datetime.datetime = None) -> str:
+    """ISO timestamp; articles published before it are archived."""
+    now = now or datetime.datetime.now(datetime.timezone.utc)
+    return (now - datetime.timedelta(days=max_age_days)).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def enable_incremental_vacuum(conn: sqlite3.Connection):
+    """
+    Switches the file to auto_vacuum=INCREMENTAL. The mode only takes effect
+    after a full VACUUM, which is done once here.
+    """
+    if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+        conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+        conn.execute("VACUUM")
+        logger.info("News DB switched to incremental vacuum")
+
+
+def attach_archive(conn: sqlite3.Connection, archive_file: str):
+    """Attaches the archive database as `archive`, creating its table on first use."""
+    conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE}", (archive_file,))
+    conn.execute(f"""
+        CREATE TABLE IF NOT EXISTS {ARCHIVE}.disaster_news (
+            id INTEGER PRIMARY KEY,
+            title TEXT NOT NULL,
+            description TEXT,
+            image_url TEXT,
+            source_name TEXT,
+            article_url TEXT UNIQUE NOT NULL,
+            published_at TIMESTAMP,
+            category TEXT,
+            location_name TEXT,
+            latitude REAL,
+            longitude REAL,
+            created_at TIMESTAMP,
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    """)
+    conn.execute(f"CREATE INDEX IF NOT EXISTS {ARCHIVE}.idx_archive_published ON disaster_news (published_at)")
+
+
+def archive_old_articles(conn: sqlite3.Connection, archive_file: str,
+                         max_age_days: float = NEWS_RETENTION_DAYS,
+                         batch_size: int = NEWS_ARCHIVE_BATCH_SIZE,
+                         vacuum_pages: int = NEWS_VACUUM_PAGES) -> dict:
+    """
+    Moves articles older than the cutoff into the archive, one transaction
+    per batch so readers are never blocked for long, then runs incremental
+    vacuum. Returns counts for the run.
+    """
+    cutoff = retention_cutoff(max_age_days)
+    attach_archive(conn, archive_file)
+    moved = batches = 0
+    try:
+        while True:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                ids = [row[0] for row in conn.execute(
+                    "SELECT id FROM main.disaster_news WHERE published_at < ? ORDER BY published_at LIMIT ?",
+                    (cutoff, batch_size)
+                )]
+                if ids:
+                    marks = ",".join("?" * len(ids))
+                    conn.execute(
+                        f"INSERT OR IGNORE INTO {ARCHIVE}.disaster_news ({NEWS_COLUMNS}) "
+                        f"SELECT {NEWS_COLUMNS} FROM main.disaster_news WHERE id IN ({marks})", ids
+                    )
+                    conn.execute(f"DELETE FROM main.disaster_news WHERE id IN ({marks})", ids)
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            if not ids:
+                break
+            moved += len(ids)
+            batches += 1
+            if len(ids) < batch_size:
+                break
+    finally:
+        conn.execute(f"DETACH DATABASE {ARCHIVE}")
+
+    free_before = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    # Frees one page per step; the sqlite3 module stops after the first
+    # step on execute(), while executescript() runs it to completion
+    conn.executescript(f"PRAGMA incremental_vacuum({int(vacuum_pages)});")
+    free_after = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    hot_rows = conn.execute("SELECT COUNT(*) FROM main.disaster_news").fetchone()[0]
+    result = {
+        "cutoff": cutoff,
+        "archived": moved,
+        "batches": batches,
+        "pages_freed": free_before - free_after,
+        "hot_rows": hot_rows,
+    }
+    logger.info("News retention run", extra=result)
+    return result
@@ -1,7 +1,10 @@
 from fastapi import FastAPI, Request
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.staticfiles import StaticFiles
 import sys
 import os
+import logging
 from pathlib import Path
 
 # --- PATH CONFIGURATION ---
@@ -20,30 +23,43 @@ if str(root_dir) not in sys.path:
     sys.path.insert(0, str(root_dir))
 
 # --- IMPORTS ---
+try:
+    from common.metrics import MetricsMiddleware, render as render_metrics
+    from common.logging_setup import configure_logging
+    from common.responses import ORJSONResponse
+    from common.compression import CompressionMiddleware
+    from common.body_limit import BodySizeLimitMiddleware
+except ImportError:
+    from backend.common.metrics import MetricsMiddleware, render as render_metrics
+    from backend.common.logging_setup import configure_logging
+    from backend.common.responses import ORJSONResponse
+    from backend.common.compression import CompressionMiddleware
+    from backend.common.body_limit import BodySizeLimitMiddleware
+
+# Queue-backed structured logging for the whole backend (LOG_LEVEL, LOG_FORMAT)
+configure_logging()
+logger = logging.getLogger("sankatsaathi.app")
+
 try:
     # Try importing as top-level modules (standard local python backend/app.py run)
     from Feature1.crisis_dispatch import router as crisis_router
-    print("SUCCESS: Crisis Router imported successfully")
 except ImportError as e:
-    print(f"Warning: Direct import of Feature1 failed: {e}. Trying absolute...")
+    logger.warning("Direct import of Feature1 failed: %s. Trying absolute...", e)
     try:
         # Try absolute import (useful if running from root like 'python -m backend.app')
         from backend.Feature1.crisis_dispatch import router as crisis_router
-        print("SUCCESS: Crisis Router imported successfully (absolute)")
     except ImportError as e2:
-        print(f"CRITICAL: Could not import Crisis Router. {e2}")
+        logger.critical("Could not import Crisis Router: %s", e2)
         crisis_router = None
 
 try:
     from Feature2_news.news_router import router as news_router
-    print("SUCCESS: News Router imported successfully")
 except ImportError as e:
-    print(f"Warning: Direct import of Feature2_news failed: {e}. Trying absolute...")
+    logger.warning("Direct import of Feature2_news failed: %s. Trying absolute...", e)
     try:
         from backend.Feature2_news.news_router import router as news_router
-        print("SUCCESS: News Router imported successfully (absolute)")
     except ImportError as e2:
-        print(f"CRITICAL: Could not import News Router. {e2}")
+        logger.critical("Could not import News Router: %s", e2)
         news_router = None
 
 
@@ -51,9 +67,14 @@ except ImportError as e:
 app = FastAPI(
     title="SankatSaathi API",
     version="1.1.0",
-    description="Backend for SankatSaathi: Crisis Management & News Aggregation"
+    description="Backend for SankatSaathi: Crisis Management & News Aggregation",
+    default_response_class=ORJSONResponse
 )
 
+# Rejects request bodies over MAX_REQUEST_BYTES before they are parsed (inside
+# CORS so browsers can read the 413)
+app.add_middleware(BodySizeLimitMiddleware)
+
 # CORS middleware
 # Allow broad access for hackathon development
 app.add_middleware(
@@ -64,6 +85,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# brotli/gzip for JSON bodies above COMPRESSION_MIN_SIZE, negotiated via Accept-Encoding
+app.add_middleware(CompressionMiddleware)
+
+# Per-route request count, latency histogram and error metrics (see /api/metrics)
+app.add_middleware(MetricsMiddleware)
+
 # --- ROUTING ---
 # Mount routers if they were successfully imported
 
@@ -73,13 +100,23 @@ if crisis_router:
     # Fallback for some frontend calls that might miss /api prefix or Vercel rewrites
     app.include_router(crisis_router) 
 else:
-    print("ERROR: Crisis Router NOT mounted.")
+    logger.error("Crisis Router NOT mounted.")
 
 if news_router:
     app.include_router(news_router, prefix="/api")
     app.include_router(news_router) # Fallback
 else:
-    print("ERROR: News Router NOT mounted.")
+    logger.error("News Router NOT mounted.")
+
+if crisis_router:
+    # With STORAGE_BACKEND=sqlite, incident images are stored on local disk
+    try:
+        from Feature1 import storage
+    except ImportError:
+        from backend.Feature1 import storage
+    if storage.STORAGE_BACKEND == "sqlite":
+        os.makedirs(storage.STORAGE_MEDIA_DIR, exist_ok=True)
+        app.mount(storage.STORAGE_MEDIA_URL, StaticFiles(directory=storage.STORAGE_MEDIA_DIR), name="media")
 
 
 @app.get("/")
@@ -100,6 +137,11 @@ async def root(request: Request):
 async def health():
     return {"status": "ok", "uptime": "good"}
 
+@app.get("/api/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus text exposition of request and downstream-call metrics."""
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     # Use standard host/port for local dev
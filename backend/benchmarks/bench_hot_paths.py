@@ -0,0 +1,183 @@
+"""
+Microbenchmarks for the backend's pure-Python hot functions.
+
+Times determine_category, extract_location_from_text and calculate_distance
+over synthetic article corpora, and the alert radius filter
+(crisis_dispatch.nearby_recipients) over synthetic subscriber lists, at
+several sizes. Results are reported as nanoseconds per item.
+
+    python -m benchmarks.bench_hot_paths                 # print results
+    python -m benchmarks.bench_hot_paths --save          # write the JSON baseline
+    python -m benchmarks.bench_hot_paths --compare       # fail on regressions
+
+--compare exits non-zero when any case is slower than the baseline by more
+than --threshold (default 25%). Baselines are machine-specific; re-save one
+when moving to different hardware.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+from pathlib import Path
+
+from benchmarks import common  # noqa: F401  (puts backend/ on sys.path)
+from Feature1.crisis_dispatch import nearby_recipients
+from Feature2_news.news_router import calculate_distance, determine_category, extract_location_from_text
+
+BASELINE_FILE = Path(__file__).resolve().parent / "hot_paths_baseline.json"
+DEFAULT_SIZES = [100, 1000, 10000]
+
+# Around Mumbai; the radius filter keeps subscribers within 5 km
+CENTER = (19.076, 72.8777)
+PLACES = ["Mumbai", "Chennai", "Kolkata", "Guwahati", "Kochi", "Shimla", "Port Blair", "Bhuj", "Uttarakhand"]
+EVENTS = ["Flood", "Earthquake", "Cyclone", "Landslide", "Drought", "Heatwave", "Wildfire"]
+FILLER = ("officials said residents were asked to move to safer places as rescue teams "
+          "reached the affected villages on Monday while relief camps opened").split()
+
+
+def make_articles(count: int, seed: int = 7) -> list:
+    """GNews-like (title, description) pairs; some match no keyword at all."""
+    rng = random.Random(seed)
+    articles = []
+    for _ in range(count):
+        event = rng.choice(EVENTS)
+        place = rng.choice(PLACES)
+        title = f"{event} Alert: {place} braces for heavy damage"
+        words = rng.sample(FILLER, 10)
+        words.insert(rng.randrange(len(words)), place)
+        articles.append((title, "The " + " ".join(words) + "."))
+    return articles
+
+
+def make_subscribers(count: int, seed: int = 11) -> list:
+    """list_push_subscriptions()-shaped rows; ~10% without a profile or location."""
+    rng = random.Random(seed)
+    rows = []
+    for i in range(count):
+        roll = rng.random()
+        if roll < 0.05:
+            profile = None
+        elif roll < 0.10:
+            profile = {"last_latitude": None, "last_longitude": None}
+        else:
+            profile = {"last_latitude": CENTER[0] + rng.uniform(-0.2, 0.2),
+                       "last_longitude": CENTER[1] + rng.uniform(-0.2, 0.2)}
+        rows.append({"id": f"sub-{i}", "user_id": f"user-{i}",
+                     "subscription": {"endpoint": f"https://push.example/{i}"}, "profiles": profile})
+    return rows
+
+
+def _cases(size: int):
+    articles = make_articles(size)
+    texts = [f"{title} {desc}" for title, desc in articles]
+    points = [(CENTER[0] + i % 97 * 0.01, CENTER[1] - i % 89 * 0.01) for i in range(size)]
+    subscribers = make_subscribers(size)
+
+    def categories():
+        for title, desc in articles:
+            determine_category(title, desc)
+
+    def locations():
+        for text in texts:
+            extract_location_from_text(text)
+
+    def distances():
+        lat, lon = CENTER
+        for p_lat, p_lon in points:
+            calculate_distance(lat, lon, p_lat, p_lon)
+
+    def radius_filter():
+        nearby_recipients(subscribers, *CENTER)
+
+    return {
+        "determine_category": categories,
+        "extract_location_from_text": locations,
+        "calculate_distance": distances,
+        "radius_filter": radius_filter,
+    }
+
+
+def time_case(fn, items: int, min_time: float = 0.2, repeats: int = 5) -> float:
+    """Best-of-`repeats` nanoseconds per item; each repeat runs at least `min_time`."""
+    fn()  # warm-up (lazy imports, caches)
+    best = float("inf")
+    for _ in range(repeats):
+        loops = 0
+        start = time.perf_counter()
+        while True:
+            fn()
+            loops += 1
+            elapsed = time.perf_counter() - start
+            if elapsed >= min_time:
+                break
+        best = min(best, elapsed / loops / items * 1e9)
+    return best
+
+
+def run(sizes, min_time: float) -> dict:
+    results = {}
+    for size in sizes:
+        for name, fn in _cases(size).items():
+            results[f"{name}@{size}"] = round(time_case(fn, size, min_time), 1)
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Rows of (case, baseline_ns, current_ns, change) and whether each regressed."""
+    rows = []
+    for case, current in results.items():
+        base = baseline.get(case)
+        if base is None:
+            rows.append((case, None, current, None, False))
+            continue
+        change = current / base - 1
+        rows.append((case, base, current, change, change > threshold))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES)
+    parser.add_argument("--min-time", type=float, default=0.2, help="seconds per timing repeat")
+    parser.add_argument("--save", action="store_true", help=f"write results to {BASELINE_FILE.name}")
+    parser.add_argument("--compare", action="store_true", help="compare against the saved baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown (0.25 = 25%%)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_FILE)
+    args = parser.parse_args()
+
+    results = run(args.sizes, args.min_time)
+
+    if args.compare:
+        if not args.baseline.exists():
+            raise SystemExit(f"No baseline at {args.baseline}; run with --save first")
+        baseline = json.loads(args.baseline.read_text())["results"]
+        rows = compare(results, baseline, args.threshold)
+        print(f"{'case':<34} {'baseline ns':>12} {'current ns':>12} {'change':>8}")
+        for case, base, current, change, regressed in rows:
+            base_s = f"{base:>12.1f}" if base is not None else f"{'-':>12}"
+            change_s = f"{change:>+8.1%}" if change is not None else f"{'new':>8}"
+            print(f"{case:<34} {base_s} {current:>12.1f} {change_s}{'  REGRESSION' if regressed else ''}")
+        regressions = [row[0] for row in rows if row[4]]
+        if regressions:
+            print(f"\nFAIL: {len(regressions)} case(s) slower than baseline by more than {args.threshold:.0%}")
+            sys.exit(1)
+        print(f"\nOK: no case slower than baseline by more than {args.threshold:.0%}")
+        return
+
+    print(f"{'case':<34} {'ns/item':>12}")
+    for case, ns in results.items():
+        print(f"{case:<34} {ns:>12.1f}")
+
+    if args.save:
+        args.baseline.write_text(json.dumps({
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "results": results,
+        }, indent=2) + "\n")
+        print(f"\nBaseline written to {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Cold-start import budget for the API.
+
+Runs `python -X importtime -c "import app"` in fresh interpreters, reports the
+median cumulative import time and the slowest top-level imports, and fails if
+the time exceeds `budget_ms` in import_budget.json or if any module listed in
+`deferred_modules` is imported eagerly (those belong behind Feature1.services
+or inside the function that needs them).
+
+    python -m benchmarks.bench_import_time [--top 15]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+BUDGET_FILE = Path(__file__).resolve().parent / "import_budget.json"
+
+_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)$")
+
+
+def measure(module: str) -> list:
+    """One fresh-interpreter import; returns [(depth, name, self_us, cumulative_us)]."""
+    env = dict(os.environ)
+    # Keep the measurement about imports, not about credentials found in .env
+    for key in ("SUPABASE_URL", "SUPABASE_KEY", "GEMINI_API_KEY"):
+        env.pop(key, None)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise SystemExit(f"import {module} failed:\n{proc.stderr[-2000:]}")
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((len(indent) // 2, name, int(self_us), int(cumulative_us)))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--top", type=int, default=15)
+    args = parser.parse_args()
+
+    budget = json.loads(BUDGET_FILE.read_text())
+    module = budget["module"]
+
+    runs = [measure(module) for _ in range(budget.get("repeats", 5))]
+    totals = [next(cum for depth, name, _, cum in rows if name == module) / 1000 for rows in runs]
+    median_ms = statistics.median(totals)
+
+    print(f"import {module}: median {median_ms:.0f} ms over {len(runs)} runs "
+          f"(budget {budget['budget_ms']} ms, baseline {budget['baseline']['app_ms']} ms)")
+
+    # Slowest direct children of the top-level module, from the last run
+    last = runs[-1]
+    children = [(name, cum) for depth, name, _, cum in last if depth == 1]
+    print(f"\nslowest imports under {module}:")
+    for name, cum in sorted(children, key=lambda c: c[1], reverse=True)[:args.top]:
+        print(f"  {cum / 1000:8.1f} ms  {name}")
+
+    imported = {name for _, name, _, _ in last}
+    eager = [m for m in budget["deferred_modules"] if m in imported]
+
+    failed = False
+    if eager:
+        print(f"\nFAIL: imported at startup but should be deferred: {', '.join(eager)}")
+        failed = True
+    if median_ms > budget["budget_ms"]:
+        print(f"\nFAIL: {median_ms:.0f} ms exceeds the {budget['budget_ms']} ms budget")
+        failed = True
+    if not failed:
+        print("\nOK: within budget")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,66 @@
+"""
+Push outbox delivery throughput.
+
+Enqueues N jobs into a temporary outbox and drains it with OutboxWorker at
+several concurrency levels. Delivery is simulated with a fixed per-push
+latency (the push service round trip), so the numbers show queue and worker
+overhead plus the effect of concurrency, not pywebpush CPU cost.
+
+    python -m benchmarks.bench_outbox [--jobs 2000] [--latency-ms 20]
+"""
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+
+import benchmarks.common  # noqa: F401  (sets up sys.path)
+from Feature1.push_outbox import OutboxWorker, PushOutbox
+from Feature1.push_service import PushOutcome
+
+PAYLOAD = {"title": "🚨 EMERGENCY: bench", "body": "Flood alert near you.", "data": {}}
+
+
+def make_deliver(latency: float):
+    def deliver(subscription, payload):
+        time.sleep(latency)
+        return PushOutcome.SENT
+    return deliver
+
+
+async def run(jobs: int, latency: float, concurrency: int) -> tuple:
+    with tempfile.TemporaryDirectory() as tmp:
+        outbox = PushOutbox(os.path.join(tmp, "outbox.db"))
+        recipients = [
+            {"subscriber_id": f"user-{i}", "subscription_id": f"sub-{i}",
+             "subscription": {"endpoint": f"https://push.example/{i}"}}
+            for i in range(jobs)
+        ]
+        start = time.perf_counter()
+        outbox.enqueue("incident-1", recipients, PAYLOAD)
+        enqueue_time = time.perf_counter() - start
+
+        worker = OutboxWorker(outbox, deliver=make_deliver(latency), concurrency=concurrency)
+        start = time.perf_counter()
+        await worker.drain()
+        drain_time = time.perf_counter() - start
+        assert worker.delivered == jobs, worker.stats()
+        return enqueue_time, drain_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=20.0)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 16, 32, 64])
+    args = parser.parse_args()
+
+    print(f"jobs={args.jobs} simulated push latency={args.latency_ms}ms")
+    print(f"{'concurrency':>11} {'enqueue ms':>11} {'drain s':>9} {'pushes/s':>10}")
+    for concurrency in args.concurrency:
+        enqueue_time, drain_time = asyncio.run(run(args.jobs, args.latency_ms / 1000, concurrency))
+        print(f"{concurrency:>11} {enqueue_time * 1000:>11.1f} {drain_time:>9.2f} {args.jobs / drain_time:>10.0f}")
+
+
+if __name__ == "__main__":
+    main()
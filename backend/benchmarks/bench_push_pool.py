@@ -0,0 +1,101 @@
+"""
+Push fan-out throughput: one process with threads versus ProcessPoolPusher.
+
+A local stand-in push service (separate process, answers every POST with
+201) receives the notifications, so the numbers reflect our own
+encryption, signing and HTTP cost. Run it on a multi-core machine to see
+process-mode throughput scale with the pool size.
+
+    python -m benchmarks.bench_push_pool [--pushes 2000] [--processes 1 2 4 8]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler
+
+from benchmarks.common import StandInServer, free_port, make_subscriptions, make_vapid_private_key
+from Feature1.push_pool import ProcessPoolPusher
+from Feature1.push_sender import PushSender
+
+SUBJECT = "mailto:bench@sankatsaathi.com"
+PAYLOAD = {
+    "title": "🚨 EMERGENCY: Flooding near river bank",
+    "body": "Flood alert near you. Severity: critical. Stay safe!",
+    "data": {"incident_id": "00000000-0000-0000-0000-000000000000", "latitude": 19.07, "longitude": 72.87},
+}
+
+
+class StandInPushService(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.send_response(201)
+        self.send_header("Content-Length", "0")
+        self.end_headers()
+
+    def log_message(self, *args):
+        pass
+
+
+def serve(port: int):
+    server = StandInServer(("127.0.0.1", port), StandInPushService)
+    server.serve_forever()
+
+
+def bench_threads(subs, private_key, threads: int) -> float:
+    sender = PushSender(private_key, SUBJECT)
+    data = json.dumps(PAYLOAD)
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        list(pool.map(lambda sub: sender.send(sub, data), subs))
+    return time.perf_counter() - start
+
+
+def bench_processes(subs, private_key, processes: int) -> float:
+    pusher = ProcessPoolPusher(processes=processes, private_key=private_key, subject=SUBJECT)
+    # Warm the pool so process start-up is not counted
+    pusher.deliver_many([(subs[0], PAYLOAD)] * processes)
+    start = time.perf_counter()
+    outcomes = pusher.deliver_many([(sub, PAYLOAD) for sub in subs])
+    elapsed = time.perf_counter() - start
+    pusher.shutdown()
+    sent = sum(1 for o in outcomes if o.value == "sent")
+    assert sent == len(subs), f"only {sent}/{len(subs)} pushes accepted"
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pushes", type=int, default=2000)
+    parser.add_argument("--threads", type=int, default=16)
+    cores = os.cpu_count() or 1
+    parser.add_argument("--processes", type=int, nargs="+",
+                        default=sorted({1, 2, 4, cores} & set(range(1, cores + 1))))
+    args = parser.parse_args()
+
+    port = free_port()
+    server = multiprocessing.Process(target=serve, args=(port,), daemon=True)
+    server.start()
+    time.sleep(0.3)
+
+    try:
+        private_key = make_vapid_private_key()
+        subs = make_subscriptions(args.pushes, origins=[f"http://127.0.0.1:{port}/push"])
+
+        print(f"pushes={args.pushes} cores={cores}")
+        print(f"{'mode':>18} {'seconds':>8} {'pushes/s':>9}")
+        elapsed = bench_threads(subs, private_key, args.threads)
+        print(f"{f'threads x{args.threads}':>18} {elapsed:>8.2f} {args.pushes / elapsed:>9.0f}")
+        for processes in args.processes:
+            elapsed = bench_processes(subs, private_key, processes)
+            print(f"{f'processes x{processes}':>18} {elapsed:>8.2f} {args.pushes / elapsed:>9.0f}")
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+Serialization and compression cost of representative API responses.
+
+Compares FastAPI's default path (pydantic response_model validation for
+/news/, jsonable_encoder, stdlib json) with returning an ORJSONResponse
+directly, then reports payload size and CPU time for gzip and brotli on the
+rendered bodies.
+
+    python -m benchmarks.bench_responses [--incidents 50] [--articles 20]
+"""
+import argparse
+import gzip
+import time
+from typing import List
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+
+from benchmarks.bench_hot_paths import make_articles
+from common.compression import BROTLI_AVAILABLE, BROTLI_QUALITY, GZIP_LEVEL
+from common.responses import dumps
+from Feature2_news.news_router import NewsArticle, determine_category, extract_location_from_text
+
+
+def incident_rows(count: int) -> list:
+    """Rows shaped like /crisis/active items, each with its ai_analysis blob."""
+    rows = []
+    for i in range(count):
+        rows.append({
+            "id": f"7d1e6c1a-0000-4000-8000-{i:012d}",
+            "reporter_id": f"5b0c2f3e-0000-4000-8000-{i:012d}",
+            "title": f"Flooding near railway underpass #{i}",
+            "description": "Water level rising quickly, two cars stranded, residents moving to upper floors.",
+            "latitude": 19.076 + i * 0.001,
+            "longitude": 72.8777 - i * 0.001,
+            "severity": "critical",
+            "status": "pending",
+            "type": "flood",
+            "image_url": f"https://example.supabase.co/storage/v1/object/public/incident-images/incidents/{i}/display.webp",
+            "thumbnail_url": f"https://example.supabase.co/storage/v1/object/public/incident-images/incidents/{i}/thumb.webp",
+            "ai_analysis": {
+                "severity": "critical",
+                "reasoning": "Standard emergency dispatch protocol. Rising water with trapped vehicles "
+                             "and pedestrians indicates immediate risk to life; rescue boats advised.",
+                "resources": ["fire_brigade", "ambulance", "rescue_boat", "police"],
+                "confidence": 0.87,
+            },
+            "responder_id": None,
+            "created_at": f"2026-07-{1 + i % 28:02d}T10:{i % 60:02d}:00.000000+00:00",
+            "updated_at": f"2026-07-{1 + i % 28:02d}T10:{i % 60:02d}:00.000000+00:00",
+        })
+    return rows
+
+
+def news_rows(count: int) -> list:
+    """Rows shaped like get_news results (disaster_news columns + distance_km)."""
+    rows = []
+    for i, (title, desc) in enumerate(make_articles(count)):
+        rows.append({
+            "id": i + 1,
+            "title": title,
+            "description": desc,
+            "image_url": f"https://images.example.com/news/{i}.jpg",
+            "source_name": "Stand-in Wire",
+            "article_url": f"https://news.example.com/article/{i}",
+            "published_at": "2026-07-14T08:30:00Z",
+            "category": determine_category(title, desc),
+            "location_name": extract_location_from_text(f"{title} {desc}"),
+            "latitude": 19.0 + i * 0.01,
+            "longitude": 72.8 + i * 0.01,
+            "created_at": "2026-07-14 08:31:02",
+            "distance_km": round(i * 1.7, 2),
+        })
+    return rows
+
+
+def per_call_us(fn, min_time: float = 0.3) -> float:
+    fn()
+    loops = 0
+    start = time.perf_counter()
+    while time.perf_counter() - start < min_time:
+        fn()
+        loops += 1
+    return (time.perf_counter() - start) / loops * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--incidents", type=int, default=50)
+    parser.add_argument("--articles", type=int, default=20)
+    args = parser.parse_args()
+
+    news_adapter = TypeAdapter(List[NewsArticle])
+    default_render = JSONResponse(None).render
+    payloads = {
+        "/crisis/active": (
+            {"crises": incident_rows(args.incidents)},
+            lambda c: default_render(jsonable_encoder(c)),
+        ),
+        "/news/": (
+            news_rows(args.articles),
+            lambda c: default_render(jsonable_encoder(news_adapter.validate_python(c))),
+        ),
+    }
+
+    print("Serialization (us per response)")
+    print(f"{'endpoint':<16} {'default':>10} {'orjson':>10} {'speed-up':>9}")
+    bodies = {}
+    for name, (content, default_path) in payloads.items():
+        default_us = per_call_us(lambda: default_path(content))
+        orjson_us = per_call_us(lambda: dumps(content))
+        bodies[name] = dumps(content)
+        print(f"{name:<16} {default_us:>10.1f} {orjson_us:>10.1f} {default_us / orjson_us:>8.1f}x")
+
+    print("\nCompression (bytes, us per response)")
+    header = f"{'endpoint':<16} {'raw':>8} {f'gzip-{GZIP_LEVEL}':>8} {'us':>7}"
+    if BROTLI_AVAILABLE:
+        header += f" {f'br-{BROTLI_QUALITY}':>8} {'us':>7}"
+    print(header)
+    for name, body in bodies.items():
+        gz = gzip.compress(body, compresslevel=GZIP_LEVEL)
+        gz_us = per_call_us(lambda: gzip.compress(body, compresslevel=GZIP_LEVEL))
+        line = f"{name:<16} {len(body):>8} {len(gz):>8} {gz_us:>7.0f}"
+        if BROTLI_AVAILABLE:
+            import brotli
+            br = brotli.compress(body, quality=BROTLI_QUALITY)
+            br_us = per_call_us(lambda: brotli.compress(body, quality=BROTLI_QUALITY))
+            line += f" {len(br):>8} {br_us:>7.0f}"
+        print(line)
+    if not BROTLI_AVAILABLE:
+        print("(brotli not installed; `pip install brotli` to enable br encoding)")
+
+
+if __name__ == "__main__":
+    main()
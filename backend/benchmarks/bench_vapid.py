@@ -0,0 +1,69 @@
+"""
+Per-push CPU time: pywebpush.webpush (key parse + JWT signature per call)
+versus Feature1.push_sender.PushSender (one key parse, one JWT per audience).
+
+No network is used; HTTP posts go to a null session.
+
+    python -m benchmarks.bench_vapid [--pushes 600]
+"""
+import argparse
+import json
+import time
+
+from benchmarks.common import NullSession, make_subscriptions, make_vapid_private_key
+
+import pywebpush
+from Feature1.push_sender import PushSender
+
+SUBJECT = "mailto:bench@sankatsaathi.com"
+PAYLOAD = json.dumps({
+    "title": "🚨 EMERGENCY: Flooding near river bank",
+    "body": "Flood alert near you. Severity: critical. Stay safe!",
+    "data": {"incident_id": "00000000-0000-0000-0000-000000000000", "latitude": 19.07, "longitude": 72.87},
+})
+
+
+def bench_before(subs, private_key):
+    session = NullSession()
+    start = time.process_time()
+    for sub in subs:
+        pywebpush.webpush(
+            subscription_info=sub,
+            data=PAYLOAD,
+            vapid_private_key=private_key,
+            vapid_claims={"sub": SUBJECT},
+            requests_session=session,
+        )
+    return time.process_time() - start
+
+
+def bench_after(subs, private_key):
+    sender = PushSender(private_key, SUBJECT, session_factory=NullSession)
+    start = time.process_time()
+    for sub in subs:
+        sender.send(sub, PAYLOAD)
+    elapsed = time.process_time() - start
+    return elapsed, sender.signatures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--pushes", type=int, default=600)
+    args = parser.parse_args()
+
+    private_key = make_vapid_private_key()
+    subs = make_subscriptions(args.pushes)
+
+    before = bench_before(subs, private_key)
+    after, signatures = bench_after(subs, private_key)
+
+    per_before = before / args.pushes * 1e6
+    per_after = after / args.pushes * 1e6
+    print(f"pushes:            {args.pushes}")
+    print(f"webpush():         {per_before:8.1f} us CPU/push")
+    print(f"PushSender.send(): {per_after:8.1f} us CPU/push ({signatures} JWT signatures)")
+    print(f"speedup:           {per_before / per_after:8.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Shared helpers for the backend benchmarks."""
+import base64
+import os
+import socket
+import sys
+from http.server import ThreadingHTTPServer
+from pathlib import Path
+
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec
+
+# Make `Feature1` / `Feature2_news` importable when run as `python -m benchmarks.x`
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
+
+# Push services subscribers are spread across in production
+PUSH_ORIGINS = [
+    "https://fcm.googleapis.com/fcm/send",
+    "https://updates.push.services.mozilla.com/wpush/v2",
+    "https://web.push.apple.com",
+]
+
+
+def b64url(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).decode().rstrip("=")
+
+
+def make_vapid_private_key() -> str:
+    """A fresh VAPID private key in the raw base64url form VAPID_PRIVATE_KEY uses."""
+    key = ec.generate_private_key(ec.SECP256R1())
+    return b64url(key.private_numbers().private_value.to_bytes(32, "big"))
+
+
+def make_subscription(endpoint_base: str, index: int) -> dict:
+    """A browser-like PushSubscription with real P-256 keys."""
+    key = ec.generate_private_key(ec.SECP256R1())
+    p256dh = key.public_key().public_bytes(
+        serialization.Encoding.X962, serialization.PublicFormat.UncompressedPoint
+    )
+    return {
+        "endpoint": f"{endpoint_base}/sub-{index}",
+        "keys": {"p256dh": b64url(p256dh), "auth": b64url(os.urandom(16))},
+    }
+
+
+def make_subscriptions(count: int, origins=PUSH_ORIGINS) -> list:
+    return [make_subscription(origins[i % len(origins)], i) for i in range(count)]
+
+
+class FakeResponse:
+    status_code = 201
+    reason = "Created"
+    text = ""
+    headers = {}
+
+
+class NullSession:
+    """Stands in for requests.Session so only client-side CPU is measured."""
+
+    def post(self, url, data=None, headers=None, timeout=None):
+        return FakeResponse()
+
+    def mount(self, prefix, adapter):
+        pass
+
+    def close(self):
+        pass
+
+
+class StandInServer(ThreadingHTTPServer):
+    """Threaded HTTP server for local stand-ins of external services."""
+    # The default listen backlog of 5 resets connections under concurrent senders
+    request_queue_size = 256
+    daemon_threads = True
+
+
+def free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
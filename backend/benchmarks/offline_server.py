@@ -0,0 +1,77 @@
+"""
+Runs the full backend offline: storage on FakeSupabase (or the embedded
+SQLite store) and local stand-ins for GNews, Nominatim and the push services.
+
+    python -m benchmarks.offline_server [--port 8765] [--subscribers 500] [--storage sqlite]
+
+Subscribers are seeded around Mumbai, so alerts posted there fan out real
+encrypted pushes to the stand-in push endpoint. State lives in a temp
+directory and is discarded on exit.
+"""
+import argparse
+import os
+import random
+import tempfile
+
+from benchmarks.common import free_port, make_subscriptions, make_vapid_private_key
+from benchmarks.standins import PLACES, FakeSupabase, start_standins
+
+
+def seed(store, subscribers: int, push_base: str):
+    lat, lon = PLACES["Mumbai"]
+    subscriptions = make_subscriptions(subscribers, origins=[push_base])
+    for i, subscription in enumerate(subscriptions):
+        user_id = f"00000000-0000-0000-0000-{i:012d}"
+        store.upsert_profile({
+            "id": user_id,
+            "full_name": f"Responder {i}",
+            # Within ~30 km of the city centre
+            "last_latitude": lat + random.uniform(-0.25, 0.25),
+            "last_longitude": lon + random.uniform(-0.25, 0.25),
+        })
+        store.upsert_push_subscription(user_id, subscription)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--subscribers", type=int, default=500)
+    parser.add_argument("--storage", choices=["fake-supabase", "sqlite"], default="fake-supabase",
+                        help="SupabaseStore on an in-memory fake client, or the embedded SQLiteStore")
+    args = parser.parse_args()
+
+    standin_port = free_port()
+    standin_url = f"http://127.0.0.1:{standin_port}"
+    state_dir = tempfile.mkdtemp(prefix="sankat-offline-")
+
+    # Routers read these at import time
+    os.environ.update({
+        "GNEWS_SEARCH_URL": f"{standin_url}/gnews/search",
+        "NOMINATIM_SEARCH_URL": f"{standin_url}/nominatim/search",
+        "NOMINATIM_DELAY": "0",
+        # The stand-in is free; the per-process GNews budget would 429 a load run
+        "GNEWS_DAILY_QUOTA": "1000000",
+        "GNEWS_MINUTE_QUOTA": "1000000",
+        "NEWS_DB_FILE": os.path.join(state_dir, "news.db"),
+        "PUSH_OUTBOX_DB": os.path.join(state_dir, "push_outbox.db"),
+        "VAPID_PRIVATE_KEY": make_vapid_private_key(),
+        "LOG_LEVEL": os.getenv("LOG_LEVEL", "WARNING"),
+        "STORAGE_BACKEND": "sqlite" if args.storage == "sqlite" else "supabase",
+        "SQLITE_STORE_DB": os.path.join(state_dir, "store.db"),
+    })
+
+    import uvicorn
+    from app import app
+    from Feature1 import services
+
+    start_standins(standin_port)
+    if args.storage == "fake-supabase":
+        services.override("supabase", FakeSupabase())
+    seed(services.store(), args.subscribers, f"{standin_url}/push")
+
+    print(f"Offline backend on http://127.0.0.1:{args.port} (stand-ins {standin_url}, state {state_dir})", flush=True)
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
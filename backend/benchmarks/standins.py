@@ -0,0 +1,403 @@
+"""
+Offline stand-ins for the services the backend talks to.
+
+`FakeSupabase` keeps tables in memory and implements the slice of the
+supabase-py query builder the routers use. `StandInHandler` answers the
+GNews search, Nominatim search and web push endpoints from one local HTTP
+server. Together they let the load test run without any network access.
+"""
+import datetime
+import itertools
+import json
+import random
+import re
+import threading
+import uuid
+from http.server import BaseHTTPRequestHandler
+from types import SimpleNamespace
+from urllib.parse import parse_qs, urlparse
+
+from benchmarks.common import StandInServer
+
+# Embedded resources: (table, embedded table) -> (local column, remote column)
+RELATIONS = {
+    ("push_subscriptions", "profiles"): ("user_id", "id"),
+    ("incidents", "profiles"): ("reporter_id", "id"),
+    ("incidents", "incident_rooms"): ("id", "incident_id"),
+    ("incident_rooms", "incident_messages"): ("id", "room_id"),
+    ("incident_messages", "profiles"): ("sender_id", "id"),
+}
+
+# `table(...)` or `table!fk_constraint(...)`; the hint only disambiguates, so it is ignored
+_EMBED = re.compile(r"(\w+)(?:!\w+)?\(")
+
+
+def _now() -> str:
+    return datetime.datetime.now(datetime.timezone.utc).isoformat(timespec="microseconds")
+
+
+def _sorted(rows: list, column: str, desc: bool) -> list:
+    present = [r for r in rows if r.get(column) is not None]
+    missing = [r for r in rows if r.get(column) is None]
+    # Postgres puts NULLs first when descending, last when ascending
+    present.sort(key=lambda r: r[column], reverse=desc)
+    return missing + present if desc else present + missing
+
+
+def _split_columns(columns: str) -> list:
+    """Splits a select string on top-level commas."""
+    parts, depth, current = [], 0, ""
+    for ch in columns:
+        if ch == "," and depth == 0:
+            parts.append(current.strip())
+            current = ""
+            continue
+        depth += ch == "("
+        depth -= ch == ")"
+        current += ch
+    if current.strip():
+        parts.append(current.strip())
+    return parts
+
+
+class _Query:
+    def __init__(self, db: "FakeSupabase", table: str):
+        self.db = db
+        self.table = table
+        self.op = "select"
+        self.columns = "*"
+        self.payload = None
+        self.on_conflict = None
+        self.filters = []
+        self.order_by = None
+        self.row_limit = None
+        # Per embedded path ("incident_rooms.incident_messages"): filters, order, limit
+        self.embedded = {}
+
+    # Builder surface
+    def select(self, columns="*", **kwargs):
+        self.columns = columns
+        return self
+
+    def insert(self, payload):
+        self.op, self.payload = "insert", payload
+        return self
+
+    def upsert(self, payload, on_conflict=None, **kwargs):
+        self.op, self.payload, self.on_conflict = "upsert", payload, on_conflict
+        return self
+
+    def update(self, payload):
+        self.op, self.payload = "update", payload
+        return self
+
+    def delete(self):
+        self.op = "delete"
+        return self
+
+    def eq(self, column, value):
+        self.filters.append(lambda r: str(r.get(column)) == str(value))
+        return self
+
+    def neq(self, column, value):
+        self.filters.append(lambda r: str(r.get(column)) != str(value))
+        return self
+
+    def in_(self, column, values):
+        values = {str(v) for v in values}
+        self.filters.append(lambda r: str(r.get(column)) in values)
+        return self
+
+    def lt(self, column, value):
+        path, _, column = column.rpartition(".")
+        check = lambda r: r.get(column) is not None and r.get(column) < value
+        if path:
+            self._embedded(path).setdefault("filters", []).append(check)
+        else:
+            self.filters.append(check)
+        return self
+
+    def order(self, column, desc=False, foreign_table=None, **kwargs):
+        if foreign_table is None:
+            self.order_by = (column, desc)
+        else:
+            self._embedded(foreign_table)["order"] = (column, desc)
+        return self
+
+    def limit(self, count, foreign_table=None, **kwargs):
+        if foreign_table is None:
+            self.row_limit = count
+        else:
+            self._embedded(foreign_table)["limit"] = count
+        return self
+
+    def _embedded(self, path):
+        return self.embedded.setdefault(path, {})
+
+    def execute(self):
+        with self.db.lock:
+            rows = self.db.tables.setdefault(self.table, [])
+            if self.op == "insert":
+                data = [self.db.stamp(row) for row in self._payload_rows()]
+                rows.extend(data)
+                if self.table == "incidents":
+                    # Mirrors the on_incident_created trigger
+                    rooms = self.db.tables.setdefault("incident_rooms", [])
+                    rooms.extend(self.db.stamp({"incident_id": row["id"]}) for row in data)
+                data = [dict(row) for row in data]
+            elif self.op == "upsert":
+                data = [self._upsert(rows, row) for row in self._payload_rows()]
+            else:
+                matched = [r for r in rows if all(f(r) for f in self.filters)]
+                if self.op == "update":
+                    for r in matched:
+                        r.update(self.payload)
+                    data = [dict(r) for r in matched]
+                elif self.op == "delete":
+                    self.db.tables[self.table] = [r for r in rows if r not in matched]
+                    data = matched
+                else:
+                    data = [self.db.project(self.table, r, self.columns, self.embedded) for r in matched]
+        if self.order_by:
+            data = _sorted(data, *self.order_by)
+        if self.row_limit is not None:
+            data = data[:self.row_limit]
+        return SimpleNamespace(data=data, count=len(data))
+
+    def _payload_rows(self):
+        return self.payload if isinstance(self.payload, list) else [self.payload]
+
+    def _upsert(self, rows, row):
+        key = self.on_conflict or "id"
+        for existing in rows:
+            if key in row and existing.get(key) == row[key]:
+                existing.update(row)
+                return dict(existing)
+        stamped = self.db.stamp(row)
+        rows.append(stamped)
+        return dict(stamped)
+
+
+class _Bucket:
+    def __init__(self, files: dict, name: str):
+        self.files = files
+        self.name = name
+
+    def upload(self, path, data, options=None):
+        self.files[f"{self.name}/{path}"] = len(data)
+
+    def get_public_url(self, path):
+        return f"http://storage.local/{self.name}/{path}"
+
+
+class _Storage:
+    def __init__(self):
+        self.files = {}
+
+    def from_(self, name):
+        return _Bucket(self.files, name)
+
+
+class _Rpc:
+    def __init__(self, fn):
+        self.fn = fn
+
+    def execute(self):
+        return SimpleNamespace(data=self.fn())
+
+
+class FakeSupabase:
+    """In-memory, thread-safe stand-in for the supabase-py client."""
+
+    def __init__(self):
+        self.tables = {}
+        self.storage = _Storage()
+        self.lock = threading.RLock()
+
+    def table(self, name: str) -> _Query:
+        return _Query(self, name)
+
+    def stamp(self, row: dict) -> dict:
+        row = dict(row)
+        row.setdefault("id", str(uuid.uuid4()))
+        row.setdefault("created_at", _now())
+        return row
+
+    def project(self, table: str, row: dict, columns: str, embedded: dict = None, path: str = "") -> dict:
+        """Copies the selected columns and resolves embeds like `profiles(full_name)` or `profiles!fk(full_name)`."""
+        embedded = embedded or {}
+        parts = _split_columns(columns)
+        out = dict(row) if "*" in parts else {}
+        for part in parts:
+            match = _EMBED.match(part)
+            if not match:
+                if part != "*":
+                    out[part] = row.get(part)
+                continue
+            child = match.group(1)
+            inner = part[match.end():-1]
+            local, remote = RELATIONS.get((table, child), (None, None))
+            if local is None:
+                continue
+            child_path = f"{path}.{child}" if path else child
+            options = embedded.get(child_path, {})
+            related = [r for r in self.tables.get(child, [])
+                       if str(r.get(remote)) == str(row.get(local))
+                       and all(f(r) for f in options.get("filters", []))]
+            if "order" in options:
+                related = _sorted(related, *options["order"])
+            if "limit" in options:
+                related = related[:options["limit"]]
+            related = [self.project(child, r, inner, embedded, child_path) for r in related]
+            # Many-to-one embeds come back as an object, one-to-many as a list
+            out[child] = (related[0] if related else None) if remote == "id" else related
+        return out
+
+    def rpc(self, name: str, params: dict) -> _Rpc:
+        if name != "accept_incident":
+            raise NotImplementedError(name)
+
+        def accept():
+            with self.lock:
+                incident = next((r for r in self.tables.get("incidents", [])
+                                 if str(r["id"]) == str(params["p_incident_id"])), None)
+                if incident is None:
+                    return {"accepted": False, "status": None}
+                if incident.get("status") != "pending":
+                    return {"accepted": False, "status": incident.get("status")}
+                responder_id = params["p_responder_id"]
+                incident.update(status="dispatched", responder_id=responder_id, updated_at=_now())
+                name = params.get("p_responder_name")
+                if name is None:
+                    profile = next((p for p in self.tables.get("profiles", []) if p["id"] == responder_id), None)
+                    name = profile.get("full_name") if profile else None
+                for room in self.tables.get("incident_rooms", []):
+                    if room["incident_id"] == incident["id"]:
+                        self.tables.setdefault("incident_messages", []).append(self.stamp({
+                            "room_id": room["id"], "sender_id": responder_id,
+                            "content": f"🚨 {name or 'A responder'} has accepted this incident.",
+                        }))
+                return {"accepted": True, "incident": dict(incident), "responder_name": name}
+
+        return _Rpc(accept)
+
+
+# --- External HTTP services ---
+
+_article_ids = itertools.count()
+
+PLACES = {
+    "Mumbai": (19.076, 72.8777),
+    "Chennai": (13.0827, 80.2707),
+    "Kolkata": (22.5726, 88.3639),
+    "Assam": (26.2006, 92.9376),
+    "Kerala": (10.8505, 76.2711),
+}
+
+
+def gnews_articles(count: int = 10) -> list:
+    """Articles shaped like GNews search results, with fresh URLs each call."""
+    kinds = ["Flood", "Earthquake", "Cyclone", "Landslide", "Wildfire fire"]
+    articles = []
+    for _ in range(count):
+        n = next(_article_ids)
+        place = random.choice(list(PLACES))
+        kind = random.choice(kinds)
+        articles.append({
+            "title": f"{kind} reported in {place} #{n}",
+            "description": f"Officials in {place} issued a {kind.lower()} warning.",
+            "url": f"http://news.local/article/{n}",
+            "image": None,
+            "publishedAt": _now(),
+            "source": {"name": "Stand-in Wire"},
+        })
+    return articles
+
+
+def _gnews_time(value: datetime.datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class GNewsFeed:
+    """
+    Per-query article timelines that honour `from`, `max` and `page`.
+
+    A query's first search finds a backlog deeper than a few pages; every
+    later first-page search publishes a handful of new articles, sometimes
+    more than a page, so watermark paging is exercised the way it is
+    against the real API.
+    """
+
+    def __init__(self, backlog: int = 40, max_arrivals: int = 12):
+        self.backlog = backlog
+        self.max_arrivals = max_arrivals
+        self.timelines = {}
+        self.lock = threading.Lock()
+
+    def _publish(self, timeline: list, count: int):
+        now = datetime.datetime.now(datetime.timezone.utc).replace(microsecond=0)
+        latest = timeline[0][0] if timeline else now - datetime.timedelta(seconds=count)
+        # Second precision like GNews; strictly increasing so `from` is unambiguous
+        start = max(now - datetime.timedelta(seconds=count - 1), latest + datetime.timedelta(seconds=1))
+        for i, article in enumerate(gnews_articles(count)):
+            published = start + datetime.timedelta(seconds=i)
+            article["publishedAt"] = _gnews_time(published)
+            timeline.insert(0, (published, article))
+
+    def search(self, params: dict) -> dict:
+        query = params.get("q", "")
+        size = int(params.get("max", 10))
+        page = int(params.get("page", 1))
+        since = params.get("from")
+        bound = datetime.datetime.fromisoformat(since.replace("Z", "+00:00")) if since else None
+        with self.lock:
+            timeline = self.timelines.get(query)
+            if timeline is None:
+                timeline = self.timelines[query] = []
+                self._publish(timeline, self.backlog)
+            elif page == 1:
+                self._publish(timeline, random.randint(0, self.max_arrivals))
+            # `from` is inclusive, as in GNews
+            matching = [article for published, article in timeline if bound is None or published >= bound]
+        articles = matching[(page - 1) * size:page * size]
+        return {"totalArticles": len(matching), "articles": articles}
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    """Answers /gnews/search, /nominatim/search and POST /push/*."""
+    protocol_version = "HTTP/1.1"
+
+    def _reply(self, status: int, body=None):
+        data = json.dumps(body).encode() if body is not None else b""
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/gnews/search":
+            params = {key: values[0] for key, values in parse_qs(url.query).items()}
+            self._reply(200, self.server.gnews.search(params))
+        elif url.path == "/nominatim/search":
+            query = parse_qs(url.query).get("q", [""])[0]
+            coords = next((c for name, c in PLACES.items() if name.lower() in query.lower()), None)
+            self._reply(200, [{"lat": str(coords[0]), "lon": str(coords[1])}] if coords else [])
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self._reply(201 if self.path.startswith("/push/") else 404)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_standins(port: int) -> StandInServer:
+    """Serves the external-service stand-ins from a daemon thread."""
+    server = StandInServer(("127.0.0.1", port), StandInHandler)
+    server.gnews = GNewsFeed()
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1 @@
+# Shared infrastructure used by both feature packages (metrics, logging)
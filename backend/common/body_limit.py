@@ -0,0 +1,54 @@
+"""
+Request body size cap as a pure ASGI middleware.
+
+Starlette receives and spools a whole multipart body before a handler sees
+its UploadFile, so a size check in the handler cannot bound what the server
+accepts. This middleware answers 413 from Content-Length before anything is
+read, and for bodies sent without one (chunked) stops reading as soon as
+the cap is passed.
+"""
+import os
+
+from fastapi import HTTPException
+from starlette.responses import PlainTextResponse
+
+# The largest image upload (MAX_IMAGE_BYTES, 10 MB) plus room for the other form fields
+MAX_REQUEST_BYTES = int(os.getenv("MAX_REQUEST_BYTES", str(11 * 1024 * 1024)))
+
+
+class BodySizeLimitMiddleware:
+    def __init__(self, app, max_bytes: int = MAX_REQUEST_BYTES):
+        self.app = app
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        declared = None
+        for name, value in scope["headers"]:
+            if name == b"content-length":
+                try:
+                    declared = int(value)
+                except ValueError:
+                    pass
+                break
+        if declared is not None and declared > self.max_bytes:
+            response = PlainTextResponse("Request body too large", status_code=413)
+            await response(scope, receive, send)
+            return
+
+        received = 0
+
+        async def capped_receive():
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_bytes:
+                    # FastAPI re-raises HTTPExceptions from body parsing, so this becomes the response
+                    raise HTTPException(status_code=413, detail="Request body too large")
+            return message
+
+        await self.app(scope, capped_receive, send)
@@ -0,0 +1,126 @@
+"""
+Negotiated response compression (brotli or gzip) as a pure ASGI middleware.
+
+Responses sent in a single body message, at least COMPRESSION_MIN_SIZE bytes
+long and of a text-like content type are compressed with the best encoding
+the client accepts: brotli (the `brotli` package, in requirements.txt) when it is installed,
+otherwise gzip. Small bodies, images, streamed responses and responses that
+already carry a Content-Encoding pass through untouched.
+"""
+import gzip
+import importlib.util
+import os
+
+BROTLI_AVAILABLE = importlib.util.find_spec("brotli") is not None
+
+# Below ~1 KB the header overhead and CPU cost outweigh the savings
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+# Brotli quality 4 compresses better than gzip -6 at similar CPU cost
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+_COMPRESSIBLE = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def parse_accept_encoding(header: str) -> dict:
+    """{"gzip": 1.0, "br": 0.5, ...} from an Accept-Encoding header."""
+    accepted = {}
+    for item in header.split(","):
+        name, _, params = item.strip().partition(";")
+        if not name:
+            continue
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        accepted[name.strip().lower()] = q
+    return accepted
+
+
+def choose_encoding(header: str) -> str:
+    """'br', 'gzip' or '' for the client's Accept-Encoding header."""
+    accepted = parse_accept_encoding(header)
+    wildcard = accepted.get("*", 0.0)
+    candidates = (["br"] if BROTLI_AVAILABLE else []) + ["gzip"]
+    best, best_q = "", 0.0
+    for name in candidates:
+        q = accepted.get(name, wildcard)
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        import brotli
+        return brotli.compress(body, quality=BROTLI_QUALITY)
+    return gzip.compress(body, compresslevel=GZIP_LEVEL)
+
+
+class CompressionMiddleware:
+    def __init__(self, app, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for key, value in scope.get("headers", []):
+            if key == b"accept-encoding":
+                accept = value.decode("latin-1")
+                break
+        encoding = choose_encoding(accept) if accept else ""
+        if not encoding:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def send_wrapper(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                # Held back until the body shows whether compression applies
+                start_message = message
+                return
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            headers = [(k, v) for k, v in start.get("headers", [])]
+            if message.get("more_body") or not self._should_compress(headers, body):
+                await send(start)
+                await send(message)
+                return
+
+            compressed = compress(body, encoding)
+            headers = [(k, v) for k, v in headers if k.lower() not in (b"content-length", b"vary")]
+            vary = [v for k, v in start.get("headers", []) if k.lower() == b"vary"]
+            headers += [
+                (b"content-encoding", encoding.encode()),
+                (b"content-length", str(len(compressed)).encode()),
+                (b"vary", b", ".join(vary + [b"Accept-Encoding"])),
+            ]
+            await send({**start, "headers": headers})
+            await send({**message, "body": compressed})
+
+        await self.app(scope, receive, send_wrapper)
+
+    def _should_compress(self, headers, body: bytes) -> bool:
+        if len(body) < self.minimum_size:
+            return False
+        content_type = b""
+        for key, value in headers:
+            key = key.lower()
+            if key == b"content-encoding":
+                return False
+            if key == b"content-type":
+                content_type = value
+        return content_type.decode("latin-1").lower().startswith(_COMPRESSIBLE)
@@ -0,0 +1,69 @@
+"""
+Conditional GET helpers (ETag / Last-Modified).
+
+Handlers build a validator from a cheap data version (a counter, a file
+mtime) and call `not_modified()` before touching the database; a match
+returns an empty 304. Responses carry `Cache-Control: no-cache` so browsers
+keep the body but revalidate on every poll, sending the validators back
+automatically.
+
+ETags are weak because the compression middleware may re-encode the body.
+"""
+import hashlib
+import uuid
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+
+from starlette.requests import Request
+from starlette.responses import Response
+
+# Counters restart with the process, so validators built from them include this
+PROCESS_TOKEN = uuid.uuid4().hex[:8]
+
+
+def make_etag(*parts) -> str:
+    digest = hashlib.blake2b("|".join(map(str, parts)).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def validator_headers(etag: str, last_modified: Optional[float] = None) -> dict:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified:
+        headers["Last-Modified"] = formatdate(last_modified, usegmt=True)
+    return headers
+
+
+def _opaque(tag: str) -> str:
+    # Weak comparison: W/"x" and "x" are the same validator
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    if header.strip() == "*":
+        return True
+    wanted = _opaque(etag)
+    return any(_opaque(tag) == wanted for tag in header.split(","))
+
+
+def is_not_modified(request: Request, etag: str, last_modified: Optional[float] = None) -> bool:
+    """If-None-Match wins over If-Modified-Since, as RFC 9110 requires."""
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return _etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified:
+        try:
+            since = parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates have whole-second resolution
+        return int(last_modified) <= since
+    return False
+
+
+def not_modified(request: Request, etag: str, last_modified: Optional[float] = None) -> Optional[Response]:
+    """A 304 response if the client's copy is current, else None."""
+    if is_not_modified(request, etag, last_modified):
+        return Response(status_code=304, headers=validator_headers(etag, last_modified))
+    return None
@@ -0,0 +1,131 @@
+"""
+Leveled, structured logging with formatting and I/O off the request thread.
+
+`configure_logging()` puts a QueueHandler on the root logger. A QueueListener
+thread formats records and writes them to stdout, so a log call in a hot loop
+only costs record creation and a queue put. Fields passed through `extra=`
+are emitted as structured key/values (JSON with LOG_FORMAT=json).
+
+Per-item debug lines (one per subscriber, per article, ...) should pass
+`extra={"sample_rate": 0.01}`; SamplingFilter keeps that fraction of them.
+Warnings and errors are never sampled.
+"""
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import random
+import sys
+import threading
+import time
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+# "text" (key=value, readable locally) or "json" (one object per line)
+LOG_FORMAT = os.getenv("LOG_FORMAT", "text").lower()
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+# Fraction of per-item debug lines kept (passed as extra={"sample_rate": ...})
+LOG_ITEM_SAMPLE_RATE = float(os.getenv("LOG_ITEM_SAMPLE_RATE", "0.01"))
+
+# Attributes every LogRecord has; anything else came from `extra=`
+_RESERVED = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "taskName", "sample_rate"}
+
+_listener = None
+_lock = threading.Lock()
+
+
+def _extra_fields(record: logging.LogRecord) -> dict:
+    return {k: v for k, v in record.__dict__.items() if k not in _RESERVED and not k.startswith("_")}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": round(record.created, 3),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+        }
+        entry.update(_extra_fields(record))
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class KeyValueFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        stamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(record.created))
+        line = f"{stamp} {record.levelname:<7} {record.name}: {record.getMessage()}"
+        fields = _extra_fields(record)
+        if fields:
+            line += " " + " ".join(f"{k}={v}" for k, v in fields.items())
+        if record.exc_info:
+            line += "\n" + self.formatException(record.exc_info)
+        return line
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a record with probability `record.sample_rate` (default 1).
+    Warnings and errors are always kept, whatever rate they carry.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = getattr(record, "sample_rate", 1.0)
+        return rate >= 1.0 or random.random() < rate
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the listener as-is. The stock QueueHandler formats the
+    message in the calling thread; here formatting happens in the listener.
+    Records are dropped rather than blocking when the queue is full.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT):
+    """Installs the queue-backed root handler once per process."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return
+
+        output = logging.StreamHandler(sys.stdout)
+        output.setFormatter(JsonFormatter() if fmt == "json" else KeyValueFormatter())
+
+        log_queue = queue.Queue(maxsize=LOG_QUEUE_SIZE)
+        handler = NonBlockingQueueHandler(log_queue)
+        handler.addFilter(SamplingFilter())
+
+        root = logging.getLogger()
+        root.setLevel(level)
+        root.addHandler(handler)
+
+        _listener = logging.handlers.QueueListener(log_queue, output, respect_handler_level=True)
+        _listener.start()
+        atexit.register(stop_logging)
+
+
+def stop_logging():
+    """Flushes queued records and stops the listener thread."""
+    global _listener
+    with _lock:
+        if _listener is not None:
+            _listener.stop()
+            _listener = None
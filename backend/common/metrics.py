@@ -0,0 +1,169 @@
+"""
+In-process request and downstream-call metrics in Prometheus text format.
+
+`MetricsMiddleware` records count, latency and errors per route template
+(`/api/crisis/{incident_id}`, never the raw path), and `timed()` wraps calls
+to Supabase, GNews, Nominatim, Gemini and push services. `render()` produces
+the body served at /api/metrics.
+"""
+import bisect
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterable, Tuple
+
+# Seconds; covers cache hits (ms) up to slow WAN calls and push fan-outs
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = ()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values: Dict[tuple, float] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1.0):
+        key = tuple(str(v) for v in label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.append(f"{self.name}{_format_labels(self.labels, key)} {value:g}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help_text: str, labels: Iterable[str] = (), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        # label values -> [per-bucket counts (+Inf last), sum, count]
+        self._series: Dict[tuple, list] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        key = tuple(str(v) for v in label_values)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((k, [list(v[0]), v[1], v[2]]) for k, v in self._series.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labels, key, f'le="{bound:g}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labels, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labels, key)} {total:.6f}")
+            lines.append(f"{self.name}_count{_format_labels(self.labels, key)} {count}")
+        return lines
+
+
+# --- Metric definitions ---
+
+http_requests = Counter(
+    "sankat_http_requests_total", "HTTP requests by route template and status.",
+    ("method", "route", "status"))
+http_latency = Histogram(
+    "sankat_http_request_duration_seconds", "HTTP request latency by route template.",
+    ("method", "route"))
+http_errors = Counter(
+    "sankat_http_request_errors_total", "HTTP requests that raised or returned 5xx.",
+    ("method", "route"))
+downstream_latency = Histogram(
+    "sankat_downstream_call_duration_seconds", "Latency of calls to external services.",
+    ("service", "operation"))
+downstream_errors = Counter(
+    "sankat_downstream_call_errors_total", "External service calls that raised.",
+    ("service", "operation"))
+
+_METRICS = [http_requests, http_latency, http_errors, downstream_latency, downstream_errors]
+
+
+@contextmanager
+def timed(service: str, operation: str):
+    """Times a downstream call: `with timed("supabase", "incidents.insert"): ...`"""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        downstream_errors.inc(service, operation)
+        raise
+    finally:
+        downstream_latency.observe(time.perf_counter() - start, service, operation)
+
+
+def render() -> str:
+    lines = []
+    for metric in _METRICS:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI middleware (no per-request task like BaseHTTPMiddleware).
+    The router stores the matched route in the shared scope, so its path
+    template is available once the downstream app returns.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_holder = {"status": 500}
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                status_holder["status"] = message["status"]
+            await send(message)
+
+        failed = False
+        try:
+            await self.app(scope, receive, send_wrapper)
+        except BaseException:
+            failed = True
+            raise
+        finally:
+            route = scope.get("route")
+            # Unmatched paths share one label so scanners cannot blow up cardinality
+            template = getattr(route, "path", None) or "unmatched"
+            method = scope.get("method", "GET")
+            status = status_holder["status"]
+            http_latency.observe(time.perf_counter() - start, method, template)
+            http_requests.inc(method, template, status)
+            if failed or status >= 500:
+                http_errors.inc(method, template)
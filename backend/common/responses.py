@@ -0,0 +1,31 @@
+"""
+orjson-backed JSON responses.
+
+FastAPI runs every returned dict through `jsonable_encoder` and then
+`json.dumps`. Handlers that return an `ORJSONResponse` directly skip both, so
+trusted rows straight from a store go out in one orjson call. Falls back to
+the standard library when orjson is not installed.
+"""
+import json
+from typing import Any
+
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def dumps(content: Any) -> bytes:
+    if orjson is not None:
+        # Non-finite floats become null, like FastAPI's pydantic serializer
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse rendered with orjson; the app's default response class."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
@@ -0,0 +1,7 @@
+import sys
+from pathlib import Path
+
+# Run from backend/ (`python -m pytest tests`) or the repo root
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+if str(BACKEND_DIR) not in sys.path:
+    sys.path.insert(0, str(BACKEND_DIR))
@@ -0,0 +1,78 @@
+"""
+Accept-Encoding negotiation and CompressionMiddleware.
+
+    cd backend && python -m pytest tests
+"""
+import gzip
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from common import compression
+from common.compression import CompressionMiddleware, choose_encoding, parse_accept_encoding
+
+BIG = {"rows": [{"id": i, "title": "Flood warning for low-lying areas"} for i in range(200)]}
+
+
+def test_parse_accept_encoding_reads_q_values():
+    assert parse_accept_encoding("gzip, br;q=0.5, *;q=0") == {"gzip": 1.0, "br": 0.5, "*": 0.0}
+    assert parse_accept_encoding("gzip;q=bogus") == {"gzip": 0.0}
+
+
+def test_choose_encoding_prefers_brotli_when_available(monkeypatch):
+    monkeypatch.setattr(compression, "BROTLI_AVAILABLE", True)
+    assert choose_encoding("gzip, deflate, br") == "br"
+    assert choose_encoding("gzip, br;q=0.5") == "gzip"
+    assert choose_encoding("identity") == ""
+    assert choose_encoding("*") == "br"
+
+
+def test_choose_encoding_falls_back_to_gzip(monkeypatch):
+    monkeypatch.setattr(compression, "BROTLI_AVAILABLE", False)
+    assert choose_encoding("br, gzip") == "gzip"
+    assert choose_encoding("br") == ""
+
+
+@pytest.fixture
+def client():
+    async def big(request):
+        return JSONResponse(BIG, headers={"Vary": "Origin"})
+
+    async def small(request):
+        return JSONResponse({"ok": True})
+
+    async def image(request):
+        return Response(b"\x00" * 4096, media_type="image/webp")
+
+    app = Starlette(routes=[Route("/big", big), Route("/small", small), Route("/image", image)])
+    return TestClient(CompressionMiddleware(app, minimum_size=1024))
+
+
+def test_large_json_is_gzipped(client, monkeypatch):
+    monkeypatch.setattr(compression, "BROTLI_AVAILABLE", False)
+    response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.headers["vary"] == "Origin, Accept-Encoding"
+    assert response.json() == BIG
+
+
+def test_large_json_uses_brotli_when_installed(client, monkeypatch):
+    pytest.importorskip("brotli")
+    monkeypatch.setattr(compression, "BROTLI_AVAILABLE", True)
+    response = client.get("/big", headers={"Accept-Encoding": "gzip, br"})
+    assert response.headers["content-encoding"] == "br"
+    assert response.json() == BIG
+
+
+def test_small_bodies_images_and_identity_pass_through(client):
+    assert "content-encoding" not in client.get("/small", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/image", headers={"Accept-Encoding": "gzip"}).headers
+    assert "content-encoding" not in client.get("/big", headers={"Accept-Encoding": "identity"}).headers
+
+
+def test_gzip_round_trips():
+    body = b'{"a": 1}' * 500
+    assert gzip.decompress(compression.compress(body, "gzip")) == body
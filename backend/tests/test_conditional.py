@@ -0,0 +1,128 @@
+"""
+ETag / Last-Modified validators and the news endpoints' 304s.
+
+    cd backend && python -m pytest tests
+"""
+import datetime
+import time
+
+import pytest
+from fastapi import FastAPI
+from starlette.requests import Request
+from starlette.testclient import TestClient
+
+from common.conditional import is_not_modified, make_etag
+from Feature2_news import image_proxy, news_router
+
+
+def request(**headers):
+    raw = [(name.replace("_", "-").encode(), value.encode()) for name, value in headers.items()]
+    return Request({"type": "http", "method": "GET", "headers": raw})
+
+
+def test_make_etag_is_weak_and_depends_on_every_part():
+    assert make_etag("a", 1).startswith('W/"')
+    assert make_etag("a", 1) == make_etag("a", 1)
+    assert make_etag("a", 1) != make_etag("a", 2)
+    assert make_etag("a", None) != make_etag("a", "")
+
+
+def test_if_none_match_uses_weak_comparison():
+    etag = make_etag("v1")
+    assert is_not_modified(request(if_none_match=etag), etag)
+    assert is_not_modified(request(if_none_match=f'"x", {etag[2:]}'), etag)
+    assert is_not_modified(request(if_none_match="*"), etag)
+    assert not is_not_modified(request(if_none_match=make_etag("v2")), etag)
+
+
+def test_if_none_match_wins_over_if_modified_since():
+    etag = make_etag("v1")
+    future = "Tue, 01 Jan 2030 00:00:00 GMT"
+    assert is_not_modified(request(if_modified_since=future), etag, last_modified=time.time())
+    assert not is_not_modified(request(if_none_match=make_etag("v2"), if_modified_since=future),
+                               etag, last_modified=time.time())
+    assert not is_not_modified(request(if_modified_since="not a date"), etag, last_modified=time.time())
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(news_router, "DB_FILE", str(tmp_path / "news.db"))
+    monkeypatch.setattr(news_router, "ARCHIVE_DB_FILE", str(tmp_path / "news_archive.db"))
+    monkeypatch.setattr(news_router, "IMAGE_DB_FILE", str(tmp_path / "news_images.db"))
+    monkeypatch.setattr(news_router, "VERSION_FILE", str(tmp_path / "news.version"))
+    monkeypatch.setattr(news_router, "news_images", image_proxy.ImageProxy(image_proxy.DiskLRU(str(tmp_path / "images"))))
+    news_router.init_db()
+    published = datetime.datetime.now(datetime.timezone.utc).isoformat()
+    news_router.store_articles([{
+        "title": "Flood warning in Mumbai", "description": "Rising water", "image_url": "http://img.local/1.jpg",
+        "source_name": "Wire", "article_url": "http://news.local/1", "published_at": published,
+        "category": "Flood", "location_name": "Mumbai", "latitude": 19.07, "longitude": 72.87,
+    }])
+    app = FastAPI()
+    app.include_router(news_router.router)
+    # No `with`: the router's startup hooks are not run
+    return TestClient(app)
+
+
+def test_news_revalidates_with_304(client):
+    first = client.get("/news/", params={"location": "Mumbai"})
+    assert first.status_code == 200 and len(first.json()) == 1
+    etag = first.headers["etag"]
+    again = client.get("/news/", params={"location": "Mumbai"}, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert again.headers["etag"] == etag
+
+
+def test_news_etag_depends_on_the_query(client):
+    etags = {client.get("/news/", params=params).headers["etag"] for params in (
+        {"location": "Mumbai"},
+        {"location": "Chennai"},
+        {"latitude": 19.07, "longitude": 72.87},
+        {"location": "Mumbai", "include_archive": "true"},
+    )}
+    assert len(etags) == 4
+    mumbai = client.get("/news/", params={"location": "Mumbai"}).headers["etag"]
+    other = client.get("/news/", params={"location": "Chennai"}, headers={"If-None-Match": mumbai})
+    assert other.status_code == 200
+
+
+def test_new_articles_change_the_etag(client):
+    etag = client.get("/news/stats").headers["etag"]
+    news_router.store_articles([{
+        "title": "Cyclone nears Chennai", "description": None, "image_url": None, "source_name": "Wire",
+        "article_url": "http://news.local/2", "published_at": datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        "category": "Cyclone", "location_name": "Chennai", "latitude": None, "longitude": None,
+    }])
+    assert client.get("/news/stats", headers={"If-None-Match": etag}).status_code == 200
+
+
+def test_checkpoints_and_connections_leave_the_etag_alone(client):
+    etag = client.get("/news/").headers["etag"]
+    conn = news_router.get_db_connection()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    time.sleep(0.01)
+    response = client.get("/news/", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+
+
+def test_image_fetches_leave_the_news_etag_alone(client, monkeypatch):
+    def unreachable(url):
+        raise image_proxy.ImageFetchError("connection refused")
+
+    monkeypatch.setattr(image_proxy, "fetch_image", unreachable)
+    etag = client.get("/news/").headers["etag"]
+    article_id = client.get("/news/").json()[0]["id"]
+    # The failed fetch is recorded, in the image proxy's own database
+    image = client.get(f"/news/image/{article_id}")
+    assert image.headers["content-type"].startswith("image/svg+xml")
+    assert client.get("/news/", headers={"If-None-Match": etag}).status_code == 304
+
+
+def test_served_rows_match_the_declared_model(client):
+    # get_news skips response_model validation, so the schema must be kept in sync by hand
+    row = client.get("/news/", params={"location": "Mumbai"}).json()[0]
+    assert set(row) == set(news_router.NewsArticle.model_fields)
+    news_router.NewsArticle.model_validate(row)
+    schema = client.get("/openapi.json").json()["components"]["schemas"]["NewsArticle"]
+    assert "id" in schema["required"]
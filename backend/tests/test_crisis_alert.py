@@ -0,0 +1,86 @@
+"""
+POST /crisis/alert: request validation, and a burst of alerts reaching a
+subscriber as one digest.
+
+    cd backend && python -m pytest tests
+"""
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+
+from Feature1 import crisis_dispatch, services
+from Feature1.push_outbox import SENT, OutboxWorker, PushOutbox
+from Feature1.push_service import PushOutcome
+from Feature1.push_throttle import SubscriberThrottle
+from Feature1.storage import SQLiteStore
+
+SUBSCRIBER = "00000000-0000-0000-0000-000000000001"
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.include_router(crisis_dispatch.router)
+    # No `with`: the router's startup hooks (outbox worker, cache refresh) are not run
+    return TestClient(app)
+
+
+def alert_form(**fields):
+    form = {"title": "Fire", "crisis_type": "fire", "latitude": "19.07", "longitude": "72.87"}
+    form.update(fields)
+    return form
+
+
+@pytest.mark.parametrize("field, value", [
+    ("latitude", "91"), ("latitude", "-90.5"), ("latitude", "nan"),
+    ("longitude", "180.1"), ("longitude", "-181"), ("longitude", "nan"), ("longitude", "inf"),
+])
+def test_out_of_range_coordinates_are_rejected(client, field, value):
+    response = client.post("/crisis/alert", data=alert_form(**{field: value}))
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", field]
+
+
+@pytest.fixture
+def subscribed(tmp_path, monkeypatch):
+    """One subscriber near Mumbai, a fresh outbox, and a worker that records what it sends."""
+    store = SQLiteStore(str(tmp_path / "store.db"), media_dir=str(tmp_path / "media"))
+    store.upsert_profile({"id": SUBSCRIBER, "full_name": "Asha", "last_latitude": 19.07, "last_longitude": 72.87})
+    store.upsert_push_subscription(SUBSCRIBER, {"endpoint": "https://push.local/1", "keys": {"p256dh": "k", "auth": "a"}})
+    monkeypatch.setitem(services._instances, "store", store)
+
+    sent = []
+
+    def deliver(subscription, payload):
+        sent.append(payload)
+        return PushOutcome.SENT
+
+    outbox = PushOutbox(str(tmp_path / "outbox.db"))
+    # Default bypass severities: the placeholder "critical" /alert assigns must not skip the throttle
+    worker = OutboxWorker(outbox, deliver, throttle=SubscriberThrottle(digest_window=0.3))
+    monkeypatch.setattr(crisis_dispatch, "push_outbox", outbox)
+    monkeypatch.setattr(crisis_dispatch, "outbox_worker", worker)
+    return outbox, worker, sent
+
+
+def test_alert_burst_reaches_a_subscriber_as_one_digest(client, subscribed):
+    outbox, worker, sent = subscribed
+    ids = []
+    # Different types, so the reports are not coalesced into one incident
+    for crisis_type in ("fire", "flood", "landslide"):
+        response = client.post("/crisis/alert", data=alert_form(title=crisis_type.title(), crisis_type=crisis_type))
+        assert response.json()["queued_notifications"] == 1
+        ids.append(response.json()["incident_id"])
+        asyncio.run(worker.drain())
+
+    # The first alert goes out; the next two land inside the digest window
+    assert [p["data"]["incident_id"] for p in sent] == ids[:1]
+    time.sleep(0.35)
+    asyncio.run(worker.drain())
+    assert len(sent) == 2
+    assert sent[1]["data"]["incident_ids"] == ids[1:]
+    assert sent[1]["title"] == "🚨 2 emergency alerts near you"
+    assert outbox.stats()["by_status"] == {SENT: 3}
@@ -0,0 +1,220 @@
+"""
+News image proxy: the on-disk LRU, placeholders, fetch failures and
+WebP variants.
+
+    cd backend && python -m pytest tests
+"""
+import io
+import os
+import socket
+import sqlite3
+
+import pytest
+import requests
+
+from Feature2_news import image_proxy
+from Feature2_news.image_proxy import DiskLRU, ImageFetchError, ImageProxy
+
+URL = "http://img.local/flood.jpg"
+
+
+def jpeg(size=(2000, 1500)):
+    from PIL import Image
+
+    buf = io.BytesIO()
+    Image.new("RGB", size, (200, 40, 40)).save(buf, format="JPEG")
+    return buf.getvalue()
+
+
+needs_pillow = pytest.mark.skipif(not image_proxy.PILLOW_AVAILABLE, reason="needs Pillow")
+
+
+def test_lru_evicts_the_least_recently_used(tmp_path):
+    cache = DiskLRU(str(tmp_path), max_bytes=25)
+    cache.put("a", b"x" * 10)
+    cache.put("b", b"x" * 10)
+    assert cache.get("a") is not None
+    cache.put("c", b"x" * 10)
+    # "b" was the oldest once "a" was read
+    assert cache.get("b") is None
+    assert sorted(os.listdir(tmp_path)) == ["a", "c"]
+    assert cache.stats()["evictions"] == 1 and cache.stats()["bytes"] == 20
+
+
+def test_lru_keeps_an_oversized_newest_entry(tmp_path):
+    cache = DiskLRU(str(tmp_path), max_bytes=5)
+    cache.put("a", b"x" * 3)
+    cache.put("b", b"x" * 10)
+    assert cache.get("a") is None and cache.get("b") == b"x" * 10
+
+
+def test_lru_reloads_and_drops_interrupted_writes(tmp_path):
+    DiskLRU(str(tmp_path)).put("a", b"data")
+    (tmp_path / "b.123.tmp").write_bytes(b"partial")
+    cache = DiskLRU(str(tmp_path))
+    assert cache.get("a") == b"data"
+    assert not (tmp_path / "b.123.tmp").exists()
+    assert cache.stats()["files"] == 1
+
+
+@pytest.fixture
+def proxy(tmp_path):
+    return ImageProxy(DiskLRU(str(tmp_path / "images")))
+
+
+@pytest.fixture
+def conn(tmp_path):
+    conn = sqlite3.connect(str(tmp_path / "images.db"))
+    conn.row_factory = sqlite3.Row
+    image_proxy.init_schema(conn)
+    yield conn
+    conn.close()
+
+
+def test_articles_without_an_image_get_a_placeholder(proxy, conn):
+    for url in (None, "https://via.placeholder.com/600x400?text=Flood"):
+        image = proxy.get(conn, url, "thumb", "Flood")
+        assert image.media_type == "image/svg+xml"
+        assert b"FLOOD" in image.body
+        assert image.cache_control == image_proxy.IMMUTABLE_CACHE_CONTROL
+    # Labels are escaped into the SVG
+    assert b"&lt;B&gt;" in image_proxy.render_placeholder("thumb", "<b>")
+
+
+@needs_pillow
+def test_failed_fetch_is_retried_after_the_retry_window(proxy, conn, monkeypatch):
+    calls = []
+
+    def unreachable(url):
+        calls.append(url)
+        raise ImageFetchError("connection refused")
+
+    monkeypatch.setattr(image_proxy, "fetch_image", unreachable)
+    image = proxy.get(conn, URL, "thumb", "Flood")
+    assert image.media_type == "image/svg+xml"
+    assert image.cache_control == image_proxy.RETRY_CACHE_CONTROL
+    # Inside the window the failure is remembered
+    proxy.get(conn, URL, "thumb", "Flood")
+    assert len(calls) == 1
+
+    conn.execute("UPDATE news_images SET fetched_at = fetched_at - ?", (image_proxy.NEWS_IMAGE_RETRY_SECONDS + 1,))
+    monkeypatch.setattr(image_proxy, "fetch_image", lambda url: (jpeg(), "image/jpeg"))
+    image = proxy.get(conn, URL, "thumb", "Flood")
+    assert image.cache_control == image_proxy.IMMUTABLE_CACHE_CONTROL
+    assert proxy.stats()["fetch_failures"] == 1
+
+
+@needs_pillow
+def test_variants_are_fetched_once_and_downscaled(proxy, conn, monkeypatch):
+    from PIL import Image
+
+    calls = []
+
+    def fetch(url):
+        calls.append(url)
+        return jpeg(), "image/jpeg"
+
+    monkeypatch.setattr(image_proxy, "fetch_image", fetch)
+    thumb = proxy.get(conn, URL, "thumb")
+    display = proxy.get(conn, URL, "display")
+    assert calls == [URL]
+    assert thumb.cache_control == image_proxy.IMMUTABLE_CACHE_CONTROL
+    assert Image.open(io.BytesIO(thumb.body)).size == (480, 360)
+    assert Image.open(io.BytesIO(display.body)).size == (1280, 960)
+    assert thumb.etag != display.etag
+    # Same bytes behind another URL share the cached files
+    proxy.get(conn, "http://mirror.local/flood.jpg", "thumb")
+    assert proxy.cache.stats()["files"] == 2
+
+
+@needs_pillow
+def test_undecodable_image_gets_the_retry_placeholder(proxy, conn, monkeypatch):
+    monkeypatch.setattr(image_proxy, "fetch_image", lambda url: (b"not a jpeg", "image/jpeg"))
+    image = proxy.get(conn, URL, "thumb", "Flood")
+    assert image.media_type == "image/svg+xml"
+    assert image.cache_control == image_proxy.RETRY_CACHE_CONTROL
+
+
+@pytest.fixture
+def dns(monkeypatch):
+    """Hostname -> address table standing in for the resolver."""
+    table = {"img.news.example": "93.184.216.34", "internal.example": "10.0.0.5"}
+
+    def getaddrinfo(host, port, *args, **kwargs):
+        address = table.get(host, host)
+        family = socket.AF_INET6 if ":" in address else socket.AF_INET
+        return [(family, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", (address, port))]
+
+    monkeypatch.setattr(image_proxy.socket, "getaddrinfo", getaddrinfo)
+    return table
+
+
+@pytest.mark.parametrize("url", [
+    "http://127.0.0.1/a.jpg",
+    "http://169.254.169.254/latest/meta-data/",
+    "http://internal.example/a.jpg",
+    "http://[::1]/a.jpg",
+    "http://[::ffff:10.0.0.1]/a.jpg",
+    "file:///etc/passwd",
+    "gopher://img.news.example/a",
+])
+def test_non_public_targets_are_refused(dns, url):
+    with pytest.raises(ImageFetchError):
+        image_proxy.check_public_url(url)
+
+
+class FakeResponse:
+    def __init__(self, status, headers, body=b""):
+        self.status_code = status
+        self.headers = headers
+        self.body = body
+        self.is_redirect = status in (301, 302, 303, 307, 308) and "Location" in headers
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.HTTPError(str(self.status_code))
+
+    def iter_content(self, size):
+        yield self.body
+
+
+def serve(monkeypatch, routes):
+    requested = []
+
+    def get(url, allow_redirects=True, **kwargs):
+        assert allow_redirects is False
+        requested.append(url)
+        return routes[url]
+
+    monkeypatch.setattr(requests, "get", get)
+    return requested
+
+
+def test_redirects_are_followed_with_every_hop_checked(dns, monkeypatch):
+    requested = serve(monkeypatch, {
+        "http://img.news.example/a.jpg": FakeResponse(302, {"Location": "/b.jpg"}),
+        "http://img.news.example/b.jpg": FakeResponse(200, {"Content-Type": "image/jpeg"}, b"jpeg"),
+    })
+    assert image_proxy.fetch_image("http://img.news.example/a.jpg") == (b"jpeg", "image/jpeg")
+    assert requested == ["http://img.news.example/a.jpg", "http://img.news.example/b.jpg"]
+
+
+def test_redirect_to_an_internal_address_is_refused(dns, monkeypatch):
+    requested = serve(monkeypatch, {
+        "http://img.news.example/a.jpg": FakeResponse(302, {"Location": "http://169.254.169.254/latest"}),
+    })
+    with pytest.raises(ImageFetchError, match="non-public"):
+        image_proxy.fetch_image("http://img.news.example/a.jpg")
+    assert requested == ["http://img.news.example/a.jpg"]
+
+
+def test_redirect_loops_give_up(dns, monkeypatch):
+    serve(monkeypatch, {"http://img.news.example/a.jpg": FakeResponse(302, {"Location": "/a.jpg"})})
+    with pytest.raises(ImageFetchError, match="too many redirects"):
+        image_proxy.fetch_image("http://img.news.example/a.jpg")
@@ -0,0 +1,119 @@
+"""
+ActiveIncidentCache write-through vs. refresh ordering.
+
+    cd backend && python -m pytest tests
+"""
+import pytest
+
+from Feature1.incident_cache import ActiveIncidentCache
+
+
+def incident(incident_id, **fields):
+    row = {"id": incident_id, "type": "flood", "status": "pending", "latitude": 19.07, "longitude": 72.87}
+    row.update(fields)
+    return row
+
+
+def test_upsert_during_refresh_survives_the_snapshot():
+    cache = ActiveIncidentCache()
+    cache.replace_all([incident("old")])
+
+    def loader():
+        # /alert lands while the snapshot is being read
+        cache.upsert(incident("new"))
+        return [incident("old")]
+
+    cache.refresh(loader)
+    assert cache.is_fresh()
+    assert cache.get("new") is not None
+    assert len(cache.nearby(19.07, 72.87, 1)) == 2
+
+
+def test_partial_update_during_refresh_merges_onto_snapshot():
+    cache = ActiveIncidentCache()
+
+    def loader():
+        cache.upsert({"id": "a", "status": "dispatched"})
+        return [incident("a", title="Flood")]
+
+    cache.refresh(loader)
+    assert cache.get("a")["status"] == "dispatched"
+    assert cache.get("a")["title"] == "Flood"
+
+
+def test_close_during_refresh_is_not_resurrected():
+    cache = ActiveIncidentCache()
+    cache.replace_all([incident("a")])
+
+    def loader():
+        cache.upsert({"id": "a", "status": "closed"})
+        return [incident("a")]
+
+    cache.refresh(loader)
+    assert cache.get("a") is None
+
+
+def test_writes_before_refresh_are_not_replayed():
+    cache = ActiveIncidentCache()
+    cache.upsert(incident("a"))
+    # The snapshot is authoritative for anything written before it started
+    cache.refresh(lambda: [])
+    assert cache.get("a") is None
+
+
+def test_failed_refresh_keeps_table_and_clears_journal():
+    cache = ActiveIncidentCache()
+    cache.replace_all([incident("a")])
+
+    def loader():
+        cache.upsert(incident("b"))
+        raise RuntimeError("supabase down")
+
+    with pytest.raises(RuntimeError, match="supabase down"):
+        cache.refresh(loader)
+    assert cache.get("b") is not None
+    assert cache.stats()["refresh_failures"] == 1
+    cache.refresh(lambda: [incident("a")])
+    assert cache.get("b") is None
+
+
+class RecordingListener:
+    def __init__(self):
+        self.resets = 0
+        self.updates = []
+
+    def reset(self, rows):
+        self.resets += 1
+
+    def update(self, incident_id, row):
+        self.updates.append(incident_id)
+
+
+def test_unchanged_refresh_does_not_reset_listeners():
+    cache = ActiveIncidentCache()
+    listener = RecordingListener()
+    cache.add_listener(listener)
+    cache.replace_all([incident("a")])
+    version = cache.version
+
+    cache.refresh(lambda: [incident("a")])
+    assert listener.resets == 1
+    assert cache.version == version
+
+    cache.refresh(lambda: [incident("a"), incident("b")])
+    assert listener.resets == 2
+    assert cache.version == version + 1
+
+
+def test_clusters_survive_an_unchanged_refresh():
+    from Feature1.clustering import ClusterIndex
+
+    cache = ActiveIncidentCache()
+    clusters = ClusterIndex()
+    cache.add_listener(clusters)
+    cache.replace_all([incident("a"), incident("b", latitude=28.6, longitude=77.2)])
+    before = clusters.clusters(5)
+    levels = clusters.stats()
+    cache.refresh(lambda: [incident("a"), incident("b", latitude=28.6, longitude=77.2)])
+    assert clusters.stats() == levels
+    assert clusters.clusters(5) == before
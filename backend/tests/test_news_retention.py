@@ -0,0 +1,111 @@
+"""
+News retention: archiving old articles, and when the router runs it.
+
+    cd backend && python -m pytest tests
+"""
+import asyncio
+import datetime
+import sqlite3
+
+import pytest
+
+from Feature2_news import news_router, retention
+
+
+def article(n, age_days):
+    published = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(days=age_days)
+    return {
+        "title": f"Flood {n}", "description": None, "image_url": None, "source_name": "Wire",
+        "article_url": f"http://news.local/{n}", "published_at": published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "category": "Flood", "location_name": "Mumbai", "latitude": 19.07, "longitude": 72.87,
+    }
+
+
+@pytest.fixture
+def news_db(tmp_path, monkeypatch):
+    monkeypatch.setattr(news_router, "DB_FILE", str(tmp_path / "news.db"))
+    monkeypatch.setattr(news_router, "ARCHIVE_DB_FILE", str(tmp_path / "news_archive.db"))
+    monkeypatch.setattr(news_router, "IMAGE_DB_FILE", str(tmp_path / "news_images.db"))
+    monkeypatch.setattr(news_router, "VERSION_FILE", str(tmp_path / "news.version"))
+    news_router.init_db()
+    conn = sqlite3.connect(news_router.DB_FILE)
+    # store_articles skips anything already past retention, so seed directly
+    rows = [article(i, age_days=40 + i) for i in range(5)] + [article(10 + i, age_days=i) for i in range(3)]
+    conn.executemany(
+        "INSERT INTO disaster_news (title, description, image_url, source_name, article_url, published_at, "
+        "category, location_name, latitude, longitude) VALUES (:title, :description, :image_url, :source_name, "
+        ":article_url, :published_at, :category, :location_name, :latitude, :longitude)", rows
+    )
+    conn.commit()
+    conn.close()
+    return tmp_path
+
+
+def count(path, table="disaster_news"):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_old_articles_move_to_the_archive_in_batches(news_db):
+    conn = sqlite3.connect(news_router.DB_FILE)
+    result = retention.archive_old_articles(conn, news_router.ARCHIVE_DB_FILE, max_age_days=30, batch_size=2)
+    conn.close()
+    assert result["archived"] == 5 and result["batches"] == 3
+    assert result["hot_rows"] == 3
+    assert count(news_router.ARCHIVE_DB_FILE) == 5
+    # A second run finds nothing left to move
+    conn = sqlite3.connect(news_router.DB_FILE)
+    assert retention.archive_old_articles(conn, news_router.ARCHIVE_DB_FILE, max_age_days=30)["archived"] == 0
+    conn.close()
+
+
+def test_archived_articles_stay_readable(news_db):
+    news_router.run_retention()
+    conn = news_router.get_db_connection(include_archive=True)
+    try:
+        total = conn.execute(f"SELECT COUNT(*) FROM {news_router.news_source(True)}").fetchone()[0]
+    finally:
+        conn.close()
+    assert total == 8
+    assert count(news_router.DB_FILE) == 3
+
+
+def auto_vacuum(path):
+    conn = sqlite3.connect(path)
+    try:
+        return conn.execute("PRAGMA auto_vacuum").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_first_run_switches_to_incremental_vacuum(news_db):
+    # init_db leaves the file alone; the full VACUUM waits for retention
+    assert auto_vacuum(news_router.DB_FILE) == 0
+    news_router.run_retention()
+    assert auto_vacuum(news_router.DB_FILE) == 2
+
+
+def test_startup_runs_once_and_leaves_retention_to_the_schedule(news_db, monkeypatch):
+    init_calls, runs = [], []
+    init_db = news_router.init_db
+    monkeypatch.setattr(news_router, "init_db", lambda: init_calls.append(1) or init_db())
+    monkeypatch.setattr(news_router, "run_retention", lambda: runs.append(1))
+    monkeypatch.setattr(retention, "NEWS_RETENTION_INTERVAL", 0.2)
+
+    async def lifecycle():
+        # Mounted with and without /api, so the hook fires twice
+        await news_router.startup_event()
+        await news_router.startup_event()
+        started = list(runs)
+        await asyncio.sleep(0.3)
+        await news_router.shutdown_event()
+        return started
+
+    assert asyncio.run(lifecycle()) == []
+    assert init_calls == [1]
+    assert runs == [1]
+    # Nothing was archived at startup
+    assert count(news_router.DB_FILE) == 8
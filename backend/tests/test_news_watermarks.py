@@ -0,0 +1,98 @@
+"""
+fetch_since paging and how the GNews watermark advances.
+
+    cd backend && python -m pytest tests
+"""
+import pytest
+
+from Feature2_news import news_router
+from Feature2_news.gnews_quota import QuotaExceeded
+
+
+def article(n, published):
+    return {"title": f"Flood {n}", "url": f"http://news.local/{n}", "publishedAt": published}
+
+
+def page_of(start, count, minute):
+    """`count` articles, newest first, published at 10:<minute>:<second>."""
+    return [article(start + i, f"2026-10-19T10:{minute:02d}:{59 - i:02d}Z") for i in range(count)]
+
+
+@pytest.fixture
+def gnews(monkeypatch):
+    """Scripted GNews pages; records the calls fetch_since makes."""
+    pages, calls = {}, []
+
+    def search(query, op="search", since=None, page=1):
+        calls.append((since, page))
+        result = pages.get(page, [])
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+    monkeypatch.setattr(news_router, "gnews_search", search)
+    monkeypatch.setattr(news_router, "GNEWS_PAGE_SIZE", 3)
+    monkeypatch.setattr(news_router, "GNEWS_MAX_PAGES", 2)
+    return pages, calls
+
+
+def test_first_fetch_sets_a_watermark(gnews):
+    pages, calls = gnews
+    pages[1] = page_of(0, 2, minute=30)
+    articles, mark = news_router.fetch_since("q", None)
+    assert len(articles) == 2
+    assert mark == "2026-10-19T10:30:59Z"
+    assert calls == [(None, 1)]
+
+
+def test_truncated_fetch_still_advances_the_watermark(gnews):
+    pages, calls = gnews
+    # Both pages full: paging stops at GNEWS_MAX_PAGES with more left
+    pages[1] = page_of(0, 3, minute=30)
+    pages[2] = page_of(3, 3, minute=20)
+    articles, mark = news_router.fetch_since("q", None)
+    assert len(articles) == 6
+    assert mark == "2026-10-19T10:30:59Z"
+    assert [page for _, page in calls] == [1, 2]
+
+
+def test_short_page_drops_the_article_at_the_watermark(gnews):
+    pages, calls = gnews
+    old = "2026-10-19T10:00:59Z"
+    pages[1] = page_of(0, 1, minute=5) + [article("seen", old)]
+    articles, mark = news_router.fetch_since("q", old)
+    assert [a["title"] for a in articles] == ["Flood 0"]
+    assert mark == "2026-10-19T10:05:59Z"
+    assert calls == [(old, 1)]
+
+
+def test_nothing_new_keeps_the_old_watermark(gnews):
+    pages, _ = gnews
+    old = "2026-10-19T10:00:59Z"
+    pages[1] = [article("seen", old)]
+    assert news_router.fetch_since("q", old) == ([], None)
+
+
+def test_failed_later_page_keeps_the_old_watermark(gnews):
+    pages, _ = gnews
+    old = "2026-10-19T10:00:59Z"
+    pages[1] = page_of(0, 3, minute=30)
+    pages[2] = QuotaExceeded("budget")
+    articles, mark = news_router.fetch_since("q", old)
+    # Page 1 is still stored; the gap behind it is fetched again next time
+    assert len(articles) == 3
+    assert mark is None
+
+
+def test_watermarks_lookup_without_queries(monkeypatch):
+    opened = []
+    monkeypatch.setattr(news_router, "get_db_connection", lambda: opened.append(1))
+    assert news_router.get_watermarks([]) == {}
+    assert opened == []
+
+
+def test_failed_first_page_raises(gnews):
+    pages, _ = gnews
+    pages[1] = news_router.GNewsError("down")
+    with pytest.raises(news_router.GNewsError):
+        news_router.fetch_since("q", "2026-10-19T10:00:59Z")
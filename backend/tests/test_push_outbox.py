@@ -0,0 +1,145 @@
+"""
+PushOutbox job lifecycle and the OutboxWorker drain loop.
+
+    cd backend && python -m pytest tests
+"""
+import asyncio
+import time
+
+import pytest
+
+from Feature1 import push_outbox
+from Feature1.push_outbox import DEAD, FAILED, GONE, IN_FLIGHT, PENDING, SENT, OutboxWorker, PushOutbox
+from Feature1.push_service import PushOutcome
+
+PAYLOAD = {"title": "🚨 EMERGENCY: Flood", "data": {"incident_id": "i1", "severity": "high"}}
+
+
+def recipient(n):
+    return {"subscriber_id": f"user-{n}", "subscription_id": f"sub-{n}", "subscription": {"endpoint": f"https://push/{n}"}}
+
+
+@pytest.fixture
+def outbox(tmp_path):
+    return PushOutbox(str(tmp_path / "outbox.db"), max_attempts=3)
+
+
+def statuses(outbox):
+    return outbox.stats()["by_status"]
+
+
+def test_enqueue_is_idempotent_per_incident_and_subscriber(outbox):
+    assert outbox.enqueue("i1", [recipient(1), recipient(2)], PAYLOAD) == 2
+    assert outbox.enqueue("i1", [recipient(1), recipient(3)], PAYLOAD) == 1
+    assert statuses(outbox) == {PENDING: 3}
+
+
+def test_claim_leases_jobs_until_the_lease_expires(outbox):
+    outbox.enqueue("i1", [recipient(1)], PAYLOAD)
+    jobs = outbox.claim(lease=60)
+    assert [job["subscriber_id"] for job in jobs] == ["user-1"]
+    assert jobs[0]["payload"] == PAYLOAD and jobs[0]["subscription"] == {"endpoint": "https://push/1"}
+    assert statuses(outbox) == {IN_FLIGHT: 1}
+    # Held by a live worker: not handed out again
+    assert outbox.claim() == []
+
+
+def test_expired_lease_is_claimed_again(outbox):
+    outbox.enqueue("i1", [recipient(1)], PAYLOAD)
+    outbox.claim(lease=-1)
+    # The worker holding it died; the job is due again
+    assert len(outbox.claim()) == 1
+
+
+def test_backoff_delay_is_jittered_and_capped():
+    for attempts in range(1, 20):
+        delay = push_outbox.backoff_delay(attempts)
+        assert 0 <= delay <= min(push_outbox.PUSH_BACKOFF_MAX, push_outbox.PUSH_BACKOFF_BASE * 2 ** attempts)
+
+
+def test_transient_failure_backs_off_then_dead_letters(outbox, monkeypatch):
+    monkeypatch.setattr(push_outbox, "backoff_delay", lambda attempts: 30)
+    outbox.enqueue("i1", [recipient(1)], PAYLOAD)
+    job = outbox.claim()[0]
+    outbox.complete([(job, PushOutcome.TRANSIENT, "503")])
+    assert statuses(outbox) == {PENDING: 1}
+    # Rescheduled 30 s out, so nothing is due yet
+    assert outbox.claim() == []
+
+    for attempts in (1, 2):
+        outbox.complete([(dict(job, attempts=attempts), PushOutcome.TRANSIENT, "503")])
+    # max_attempts=3 reached: dead-lettered instead of retried
+    assert statuses(outbox) == {DEAD: 1}
+
+
+def test_final_outcomes(outbox):
+    outbox.enqueue("i1", [recipient(1), recipient(2), recipient(3)], PAYLOAD)
+    jobs = {job["subscriber_id"]: job for job in outbox.claim()}
+    outbox.complete([
+        (jobs["user-1"], PushOutcome.SENT, None),
+        (jobs["user-2"], PushOutcome.GONE, "410"),
+        (jobs["user-3"], PushOutcome.FAILED, "400"),
+    ])
+    assert statuses(outbox) == {SENT: 1, GONE: 1, FAILED: 1}
+    assert outbox.claim() == []
+
+
+def test_defer_returns_jobs_without_counting_an_attempt(outbox):
+    outbox.enqueue("i1", [recipient(1)], PAYLOAD)
+    job = outbox.claim()[0]
+    outbox.defer([job["id"]], time.time() - 1)
+    again = outbox.claim()
+    assert again[0]["id"] == job["id"] and again[0]["attempts"] == 0
+
+
+def test_purge_removes_only_finished_jobs(outbox):
+    outbox.enqueue("i1", [recipient(1), recipient(2)], PAYLOAD)
+    jobs = {job["subscriber_id"]: job for job in outbox.claim()}
+    outbox.complete([(jobs["user-1"], PushOutcome.SENT, None), (jobs["user-2"], PushOutcome.TRANSIENT, "503")])
+    assert outbox.purge(older_than=3600) == 0
+    assert outbox.purge(older_than=-1) == 1
+    assert statuses(outbox) == {PENDING: 1}
+
+
+def test_worker_drains_and_reports_gone_subscriptions(outbox):
+    outbox.enqueue("i1", [recipient(1), recipient(2)], PAYLOAD)
+    outcomes = {"https://push/1": PushOutcome.SENT, "https://push/2": PushOutcome.GONE}
+    gone = []
+    worker = OutboxWorker(outbox, lambda sub, payload: outcomes[sub["endpoint"]], on_gone=gone.extend)
+
+    assert asyncio.run(worker.drain()) == 2
+    assert gone == ["sub-2"]
+    assert statuses(outbox) == {SENT: 1, GONE: 1}
+    assert worker.stats()["delivered"] == 1
+
+
+def test_worker_treats_deliver_exceptions_as_transient(outbox):
+    outbox.enqueue("i1", [recipient(1)], PAYLOAD)
+
+    def deliver(sub, payload):
+        raise ConnectionError("reset")
+
+    worker = OutboxWorker(outbox, deliver)
+    asyncio.run(worker.drain_once())
+    assert statuses(outbox) == {PENDING: 1}
+
+
+def test_leases_are_renewed_while_a_slow_batch_sends(outbox):
+    outbox.enqueue("i1", [recipient(1)], PAYLOAD)
+
+    def slow_deliver(sub, payload):
+        time.sleep(0.5)
+        return PushOutcome.SENT
+
+    worker = OutboxWorker(outbox, slow_deliver, lease=0.3)
+
+    async def run():
+        drain = asyncio.create_task(worker.drain_once())
+        # Past the original lease, but the batch is still sending
+        await asyncio.sleep(0.4)
+        stolen = await asyncio.to_thread(outbox.claim)
+        await drain
+        return stolen
+
+    assert asyncio.run(run()) == []
+    assert statuses(outbox) == {SENT: 1}
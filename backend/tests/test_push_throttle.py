@@ -0,0 +1,92 @@
+"""
+SubscriberThrottle decisions and the outbox worker's defer/merge path.
+
+    cd backend && python -m pytest tests
+"""
+import asyncio
+import time
+
+from Feature1.push_outbox import PENDING, SENT, OutboxWorker, PushOutbox
+from Feature1.push_service import PushOutcome
+from Feature1.push_throttle import SubscriberThrottle, build_digest
+
+SUBSCRIBER = {"subscriber_id": "user-1", "subscription_id": "sub-1", "subscription": {"endpoint": "https://push/1"}}
+
+
+def alert(incident_id, severity="high"):
+    return {"title": f"🚨 EMERGENCY: Fire {incident_id}", "data": {"incident_id": incident_id, "severity": severity}}
+
+
+def test_digest_window_defers_the_next_push():
+    throttle = SubscriberThrottle(digest_window=60, capacity=5, refill_per_minute=2, bypass_severities=())
+    assert throttle.ready_at("u", now=1000) is None
+    throttle.record_sent("u", now=1000)
+    assert throttle.ready_at("u", now=1010) == 1060
+    assert throttle.ready_at("u", now=1060) is None
+
+
+def test_empty_bucket_waits_for_a_refill():
+    throttle = SubscriberThrottle(digest_window=0, capacity=2, refill_per_minute=6, bypass_severities=())
+    throttle.record_sent("u", now=1000)
+    throttle.record_sent("u", now=1000)
+    # One token per 10 s
+    assert throttle.ready_at("u", now=1000) == 1010
+    assert throttle.ready_at("u", now=1010) is None
+
+
+def test_bypass_severities_are_configurable():
+    assert SubscriberThrottle(bypass_severities={"critical"}).bypasses(alert("a", "Critical"))
+    assert not SubscriberThrottle(bypass_severities={"critical"}).bypasses(alert("a", "high"))
+    assert not SubscriberThrottle(bypass_severities=()).bypasses(alert("a", "critical"))
+
+
+def test_build_digest_summarises_and_opens_the_newest():
+    digest = build_digest([alert("a"), alert("b")])
+    assert digest["title"] == "🚨 2 emergency alerts near you"
+    assert digest["body"] == "Fire a; Fire b"
+    assert digest["data"]["incident_id"] == "b"
+    assert digest["data"]["incident_ids"] == ["a", "b"]
+
+
+def run_worker(outbox, throttle):
+    sent = []
+
+    def deliver(subscription, payload):
+        sent.append(payload)
+        return PushOutcome.SENT
+
+    worker = OutboxWorker(outbox, deliver, throttle=throttle)
+    asyncio.run(worker.drain())
+    return sent
+
+
+def test_worker_defers_then_merges_a_burst(tmp_path):
+    outbox = PushOutbox(str(tmp_path / "outbox.db"))
+    throttle = SubscriberThrottle(digest_window=0.2, capacity=5, refill_per_minute=60, bypass_severities=())
+
+    outbox.enqueue("a", [SUBSCRIBER], alert("a"))
+    assert [p["data"]["incident_id"] for p in run_worker(outbox, throttle)] == ["a"]
+
+    # Inside the window: both are put back instead of sent
+    outbox.enqueue("b", [SUBSCRIBER], alert("b"))
+    outbox.enqueue("c", [SUBSCRIBER], alert("c"))
+    assert run_worker(outbox, throttle) == []
+    assert outbox.stats()["by_status"] == {SENT: 1, PENDING: 2}
+    assert throttle.stats()["deferrals"] == 2
+
+    time.sleep(0.25)
+    sent = run_worker(outbox, throttle)
+    assert len(sent) == 1 and sent[0]["data"]["incident_ids"] == ["b", "c"]
+    # The digest's outcome settles both jobs
+    assert outbox.stats()["by_status"] == {SENT: 3}
+    assert throttle.stats()["pushes_saved"] == 1
+
+
+def test_bypassing_alerts_skip_the_window(tmp_path):
+    outbox = PushOutbox(str(tmp_path / "outbox.db"))
+    throttle = SubscriberThrottle(digest_window=60, bypass_severities={"critical"})
+    outbox.enqueue("a", [SUBSCRIBER], alert("a"))
+    run_worker(outbox, throttle)
+    outbox.enqueue("b", [SUBSCRIBER], alert("b", "critical"))
+    assert [p["data"]["incident_id"] for p in run_worker(outbox, throttle)] == ["b"]
+    assert throttle.stats()["critical_bypassed"] == 1
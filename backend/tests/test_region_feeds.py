@@ -0,0 +1,110 @@
+"""
+Materialized region feeds: parsing, request matching, when a feed is
+rebuilt, and that a served feed equals the live ranking.
+
+    cd backend && python -m pytest tests
+"""
+import datetime
+import math
+
+import pytest
+from fastapi import FastAPI
+from starlette.testclient import TestClient
+
+from Feature2_news import news_router, region_feeds
+from Feature2_news.region_feeds import Region
+
+MUMBAI = Region("Mumbai", 19.0760, 72.8777)
+
+
+def test_parse_regions_skips_malformed_entries():
+    regions = region_feeds.parse_regions("Delhi:28.6:77.2; Bad entry ;Navi Mumbai:19.03:73.02;")
+    assert regions == [Region("Delhi", 28.6, 77.2), Region("Navi Mumbai", 19.03, 73.02)]
+
+
+def test_match_region_by_name_or_nearby_coordinates():
+    assert region_feeds.match_region(" mumbai ", None, None).name == "Mumbai"
+    assert region_feeds.match_region(None, 19.08, 72.88).name == "Mumbai"
+    # Coordinates win over the name, and far-off ones match nothing
+    assert region_feeds.match_region("Mumbai", 28.61, 77.21).name == "Delhi"
+    assert region_feeds.match_region("Mumbai", 21.0, 75.0) is None
+    assert region_feeds.match_region("Atlantis", None, None) is None
+
+
+def state(ids, cutoff_km):
+    return {"ids": set(ids), "cutoff_km": cutoff_km}
+
+
+def located(lat, lon):
+    return {"latitude": lat, "longitude": lon}
+
+
+def test_needs_rebuild():
+    window = {1, 2, 3}
+    full = state([1, 2], cutoff_km=50.0)
+    # Missing feed, or one of its articles left the window
+    assert region_feeds.needs_rebuild(MUMBAI, None, window, [], feed_size=2)
+    assert region_feeds.needs_rebuild(MUMBAI, state([1, 9], 50.0), window, [], feed_size=2)
+    # A full feed changes only for an article closer than its last item
+    assert not region_feeds.needs_rebuild(MUMBAI, full, window, [located(28.6, 77.2)], feed_size=2)
+    assert region_feeds.needs_rebuild(MUMBAI, full, window, [located(19.08, 72.88)], feed_size=2)
+    # Unlocated articles rank last, so they matter only if the feed already holds some
+    assert not region_feeds.needs_rebuild(MUMBAI, full, window, [located(None, None)], feed_size=2)
+    assert region_feeds.needs_rebuild(MUMBAI, state([1, 2], math.inf), window, [located(None, None)], feed_size=2)
+    # A feed that is not full takes any new article
+    assert region_feeds.needs_rebuild(MUMBAI, state([1], 50.0), window, [located(28.6, 77.2)], feed_size=2)
+    assert not region_feeds.needs_rebuild(MUMBAI, state([1], 50.0), window, [], feed_size=2)
+
+
+def article(n, lat, lon, hours_ago=0):
+    published = datetime.datetime.now(datetime.timezone.utc) - datetime.timedelta(hours=hours_ago)
+    return {
+        "title": f"Flood {n}", "description": None, "image_url": None, "source_name": "Wire",
+        "article_url": f"http://news.local/{n}", "published_at": published.strftime("%Y-%m-%dT%H:%M:%SZ"),
+        "category": "Flood", "location_name": None, "latitude": lat, "longitude": lon,
+    }
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(news_router, "DB_FILE", str(tmp_path / "news.db"))
+    monkeypatch.setattr(news_router, "ARCHIVE_DB_FILE", str(tmp_path / "news_archive.db"))
+    monkeypatch.setattr(news_router, "IMAGE_DB_FILE", str(tmp_path / "news_images.db"))
+    monkeypatch.setattr(news_router, "VERSION_FILE", str(tmp_path / "news.version"))
+    news_router.init_db()
+    app = FastAPI()
+    app.include_router(news_router.router)
+    return TestClient(app)
+
+
+def live_ranking(client, region):
+    # include_archive bypasses the materialized feed
+    return client.get("/news/", params={"latitude": region.latitude, "longitude": region.longitude,
+                                        "include_archive": "true"}).json()
+
+
+def test_served_feed_matches_the_live_ranking(client):
+    news_router.store_articles([
+        article(1, 19.10, 72.90, hours_ago=3),
+        article(2, 28.61, 77.21, hours_ago=2),
+        article(3, None, None, hours_ago=1),
+    ])
+    mumbai = region_feeds.match_region("Mumbai", None, None)
+    served = client.get("/news/", params={"location": "Mumbai"}).json()
+    assert [a["title"] for a in served] == ["Flood 1", "Flood 2", "Flood 3"]
+    assert served == live_ranking(client, mumbai)
+
+    # A closer article arriving later is picked up by the incremental refresh
+    news_router.store_articles([article(4, 19.076, 72.878)])
+    served = client.get("/news/", params={"location": "Mumbai"}).json()
+    assert served[0]["title"] == "Flood 4"
+    assert served == live_ranking(client, mumbai)
+
+
+def test_forced_rebuild_skips_unchanged_feeds(client):
+    news_router.store_articles([article(1, 19.10, 72.90)])
+    conn = news_router.get_db_connection()
+    try:
+        assert news_router.refresh_region_feeds(conn, force=True) == 0
+    finally:
+        conn.close()
@@ -0,0 +1,39 @@
+"""
+GridIndex radius candidates, including lookups near the poles.
+
+    cd backend && python -m pytest tests
+"""
+import random
+import time
+
+import pytest
+
+from Feature1.spatial_index import GridIndex, haversine_km
+
+
+@pytest.fixture
+def points():
+    rng = random.Random(7)
+    return {i: (rng.uniform(-90, 90), rng.uniform(-170, 170)) for i in range(2000)}
+
+
+@pytest.mark.parametrize("lat, lon, radius_km", [
+    (19.07, 72.87, 5), (28.6, 77.2, 50), (60.0, -10.0, 500), (88.7, -105.3, 500), (-89.5, 0.0, 300),
+])
+def test_candidates_cover_every_point_in_range(points, lat, lon, radius_km):
+    index = GridIndex(cell_km=2.0)
+    for key, (plat, plon) in points.items():
+        index.insert(key, plat, plon)
+    exact = {key for key, (plat, plon) in points.items() if haversine_km(lat, lon, plat, plon) <= radius_km}
+    assert exact <= set(index.candidates(lat, lon, radius_km))
+
+
+def test_polar_lookup_is_bounded():
+    index = GridIndex(cell_km=1.0)
+    index.insert("pole", 89.99, 10.0)
+    index.insert("mumbai", 19.07, 72.87)
+    start = time.perf_counter()
+    found = set(index.candidates(90.0, 0.0, 50))
+    # Unclamped, this walked ~10^8 longitude cells
+    assert time.perf_counter() - start < 0.05
+    assert found == {"pole"}
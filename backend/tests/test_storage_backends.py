@@ -0,0 +1,170 @@
+"""
+Shared behaviour suite for the IncidentStore backends.
+
+Every test runs against SQLiteStore and against SupabaseStore on the
+in-memory FakeSupabase client (benchmarks/standins.py), so both backends
+are held to the same contract.
+
+    cd backend && python -m pytest tests
+"""
+import time
+
+import pytest
+
+from benchmarks.standins import FakeSupabase
+from Feature1.storage import SQLiteStore, SupabaseStore
+
+REPORTER = "00000000-0000-0000-0000-000000000001"
+RESPONDER = "00000000-0000-0000-0000-000000000002"
+OTHER_RESPONDER = "00000000-0000-0000-0000-000000000003"
+
+
+@pytest.fixture(params=["sqlite", "supabase"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        store = SQLiteStore(str(tmp_path / "store.db"), media_dir=str(tmp_path / "media"))
+    else:
+        store = SupabaseStore(FakeSupabase())
+    store.upsert_profile({"id": REPORTER, "full_name": "Asha Reporter", "phone_number": "+911234567890"})
+    store.upsert_profile({"id": RESPONDER, "full_name": "Ravi Responder"})
+    return store
+
+
+def new_incident(store, **fields):
+    incident = {
+        "title": "Flooding near station",
+        "description": "Water rising",
+        "type": "flood",
+        "latitude": 19.07,
+        "longitude": 72.87,
+        "severity": "critical",
+        "status": "pending",
+        "ai_analysis": {"severity": "critical", "resources": ["ambulance"]},
+        "reporter_id": REPORTER,
+    }
+    incident.update(fields)
+    return store.create_incident(incident)
+
+
+def test_create_incident_returns_stored_row_and_opens_room(store):
+    incident = new_incident(store)
+    assert incident["id"] and incident["created_at"]
+    assert incident["title"] == "Flooding near station"
+    assert incident["ai_analysis"] == {"severity": "critical", "resources": ["ambulance"]}
+
+    room = store.get_room(incident["id"])
+    assert room is not None and room["incident_id"] == incident["id"]
+
+
+def test_active_incidents_exclude_closed(store):
+    open_incident = new_incident(store)
+    new_incident(store, title="Old fire", status="closed")
+    active = store.list_active_incidents()
+    assert [i["id"] for i in active] == [open_incident["id"]]
+
+
+def test_update_incident_images(store):
+    incident = new_incident(store, image_url="https://cdn/original.jpg")
+    updated = store.update_incident_images(incident["id"], "https://cdn/display.webp", "https://cdn/thumb.webp")
+    assert updated["image_url"] == "https://cdn/display.webp"
+    assert updated["thumbnail_url"] == "https://cdn/thumb.webp"
+    assert store.update_incident_images("00000000-0000-0000-0000-00000000dead", None, None) is None
+
+
+def test_accept_has_exactly_one_winner(store):
+    incident = new_incident(store)
+
+    first = store.accept_incident(incident["id"], RESPONDER)
+    assert first["accepted"] is True
+    assert first["incident"]["status"] == "dispatched"
+    assert first["incident"]["responder_id"] == RESPONDER
+    # Name looked up from profiles when the caller has none cached
+    assert first["responder_name"] == "Ravi Responder"
+
+    second = store.accept_incident(incident["id"], OTHER_RESPONDER, "Someone Else")
+    assert second == {"accepted": False, "status": "dispatched"}
+
+
+def test_accept_unknown_incident_reports_no_status(store):
+    result = store.accept_incident("00000000-0000-0000-0000-00000000dead", RESPONDER)
+    assert result == {"accepted": False, "status": None}
+
+
+def test_accept_posts_system_message_with_cached_name(store):
+    incident = new_incident(store)
+    store.accept_incident(incident["id"], RESPONDER, "Cached Name")
+    detail = store.get_incident_detail(incident["id"], limit=10)
+    assert [m["content"] for m in detail["messages"]] == ["🚨 Cached Name has accepted this incident."]
+
+
+def test_incident_detail_embeds_reporter_and_pages_messages(store):
+    incident = new_incident(store)
+    room_id = store.get_room(incident["id"])["id"]
+    for i in range(5):
+        store.post_message(room_id, RESPONDER, f"message {i}")
+        time.sleep(0.002)
+
+    detail = store.get_incident_detail(incident["id"], limit=3)
+    assert detail["incident"]["id"] == incident["id"]
+    assert detail["incident"]["profiles"] == {"full_name": "Asha Reporter", "phone_number": "+911234567890"}
+    assert detail["room_id"] == room_id
+    # Newest first
+    assert [m["content"] for m in detail["messages"]] == ["message 4", "message 3", "message 2"]
+    assert detail["messages"][0]["profiles"] == {"full_name": "Ravi Responder"}
+
+    older = store.get_incident_detail(incident["id"], limit=3, before=detail["messages"][-1]["created_at"])
+    assert [m["content"] for m in older["messages"]] == ["message 1", "message 0"]
+
+
+def test_incident_detail_missing(store):
+    assert store.get_incident_detail("00000000-0000-0000-0000-00000000dead", limit=10) is None
+
+
+def test_profiles_upsert_and_get(store):
+    store.upsert_profile({"id": RESPONDER, "full_name": "Ravi R.", "last_latitude": 19.1, "last_longitude": 72.9})
+    profile = store.get_profile(RESPONDER)
+    assert profile["full_name"] == "Ravi R."
+    assert profile["last_latitude"] == 19.1
+    assert store.get_profile(OTHER_RESPONDER) is None
+
+
+def test_push_subscription_per_user_replaced(store):
+    store.upsert_push_subscription(RESPONDER, {"endpoint": "https://push.example/old"})
+    store.upsert_push_subscription(RESPONDER, {"endpoint": "https://push.example/new"})
+    subs = store.list_push_subscriptions()
+    assert len(subs) == 1
+    assert subs[0]["subscription"] == {"endpoint": "https://push.example/new"}
+
+
+def test_push_subscriptions_carry_owner_location(store):
+    store.upsert_profile({"id": RESPONDER, "full_name": "Ravi Responder", "last_latitude": 19.1, "last_longitude": 72.9})
+    store.upsert_push_subscription(RESPONDER, {"endpoint": "https://push.example/a"})
+    store.upsert_push_subscription(OTHER_RESPONDER, {"endpoint": "https://push.example/b"})
+
+    by_user = {s["user_id"]: s for s in store.list_push_subscriptions()}
+    assert by_user[RESPONDER]["profiles"] == {"last_latitude": 19.1, "last_longitude": 72.9}
+    # No profile row for this user
+    assert by_user[OTHER_RESPONDER]["profiles"] is None
+
+
+def test_delete_push_subscriptions(store):
+    keep = store.upsert_push_subscription(RESPONDER, {"endpoint": "https://push.example/a"})
+    gone = store.upsert_push_subscription(OTHER_RESPONDER, {"endpoint": "https://push.example/b"})
+    store.delete_push_subscriptions([gone["id"]])
+    store.delete_push_subscriptions([])
+    assert [s["id"] for s in store.list_push_subscriptions()] == [keep["id"]]
+
+
+def test_image_bucket_public_url(store):
+    bucket = store.image_bucket("incident-images")
+    bucket.upload("incidents/abc/original.jpg", b"\xff\xd8\xff", {"content-type": "image/jpeg"})
+    assert bucket.get_public_url("incidents/abc/original.jpg").endswith("incident-images/incidents/abc/original.jpg")
+
+
+def test_attach_report_posts_into_incident_room(store):
+    incident = new_incident(store)
+    message = store.attach_report(incident["id"], REPORTER, "📍 Additional report: water at knee height")
+    assert message["content"] == "📍 Additional report: water at knee height"
+    detail = store.get_incident_detail(incident["id"], limit=10)
+    assert [m["content"] for m in detail["messages"]] == ["📍 Additional report: water at knee height"]
+    assert store.attach_report("00000000-0000-0000-0000-00000000dead", REPORTER, "lost") is None
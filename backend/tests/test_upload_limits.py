@@ -0,0 +1,78 @@
+"""
+Request body cap (BodySizeLimitMiddleware) and the capped image upload read.
+
+    cd backend && python -m pytest tests
+"""
+import asyncio
+import io
+
+import pytest
+from fastapi import FastAPI, HTTPException, Request, UploadFile
+from starlette.testclient import TestClient
+
+from common.body_limit import BodySizeLimitMiddleware
+from Feature1.image_pipeline import read_upload_capped
+
+PNG = b"\x89PNG\r\n\x1a\n" + b"\x00" * 100
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+
+    @app.post("/echo")
+    async def echo(request: Request):
+        return {"received": len(await request.body())}
+
+    app.add_middleware(BodySizeLimitMiddleware, max_bytes=1000)
+    return TestClient(app)
+
+
+def chunks(total, size=100):
+    for _ in range(total // size):
+        yield b"x" * size
+
+
+def test_bodies_within_the_cap_pass(client):
+    assert client.post("/echo", content=b"x" * 1000).json() == {"received": 1000}
+    assert client.post("/echo", content=chunks(500)).json() == {"received": 500}
+
+
+def test_oversized_content_length_is_refused_before_reading(client):
+    response = client.post("/echo", content=b"x" * 1001)
+    assert response.status_code == 413
+    assert response.text == "Request body too large"
+
+
+def test_oversized_chunked_body_is_cut_off(client):
+    response = client.post("/echo", content=chunks(5000))
+    assert response.status_code == 413
+    assert response.json() == {"detail": "Request body too large"}
+
+
+def upload(data, filename="photo.png", size=None):
+    return UploadFile(io.BytesIO(data), filename=filename, size=size)
+
+
+def test_capped_read_keeps_the_spooled_file():
+    image = asyncio.run(read_upload_capped(upload(PNG, size=len(PNG))))
+    assert (image.ext, image.content_type, image.size) == ("png", "image/png", len(PNG))
+    assert image.original_path.endswith("/original.png")
+    # Rewound for the storage upload
+    assert image.file.read() == PNG
+
+
+def test_capped_read_measures_uploads_without_a_size():
+    image = asyncio.run(read_upload_capped(upload(PNG)))
+    assert image.size == len(PNG)
+
+
+@pytest.mark.parametrize("data, max_bytes, status", [
+    (PNG, 50, 413),
+    (b"", 1000, 400),
+    (b"<svg onload=alert(1)>", 1000, 415),
+])
+def test_capped_read_rejects(data, max_bytes, status):
+    with pytest.raises(HTTPException) as excinfo:
+        asyncio.run(read_upload_capped(upload(data), max_bytes=max_bytes))
+    assert excinfo.value.status_code == status
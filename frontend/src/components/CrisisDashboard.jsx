@@ -7,6 +7,8 @@ import IncidentChat from './IncidentChat';
 import IncidentReport from './IncidentReport';
 import { AlertTriangle, Activity, Volume2, Bell, CheckCircle } from 'lucide-react';
 
+const INCIDENT_FIELDS = 'title,description,type,severity,status,latitude,longitude,ai_analysis,created_at';
+
 const calculateDistance = (lat1, lon1, lat2, lon2) => {
     const R = 6371; // km
     const dLat = (lat2 - lat1) * Math.PI / 180;
@@ -175,7 +177,8 @@ const CrisisDashboard = () => {
 
     const fetchActiveCrises = async () => {
         try {
-            const url = getApiEndpoint('crisis/active');
+            // The list, map popups and detail panel use these columns; the API default is more compact
+            const url = getApiEndpoint(`crisis/active?fields=${INCIDENT_FIELDS}`);
             console.log('Fetching crises from:', url);
             const res = await fetch(url);
             if (!res.ok) {
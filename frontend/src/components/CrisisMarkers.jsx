@@ -49,12 +49,16 @@ const latLonToVector3 = (lat, lon, radius) => {
     return [x, y, z];
 }
 
+// Grid zoom used for the globe view
+const GLOBE_CLUSTER_ZOOM = 3;
+
 export const CrisisMarkers = () => {
     const [incidents, setIncidents] = React.useState([]);
 
     React.useEffect(() => {
         const fetchMarkers = async () => {
-            const url = getApiEndpoint('crisis/active');
+            // The globe only needs one marker per region, so ask for server-side clusters
+            const url = getApiEndpoint(`crisis/clusters?zoom=${GLOBE_CLUSTER_ZOOM}`);
             console.log(`[CrisisMarkers] Fetching from: ${url}`);
 
             try {
@@ -66,15 +70,15 @@ export const CrisisMarkers = () => {
 
                 const data = await res.json();
                 console.log('[CrisisMarkers] Data received:', data);
-                const crises = data.crises || [];
-                console.log('[CrisisMarkers] Crises count:', crises.length);
+                const clusters = data.clusters || [];
+                console.log('[CrisisMarkers] Clusters count:', clusters.length);
 
-                const mapped = crises.map(c => ({
-                    id: c.id,
+                const mapped = clusters.map(c => ({
+                    id: c.incident_id || `${c.latitude},${c.longitude}`,
                     lat: c.latitude,
                     lon: c.longitude,
-                    type: c.severity,
-                    label: c.title
+                    type: c.max_severity,
+                    label: c.count > 1 ? `${c.count} incidents` : '1 incident'
                 }));
 
                 if (mapped.length > 0) {
@@ -306,10 +306,12 @@ const NewsPage = () => {
                                             <div className="h-40 w-full relative overflow-hidden">
                                                 <div className="absolute inset-0 bg-[#0a0a0f] z-0"></div>
                                                 <img
-                                                    src={item.image_url || 'https://via.placeholder.com/600x400?text=NO+VISUAL'}
+                                                    src={getApiEndpoint(`news/image/${item.id}?size=thumb`)}
                                                     alt={item.title}
+                                                    loading="lazy"
+                                                    decoding="async"
                                                     className="w-full h-full object-cover opacity-60 group-hover:opacity-100 group-hover:scale-110 transition-all duration-700 grayscale group-hover:grayscale-0 mix-blend-luminosity group-hover:mix-blend-normal"
-                                                    onError={(e) => { e.target.src = 'https://via.placeholder.com/600x400/000000/FFFFFF?text=IMG_ERR'; }}
+                                                    onError={(e) => { e.target.style.visibility = 'hidden'; }}
                                                 />
                                                 <div className="absolute inset-0 bg-gradient-to-t from-surface-1 via-transparent to-transparent"></div>
 
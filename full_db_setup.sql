@@ -42,6 +42,8 @@ create table profiles (
 create table incidents (
   id uuid default uuid_generate_v4() primary key,
   reporter_id uuid references profiles(id),
+  -- Set by accept_incident (accept_incident_rpc.sql)
+  responder_id uuid references profiles(id),
   title text not null,
   description text,
   latitude float not null,
@@ -0,0 +1,5 @@
+-- Thumbnail column for incident photos.
+-- The backend stores a downscaled WebP display image in image_url and a
+-- small WebP thumbnail here for map markers and dashboard lists.
+alter table public.incidents
+add column if not exists thumbnail_url text;
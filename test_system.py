@@ -2,13 +2,32 @@
 """
 SankatSaathi System Test Script
 Tests all API endpoints and verifies system functionality
+
+    python test_system.py                       # smoke test a running backend
+    python test_system.py --load                # load test a running backend
+    python test_system.py --load --offline      # load test against local fakes, no network
+
+Load mode drives /crisis/alert, /crisis/active, /news/ and /news/fetch-news
+at a configurable concurrency and reports p50/p95/p99 latency and
+throughput per endpoint. --offline starts the backend with a fake Supabase
+and local GNews, Nominatim and push stand-ins (backend/benchmarks).
 """
 
-import requests
+import argparse
 import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
-BASE_URL = "http://localhost:8000"
+import requests
+
+BASE_URL = os.getenv("BASE_URL", "http://localhost:8000")
+BACKEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "backend")
 
 def test_api_health():
     """Test API health endpoint"""
@@ -124,5 +143,163 @@ def run_all_tests():
     
     print("=" * 60)
 
+# --- Load testing ---
+
+# Around Mumbai, where the offline server seeds its subscribers
+ALERT_CENTER = (19.076, 72.8777)
+NEWS_LOCATIONS = ["Mumbai", "Chennai", "Kolkata", "Assam", "Kerala", "India"]
+
+_local = threading.local()
+
+
+def _session():
+    if not hasattr(_local, "session"):
+        _local.session = requests.Session()
+    return _local.session
+
+
+def _post_alert(session, i):
+    lat = ALERT_CENTER[0] + random.uniform(-0.05, 0.05)
+    lon = ALERT_CENTER[1] + random.uniform(-0.05, 0.05)
+    return session.post(f"{BASE_URL}/api/crisis/alert", data={
+        "title": f"Load test incident {i}",
+        "description": "Water level rising near the station",
+        "crisis_type": random.choice(["flood", "fire", "earthquake"]),
+        "latitude": lat,
+        "longitude": lon,
+    }, timeout=30)
+
+
+def _get_active(session, i):
+    return session.get(f"{BASE_URL}/api/crisis/active", timeout=30)
+
+
+def _get_news(session, i):
+    return session.get(f"{BASE_URL}/api/news/", params={
+        "latitude": ALERT_CENTER[0], "longitude": ALERT_CENTER[1]}, timeout=30)
+
+
+def _fetch_news(session, i):
+    return session.post(f"{BASE_URL}/api/news/fetch-news",
+                        json={"location": NEWS_LOCATIONS[i % len(NEWS_LOCATIONS)]}, timeout=60)
+
+
+SCENARIOS = {
+    "alert": ("POST /crisis/alert", _post_alert),
+    "active": ("GET /crisis/active", _get_active),
+    "news": ("GET /news/", _get_news),
+    "fetch-news": ("POST /news/fetch-news", _fetch_news),
+}
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, int(round(pct / 100 * len(sorted_values))))
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+def run_scenario(name, total, concurrency):
+    """Issues `total` requests with `concurrency` workers; returns a result row."""
+    label, call = SCENARIOS[name]
+
+    def one(i):
+        start = time.perf_counter()
+        try:
+            ok = call(_session(), i).status_code < 400
+        except requests.RequestException:
+            ok = False
+        return time.perf_counter() - start, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        samples = list(pool.map(one, range(total)))
+    elapsed = time.perf_counter() - started
+
+    latencies = sorted(s[0] * 1000 for s in samples)
+    return {
+        "endpoint": label,
+        "requests": total,
+        "errors": sum(1 for s in samples if not s[1]),
+        "p50_ms": round(percentile(latencies, 50), 2),
+        "p95_ms": round(percentile(latencies, 95), 2),
+        "p99_ms": round(percentile(latencies, 99), 2),
+        "throughput_rps": round(total / elapsed, 1),
+    }
+
+
+def start_offline_backend(port, subscribers, storage):
+    """Starts backend/benchmarks/offline_server.py and waits for /api/health."""
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.offline_server", "--port", str(port), "--subscribers", str(subscribers),
+         "--storage", storage],
+        cwd=BACKEND_DIR,
+    )
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("Offline backend exited during start-up")
+        try:
+            if requests.get(f"http://127.0.0.1:{port}/api/health", timeout=1).status_code == 200:
+                return proc
+        except requests.RequestException:
+            pass
+        time.sleep(0.25)
+    proc.terminate()
+    raise RuntimeError("Offline backend did not become healthy within 60s")
+
+
+def run_load_test(args):
+    print("=" * 72)
+    print(f"Load test: {BASE_URL}  concurrency={args.concurrency}  requests/endpoint={args.requests}")
+    print("=" * 72)
+    header = f"{'endpoint':<22} {'reqs':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8}"
+    print(header)
+    print("-" * len(header))
+    results = []
+    for name in args.endpoints:
+        row = run_scenario(name, args.requests, args.concurrency)
+        results.append(row)
+        print(f"{row['endpoint']:<22} {row['requests']:>6} {row['errors']:>6} {row['p50_ms']:>9.1f} "
+              f"{row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f} {row['throughput_rps']:>8.1f}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"base_url": BASE_URL, "concurrency": args.concurrency, "results": results}, f, indent=2)
+    return all(r["errors"] == 0 for r in results)
+
+
+def main():
+    global BASE_URL
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--base-url", default=BASE_URL)
+    parser.add_argument("--load", action="store_true", help="run the load test instead of the smoke test")
+    parser.add_argument("--offline", action="store_true", help="start a local backend with fake services")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="requests per endpoint")
+    parser.add_argument("--endpoints", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS))
+    parser.add_argument("--subscribers", type=int, default=500, help="seeded push subscribers (offline)")
+    parser.add_argument("--port", type=int, default=8765, help="port for the offline backend")
+    parser.add_argument("--storage", choices=["fake-supabase", "sqlite"], default="fake-supabase",
+                        help="storage backend for the offline backend")
+    parser.add_argument("--json", help="also write load results to this file")
+    args = parser.parse_args()
+
+    BASE_URL = args.base_url.rstrip("/")
+    server = None
+    if args.offline:
+        server = start_offline_backend(args.port, args.subscribers, args.storage)
+        BASE_URL = f"http://127.0.0.1:{args.port}"
+    try:
+        if args.load:
+            ok = run_load_test(args)
+            sys.exit(0 if ok else 1)
+        run_all_tests()
+    finally:
+        if server:
+            server.terminate()
+            server.wait(timeout=10)
+
+
 if __name__ == "__main__":
-    run_all_tests()
+    main()